@@ -0,0 +1,75 @@
+import math
+import numpy as np
+
+# -----------------------------------------------------------------------------------------------
+# LANDING CAMERA MODEL
+# -----------------------------------------------------------------------------------------------
+# Pinhole model of the downward camera, used to turn the normalised image error of a detection
+# into a ground-plane offset (metres) given altitude and the drone's roll/pitch at capture time.
+#
+# Mounting (same convention as DIR_X / DIR_Y in controller.py):
+#   image right (+err_x) = body right, image down (+err_y) = body backward, optical axis = body down
+#
+# Normalised image coordinates span -1.0 .. 1.0 across the frame, like normalized_error.
+# -----------------------------------------------------------------------------------------------
+# Image the published errors refer to: first_flight.py removes the letterbox padding before
+# publishing, so this is the camera's own CAM_WIDTH x CAM_HEIGHT (4:3), not the 640x640 model
+# input. For the square Gazebo SITL stream (direct_sitl.py) set 640 x 640.
+CAMERA_WIDTH = 640       # (pixels)
+CAMERA_HEIGHT = 480
+CAMERA_HFOV_DEG = 60.0   # Used when no calibration is set below
+# Square pixels (the letterbox keeps the aspect ratio): ~46.8 deg at 4:3
+CAMERA_VFOV_DEG = math.degrees(2 * math.atan(math.tan(math.radians(CAMERA_HFOV_DEG) / 2) * CAMERA_HEIGHT / CAMERA_WIDTH))
+
+# Calibrated intrinsics in pixels at CAMERA_WIDTH x CAMERA_HEIGHT (None = derive from the FOV)
+CAMERA_FX = None
+CAMERA_FY = None
+CAMERA_CX = None
+CAMERA_CY = None
+
+
+class CameraModel:
+    def __init__(self, fx, fy, cx, cy, width=CAMERA_WIDTH, height=CAMERA_HEIGHT):
+        # Focal length / principal point in normalised image units
+        self.fx = fx / (width / 2)
+        self.fy = fy / (height / 2)
+        self.cx = cx / (width / 2) - 1.0
+        self.cy = cy / (height / 2) - 1.0
+
+    @classmethod
+    def from_fov(cls, hfov_deg=CAMERA_HFOV_DEG, vfov_deg=CAMERA_VFOV_DEG, width=CAMERA_WIDTH, height=CAMERA_HEIGHT):
+        fx = (width / 2) / math.tan(math.radians(hfov_deg) / 2)
+        fy = (height / 2) / math.tan(math.radians(vfov_deg) / 2)
+        return cls(fx, fy, width / 2, height / 2, width, height)
+
+    @classmethod
+    def default(cls):
+        """Calibrated intrinsics if set at the top of this file, otherwise the nominal FOV."""
+        if None in (CAMERA_FX, CAMERA_FY, CAMERA_CX, CAMERA_CY):
+            return cls.from_fov()
+        return cls(CAMERA_FX, CAMERA_FY, CAMERA_CX, CAMERA_CY)
+
+    def ground_offset(self, err_x, err_y, altitude, roll_deg, pitch_deg):
+        """
+        Normalised image error -> target position relative to the drone on flat ground,
+        (forward, right) in metres, in the level heading frame used by VelocityBodyYawspeed.
+        Works element-wise on NumPy arrays.
+        """
+        # Ray through the pixel, body frame (forward, right, down)
+        fwd = -(err_y - self.cy) / self.fy
+        right = (err_x - self.cx) / self.fx
+        down = 1.0
+
+        # Undo roll, then pitch (ZYX Euler without yaw) to get the ray in the level frame
+        roll = np.radians(roll_deg)
+        pitch = np.radians(pitch_deg)
+        right, down = np.cos(roll) * right - np.sin(roll) * down, np.sin(roll) * right + np.cos(roll) * down
+        fwd, down = np.cos(pitch) * fwd + np.sin(pitch) * down, -np.sin(pitch) * fwd + np.cos(pitch) * down
+
+        # Intersect with the ground (rays at or above the horizon are clamped)
+        scale = altitude / np.maximum(down, 1e-3)
+        return fwd * scale, right * scale
+
+    def nadir_error(self, forward, right, altitude):
+        """Ground offset -> the normalised error a level camera would see (0.0 = directly below)."""
+        return self.fx * right / altitude, -self.fy * forward / altitude
@@ -0,0 +1,149 @@
+import json
+import numpy as np
+
+# -----------------------------------------------------------------------------------------------
+# CONTROL LAWS
+# -----------------------------------------------------------------------------------------------
+# Horizontal alignment laws for the precision landing. A law turns the normalised target error
+# into a correction velocity along the image axes (m/s, +x = towards +err_x); controller.py maps
+# it to body axes with DIR_X / DIR_Y, clamps it to MAX_SPEED_XY and adds the descent speed.
+#
+# All laws share one interface and are written with NumPy ops, so the same object can fly the
+# drone (scalars) or run thousands of landings in landing_sim.py (one lane per array element):
+#
+#   law.reset()
+#   u_x, u_y = law.step(err_x, err_y, altitude, dt, active=True)
+#
+# Any gain can be a number or a schedule over altitude, e.g. in the JSON config:
+#
+#   {"law": "pid",
+#    "kp_x": {"altitude": [0.5, 1.5, 4.0], "value": [0.4, 0.6, 0.8]},
+#    "ki_x": 0.15, "kd_x": 0.05, ...}
+#
+# Laws: "p" (proportional, the original law), "pi" and "pid" (with a low-pass filtered derivative
+# and a clamped, conditionally integrated integrator against windup).
+# -----------------------------------------------------------------------------------------------
+DERIVATIVE_TAU = 0.1     # Derivative low-pass time constant (s) - detection noise is amplified otherwise
+INTEGRAL_LIMIT = 0.3     # Max integral contribution (m/s)
+OUTPUT_LIMIT = 0.8       # Saturation used for anti-windup (m/s) - pass MAX_SPEED_XY
+
+
+class GainSchedule:
+    """Gain interpolated linearly over altitude (clamped outside the table)."""
+    def __init__(self, altitude, value):
+        if len(altitude) != len(value) or len(altitude) == 0:
+            raise ValueError("Gain schedule needs matching, non-empty 'altitude' and 'value' lists")
+        order = np.argsort(altitude)
+        self.altitude = np.asarray(altitude, dtype=float)[order]
+        self.value = np.asarray(value, dtype=float)[order]
+
+    def __call__(self, altitude):
+        return np.interp(altitude, self.altitude, self.value)
+
+
+def gain_at(gain, altitude):
+    """Value of a fixed gain (number or per-lane array) or GainSchedule at `altitude`."""
+    return gain(altitude) if isinstance(gain, GainSchedule) else gain
+
+
+class ControlLaw:
+    name = None
+
+    def reset(self):
+        """Clears the internal state (target lost / re-acquired)."""
+
+    def step(self, err_x, err_y, altitude, dt, active=True):
+        """
+        Normalised error -> (u_x, u_y) correction velocity in m/s along the image axes.
+        `active` (bool or per-lane mask) = lanes whose state may advance this step.
+        """
+        raise NotImplementedError
+
+
+class ProportionalLaw(ControlLaw):
+    name = "p"
+
+    def __init__(self, kp_x, kp_y):
+        self.kp_x = kp_x
+        self.kp_y = kp_y
+
+    def step(self, err_x, err_y, altitude, dt, active=True):
+        return err_x * gain_at(self.kp_x, altitude), err_y * gain_at(self.kp_y, altitude)
+
+
+class PIDLaw(ControlLaw):
+    name = "pid"
+
+    def __init__(self, kp_x, kp_y, ki_x=0.0, ki_y=0.0, kd_x=0.0, kd_y=0.0, derivative_tau=DERIVATIVE_TAU,
+                 integral_limit=INTEGRAL_LIMIT, limit=OUTPUT_LIMIT):
+        self.gains = ((kp_x, ki_x, kd_x), (kp_y, ki_y, kd_y))
+        self.derivative_tau = derivative_tau
+        self.integral_limit = integral_limit
+        self.limit = limit
+        self.reset()
+
+    def reset(self):
+        # Per axis: integral term (m/s), previous error, filtered error derivative
+        self._state = [[0.0, None, 0.0], [0.0, None, 0.0]]
+
+    def step(self, err_x, err_y, altitude, dt, active=True):
+        dt = np.maximum(dt, 1e-3)
+        return (self._axis(0, err_x, altitude, dt, active),
+                self._axis(1, err_y, altitude, dt, active))
+
+    def _axis(self, axis, err, altitude, dt, active):
+        kp, ki, kd = (gain_at(g, altitude) for g in self.gains[axis])
+        integral, prev, derivative = self._state[axis]
+
+        # Filtered derivative (no kick on the first step after a reset)
+        if prev is not None:
+            alpha = dt / (self.derivative_tau + dt)
+            derivative = np.where(active, derivative + alpha * ((err - prev) / dt - derivative), derivative)
+
+        p_term = kp * err
+        d_term = kd * derivative
+
+        # Anti-windup: only integrate while the output is unsaturated or the error unwinds it
+        candidate = np.clip(integral + ki * err * dt, -self.integral_limit, self.integral_limit)
+        unsaturated = p_term + candidate + d_term
+        winding = (np.abs(unsaturated) > self.limit) & (np.sign(err) == np.sign(unsaturated))
+        integral = np.where(winding | ~np.asarray(active), integral, candidate)
+
+        prev = err if prev is None else np.where(active, err, prev)
+        self._state[axis] = [integral, prev, derivative]
+        return np.clip(p_term + integral + d_term, -self.limit, self.limit)
+
+
+class PILaw(PIDLaw):
+    name = "pi"
+
+    def __init__(self, kp_x, kp_y, ki_x=0.0, ki_y=0.0, integral_limit=INTEGRAL_LIMIT, limit=OUTPUT_LIMIT):
+        super().__init__(kp_x, kp_y, ki_x, ki_y, integral_limit=integral_limit, limit=limit)
+
+
+LAWS = {cls.name: cls for cls in (ProportionalLaw, PILaw, PIDLaw)}
+
+
+def make_law(config, limit=OUTPUT_LIMIT):
+    """
+    Builds a law from a config dict: {"law": "p" | "pi" | "pid", <gain>: number | array |
+    {"altitude": [...], "value": [...]}, ...}.
+    """
+    config = dict(config)
+    name = config.pop("law", "p")
+    if name not in LAWS:
+        raise ValueError(f"Unknown control law '{name}' (expected one of: {', '.join(LAWS)})")
+
+    params = {}
+    for key, value in config.items():
+        if isinstance(value, dict):
+            value = GainSchedule(value.get("altitude", []), value.get("value", []))
+        params[key] = value
+    if name != "p":
+        params.setdefault("limit", limit)
+    return LAWS[name](**params)
+
+
+def load_law(path, limit=OUTPUT_LIMIT):
+    with open(path) as f:
+        return make_law(json.load(f), limit)
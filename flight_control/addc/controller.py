@@ -1,8 +1,14 @@
+import time
 import asyncio
-import zmq
-import json
+import numpy as np
 from mavsdk import System
 from mavsdk.offboard import (OffboardError, VelocityBodyYawspeed)
+from vision_sources import make_vision_source
+from latency import LatencyTracker
+from telemetry import TelemetryCache
+from camera_model import CameraModel
+from target_tracker import TargetTracker, heading_velocity
+from control_laws import ProportionalLaw, load_law
 
 # -----------------------------------------------------------------------------------------------
 # CONFIGURATION
@@ -10,9 +16,19 @@ from mavsdk.offboard import (OffboardError, VelocityBodyYawspeed)
 ZMQ_IP = "127.0.0.1"
 ZMQ_PORT = 5555
 
+# --- VISION SOURCE ---
+# Where detections come from (see vision_sources.py): "zmq" (Hailo publisher), "opencv"
+# (vision_module.py in this process), "recording" (a replay log played in real time) or "synthetic"
+VISION_SOURCE = "zmq"
+VISION_RECORDING = None  # Replay log (JSONL) for "recording"
+OPENCV_PIPELINE = None   # GStreamer pipeline or video file for "opencv" (None = SITL RTP stream, UDP 5600)
+
 # --- TUNING GAINS ---
 KP_X = 0.6   
 KP_Y = 0.6   
+# JSON file selecting the horizontal control law - "p", "pi" or "pid", gains optionally scheduled
+# by altitude (see control_laws.py, example: control_law.json). None = P law with KP_X / KP_Y.
+CONTROL_LAW_CONFIG = None
 
 # --- DIRECTION FIX (CONFIRMED WORKING) ---
 DIR_X = 1.0 
@@ -22,48 +38,169 @@ DIR_Y = -1.0
 MAX_SPEED_XY = 0.8      # Max horizontal speed (m/s)
 DESCENT_SPEED_FAST = 0.4 # Speed when high up (m/s)
 DESCENT_SPEED_SLOW = 0.15 # Speed when close to target (m/s)
+PRECISION_ALTITUDE = 1.5 # Below this height (meters) descend at DESCENT_SPEED_SLOW
 ALIGN_THRESHOLD = 0.1    # How close to center (0.0 - 1.0) before descending
 LANDING_ALTITUDE = 0.3   # Height (meters) to cut motors/land
+
+# --- DESCENT PROFILE ---
+# Blended: descent speed eases from full (error < ALIGN_THRESHOLD) to zero at the edge of the
+# acceptance cone (error >= DESCENT_CONE), and from SLOW to FAST across DESCENT_BLEND_BAND around
+# PRECISION_ALTITUDE, so the drone keeps descending while it corrects small errors.
+# False = original stop-and-go gating on ALIGN_THRESHOLD.
+DESCENT_BLENDING = True
+DESCENT_CONE = 0.3       # Normalised error (|x| + |y|) above which descent stops - the cone half-angle in image units
+DESCENT_BLEND_BAND = 1.0 # Altitude band (meters) centred on PRECISION_ALTITUDE to blend SLOW -> FAST
+TOUCHDOWN_CONFIRM = 0.15 # Altitude must stay below LANDING_ALTITUDE this long (s) before landing
+TOUCHDOWN_HYSTERESIS = 0.1 # Climbing back above LANDING_ALTITUDE + this (meters) re-arms the touchdown timer
+
+# --- ATTITUDE COMPENSATION ---
+# Remove the effect of roll/pitch (at frame capture time) from the image error, using the
+# camera intrinsics in camera_model.py. The result is the error a level camera would see, so
+# the gains above keep their meaning. Zero tilt = no change.
+ATTITUDE_COMPENSATION = True
+MIN_COMPENSATION_ALTITUDE = 0.2 # Below this height (meters) the raw image error is used
+
+# --- TARGET TRACKER ---
+# Kalman filter (target_tracker.py) that predicts the target offset between frames and through
+# short dropouts from the drone's own velocity. The loop then runs every CONTROL_PERIOD instead of
+# once per frame, and "lost" is decided by the estimate's uncertainty instead of VISION_TIMEOUT.
+TARGET_TRACKER = True
+CONTROL_PERIOD = 0.05    # Control step while tracking (s) - 20 Hz, independent of the detector FPS
+TRACK_DESCENT_STD = 0.15 # Position uncertainty (m) above which descent is paused (keep aligning)
+TRACK_LOST_STD = 0.5     # Position uncertainty (m) above which the target is lost -> hover
+TRACK_MAX_COAST = 1.0    # Max time (s) to fly on predictions alone without a detection
+
+# --- LOOP TIMING ---
+WATCHDOG_PERIOD = 0.1    # Max gap between setpoints while vision is silent (s) - keeps offboard alive
+VISION_TIMEOUT = 0.2     # No detection for this long -> target lost, hover (s)
+
+# --- DIAGNOSTICS ---
+LATENCY_REPORT_PATH = "latency_report.json" # Per-stage latency histogram, written after landing (None = print only)
+RECORD_PATH = None       # JSONL log of detections + altitude for offline replay (see replay.py), None = off
 # -----------------------------------------------------------------------------------------------
 
-class VisionSystem:
-    def __init__(self):
-        self.context = zmq.Context()
-        self.socket = self.context.socket(zmq.SUB)
-        # Latency Fix: Keep only the newest message
-        self.socket.setsockopt(zmq.CONFLATE, 1)
-        self.socket.connect(f"tcp://{ZMQ_IP}:{ZMQ_PORT}")
-        self.socket.setsockopt_string(zmq.SUBSCRIBE, "")
+def horizontal_velocity(u_x, u_y):
+    """Correction along the image axes (control law output) -> (vel_fwd, vel_right) in m/s."""
+    vel_right = np.clip(u_x * DIR_X, -MAX_SPEED_XY, MAX_SPEED_XY)
+    vel_fwd   = np.clip(u_y * DIR_Y, -MAX_SPEED_XY, MAX_SPEED_XY)
+    return vel_fwd, vel_right
 
-    def get_latest_error(self):
-        try:
-            msg = self.socket.recv_json(flags=zmq.NOBLOCK)
-            if msg and "detections" in msg:
-                det = msg["detections"][0]["normalized_error"]
-                return True, det["x"], det["y"]
-        except zmq.Again:
-            pass
-        except Exception as e:
-            print(f"ZMQ Error: {e}")
-        return False, 0.0, 0.0
+def smoothstep(x):
+    x = np.clip(x, 0.0, 1.0)
+    return x * x * (3.0 - 2.0 * x)
+
+def descent_speed(err_x, err_y, altitude, align_threshold=ALIGN_THRESHOLD, descent_fast=DESCENT_SPEED_FAST,
+                  descent_slow=DESCENT_SPEED_SLOW, descent_cone=DESCENT_CONE, blending=DESCENT_BLENDING):
+    """Only descend if we are roughly centered, faster if high up."""
+    error = np.abs(err_x) + np.abs(err_y)
+    if not blending:
+        aligned = error < align_threshold
+        return np.where(aligned, np.where(altitude > PRECISION_ALTITUDE, descent_fast, descent_slow), 0.0)
+
+    # Altitude: SLOW below the band, FAST above it, smooth in between
+    height = smoothstep((altitude - PRECISION_ALTITUDE) / DESCENT_BLEND_BAND + 0.5)
+    speed = descent_slow + (descent_fast - descent_slow) * height
+    # Error: full speed inside ALIGN_THRESHOLD, easing to zero at the edge of the cone
+    centred = smoothstep((descent_cone - error) / np.maximum(descent_cone - align_threshold, 1e-6))
+    return speed * centred
+
+def make_control_law():
+    """The horizontal law selected by CONTROL_LAW_CONFIG."""
+    if CONTROL_LAW_CONFIG:
+        law = load_law(CONTROL_LAW_CONFIG, limit=MAX_SPEED_XY)
+        print(f"-- Control law: {law.name} ({CONTROL_LAW_CONFIG})")
+        return law
+    return ProportionalLaw(KP_X, KP_Y)
+
+def make_vision():
+    """The detection source selected by VISION_SOURCE."""
+    print(f"-- Vision source: {VISION_SOURCE}")
+    return make_vision_source(VISION_SOURCE, zmq_address=f"tcp://{ZMQ_IP}:{ZMQ_PORT}",
+                              opencv_pipeline=OPENCV_PIPELINE, recording=VISION_RECORDING)
 
 class DroneController:
-    def __init__(self, drone):
+    def __init__(self, drone, vision=None, clock=time.monotonic, recorder=None, wall_clock=time.time):
         self.drone = drone
-        self.vision = VisionSystem()
-        self.current_altitude = 0.0 # Stores latest altitude
+        # vision / clock / wall_clock are swapped out by replay.py to run landings faster than real time.
+        # wall_clock is the time base of capture_ts and telemetry stamps (time.time() on the RPi5)
+        self.vision = vision if vision is not None else make_vision()
+        self.clock = clock
+        self.wall_clock = wall_clock
+        self.latency = LatencyTracker()
+        self.latency_report_path = LATENCY_REPORT_PATH
+
+        if recorder is None and RECORD_PATH:
+            from replay import FlightRecorder
+            recorder = FlightRecorder(RECORD_PATH, clock)
+        self.recorder = recorder
+
+        # Latest position / attitude / velocity / rangefinder / landed state, read without awaiting
+        self.telemetry = TelemetryCache(drone, clock=wall_clock, recorder=recorder)
+        self.camera = CameraModel.default()
+        self.tracker = TargetTracker()
+        self.law = make_control_law()
+
+    def target_offset(self, err_x, err_y, capture_ts):
+        """
+        Image error -> (forward, right, altitude) in metres, using altitude and roll/pitch
+        interpolated at the frame's capture time. None if the altitude is unknown or too low.
+        """
+        altitude = self.telemetry.altitude_history.at(capture_ts)
+        if altitude is None or altitude[0] < MIN_COMPENSATION_ALTITUDE:
+            return None
+
+        roll, pitch = 0.0, 0.0
+        attitude = self.telemetry.attitude_history.at(capture_ts)
+        if ATTITUDE_COMPENSATION and attitude is not None:
+            roll, pitch = attitude
+        forward, right = self.camera.ground_offset(err_x, err_y, altitude[0], roll, pitch)
+        return float(forward), float(right), altitude[0]
 
-    async def update_altitude(self):
+    def compensate_attitude(self, err_x, err_y, capture_ts):
+        """Image error -> level-camera error. Returns the input unchanged if telemetry is missing."""
+        offset = self.target_offset(err_x, err_y, capture_ts)
+        if offset is None:
+            return err_x, err_y
+        forward, right, altitude = offset
+        err_x, err_y = self.camera.nadir_error(forward, right, altitude)
+        return float(err_x), float(err_y)
+
+    def track(self, now, telemetry, seen, err_x, err_y):
         """
-        Background task to keep altitude updated without blocking the vision loop.
+        Feeds the target tracker (the fresh detection if `seen`, otherwise prediction only) and
+        returns (found, err_x, err_y) for the control law from its estimate.
         """
-        async for position in self.drone.telemetry.position():
-            self.current_altitude = position.relative_altitude_m
+        velocity = heading_velocity(telemetry)
+        offset = None
+        if seen:
+            capture_ts = self.vision.last_frame.capture_ts
+            offset = self.target_offset(err_x, err_y, capture_ts)
+            if offset is None:
+                # No altitude to put the detection in metres: fly on the raw error
+                self.tracker.predict(now, velocity)
+                return True, err_x, err_y
+
+        if offset is not None:
+            forward, right, altitude = offset
+            age = max(self.telemetry.clock() - capture_ts, 0.0) if capture_ts > 0.0 else 0.0
+            self.tracker.update(now, (forward, right), velocity, altitude, age)
+        else:
+            self.tracker.predict(now, velocity)
+
+        if not self.tracker.initialized:
+            return False, 0.0, 0.0
+        if now - self.tracker.last_update > TRACK_MAX_COAST or self.tracker.position_std() > TRACK_LOST_STD:
+            self.tracker.reset()
+            return False, 0.0, 0.0
+
+        forward, right = self.tracker.offset()
+        err_x, err_y = self.camera.nadir_error(forward, right, max(telemetry.altitude, MIN_COMPENSATION_ALTITUDE))
+        return True, float(err_x), float(err_y)
 
     async def run(self):
         print("-- Connecting to Drone...")
-        # Start the background altitude reader
-        asyncio.create_task(self.update_altitude())
+        # Start the background telemetry readers
+        self.telemetry.start()
         
         print("-- Arming & Starting Offboard")
         # Initialize to 0 velocity before starting
@@ -77,64 +214,98 @@ class DroneController:
 
         print("-- Precision Landing Sequence Started --")
 
+        last_detection = self.clock()
+        last_step = last_detection
+        below_since = None # Touchdown hysteresis: time altitude first dropped below LANDING_ALTITUDE
+        command = VelocityBodyYawspeed(0.0, 0.0, 0.0, 0.0)
+
         while True:
-            # 1. Get Fresh Vision Data
-            found, err_x, err_y = self.vision.get_latest_error()
+            # 1. Wake as soon as a fresh detection arrives (or every CONTROL_PERIOD / WATCHDOG_PERIOD)
+            detection = await self.vision.wait_for_detection(CONTROL_PERIOD if TARGET_TRACKER else WATCHDOG_PERIOD)
+            now = self.clock()
+            telemetry = self.telemetry.snapshot()
+            self.vision.set_altitude(telemetry.altitude)
+
+            if detection is not None:
+                seen, err_x, err_y = detection
+                if self.recorder:
+                    self.recorder.detection(self.vision.last_frame)
+                if seen:
+                    last_detection = now
+            elif not TARGET_TRACKER and now - last_detection < VISION_TIMEOUT:
+                # Watchdog: vision is between frames, keep the last setpoint alive
+                await self.drone.offboard.set_velocity_body(command)
+                continue
+            else:
+                seen, err_x, err_y = False, 0.0, 0.0
+
+            if TARGET_TRACKER:
+                found, err_x, err_y = self.track(now, telemetry, seen, err_x, err_y)
+            else:
+                found = seen
+                if seen and ATTITUDE_COMPENSATION:
+                    err_x, err_y = self.compensate_attitude(err_x, err_y, self.vision.last_frame.capture_ts)
             
             # 2. Prepare Commands
+            altitude = telemetry.altitude
             vel_fwd = 0.0
             vel_right = 0.0
             vel_down = 0.0
             
             if found:
-                # --- HORIZONTAL LOGIC (Align) ---
-                vel_right = (err_x * KP_X) * DIR_X
-                vel_fwd   = (err_y * KP_Y) * DIR_Y 
-
-                # Clamp Horizontal Speed
-                vel_right = max(min(vel_right, MAX_SPEED_XY), -MAX_SPEED_XY)
-                vel_fwd   = max(min(vel_fwd, MAX_SPEED_XY), -MAX_SPEED_XY)
-                
-                # --- VERTICAL LOGIC (Descend) ---
-                # Calculate total distance from center
+                u_x, u_y = self.law.step(err_x, err_y, altitude, now - last_step)
+                vel_fwd, vel_right = (float(v) for v in horizontal_velocity(u_x, u_y))
+                vel_down = float(descent_speed(err_x, err_y, altitude, blending=DESCENT_BLENDING))
                 total_error = abs(err_x) + abs(err_y)
-                
-                # Only descend if we are roughly centered
-                if total_error < ALIGN_THRESHOLD:
-                    if self.current_altitude > 1.5:
-                        vel_down = DESCENT_SPEED_FAST # Go down faster if high up
-                        status = "DESCENDING (FAST)"
-                    else:
-                        vel_down = DESCENT_SPEED_SLOW # Go slow near ground
-                        status = "DESCENDING (PRECISION)"
-                else:
+
+                if vel_down > 0.0 and TARGET_TRACKER and self.tracker.position_std() > TRACK_DESCENT_STD:
+                    # Predicting through a dropout: keep aligning, but don't descend on a guess
+                    vel_down = 0.0
+                    status = "HOLDING (UNCERTAIN)"
+                elif vel_down == 0.0:
                     # If not centered, stop descending and fix position
-                    vel_down = 0.0 
                     status = "ALIGNING"
+                elif altitude > PRECISION_ALTITUDE:
+                    status = "DESCENDING (FAST)"
+                else:
+                    status = "DESCENDING (PRECISION)"
 
                 # --- TOUCHDOWN LOGIC ---
-                if self.current_altitude < LANDING_ALTITUDE:
-                    print(f"!! Touchdown Detected ({self.current_altitude:.2f}m). Landing !!")
+                # Land once altitude has stayed low for TOUCHDOWN_CONFIRM (one noisy sample is not enough)
+                if altitude < LANDING_ALTITUDE:
+                    below_since = now if below_since is None else below_since
+                elif altitude > LANDING_ALTITUDE + TOUCHDOWN_HYSTERESIS:
+                    below_since = None
+
+                if below_since is not None and now - below_since >= TOUCHDOWN_CONFIRM:
+                    print(f"!! Touchdown Detected ({altitude:.2f}m). Landing !!")
                     try:
                         await self.drone.action.land()
                     except Exception as e:
                         print(f"Land Command Failed: {e}")
+                    self.latency.report(self.latency_report_path)
+                    self.telemetry.stop()
+                    self.vision.close()
+                    if self.recorder:
+                        self.recorder.close()
                     break # Exit the loop, mission done.
 
                 # Debug Print
-                print(f"Alt: {self.current_altitude:.2f}m | Err: {total_error:.2f} | {status} -> V_down: {vel_down:.2f}")
+                print(f"Alt: {altitude:.2f}m | Err: {total_error:.2f} | {status} -> V_down: {vel_down:.2f}")
 
             else:
                 # Target Lost
                 print("Target Lost! Hovering...")
                 vel_fwd, vel_right, vel_down = 0.0, 0.0, 0.0
+                self.law.reset()
+            last_step = now
 
             # 3. Send Command
-            await self.drone.offboard.set_velocity_body(
-                VelocityBodyYawspeed(vel_fwd, vel_right, vel_down, 0.0)
-            )
+            command = VelocityBodyYawspeed(vel_fwd, vel_right, vel_down, 0.0)
+            await self.drone.offboard.set_velocity_body(command)
 
-            await asyncio.sleep(0.05) # 20Hz Loop
+            if seen:
+                self.latency.record(self.vision.last_frame, self.vision.last_received, self.wall_clock())
 
 if __name__ == "__main__":
     loop = asyncio.get_event_loop()
@@ -145,4 +316,5 @@ if __name__ == "__main__":
         loop.run_until_complete(controller.run())
     except KeyboardInterrupt:
         print("Landing triggered by user...")
-        loop.run_until_complete(drone.action.land())
\ No newline at end of file
+        loop.run_until_complete(drone.action.land())
+        controller.latency.report(LATENCY_REPORT_PATH)
\ No newline at end of file
@@ -0,0 +1,203 @@
+import json
+import time
+import struct
+import numpy as np
+
+# -----------------------------------------------------------------------------------------------
+# VISION -> CONTROLLER WIRE FORMAT
+# -----------------------------------------------------------------------------------------------
+# One ZMQ frame per camera frame (CONFLATE does not support multipart messages):
+#
+#   [ header | detection record * count ]
+#
+# The header carries its own size and the size of one detection record, so a newer publisher
+# can append fields to either without breaking an older subscriber: the decoder reads the fields
+# it knows and strides over the rest.
+#
+# A message starting with "{" is the legacy / debug JSON format and is decoded into the same
+# structure, so ZMQ_JSON_DEBUG on the publisher side works with every subscriber.
+# -----------------------------------------------------------------------------------------------
+PROTOCOL_MAGIC = b"AR"
+PROTOCOL_VERSION = 3
+
+# magic, version, flags, header_size, record_size, frame_id, capture_ts, count
+HEADER = struct.Struct("<2sBBHHIdH")
+
+# v2: appended to the header. Buffer PTS (ns) and wall-clock stamps taken along the pipeline,
+# used by the controller to trace latency per stage (see latency.py)
+STAGE_TIMES = struct.Struct("<Q4d")
+STAGE_NAMES = ("decoded", "inferred", "postprocessed", "published")
+
+# v3: appended to the header. Track id of the target the publisher has locked on (0 = none).
+# Detections are ranked, the locked target first.
+TRACKING = struct.Struct("<H")
+
+# bbox (xmin, ymin, xmax, ymax), error (x, y), confidence, label_id, track_id (v3, 0 = untracked)
+DETECTION = struct.Struct("<4f2ffHH")
+DETECTION_V2_SIZE = 30   # Records without track_id
+
+DETECTION_DTYPE = np.dtype([
+    ("bbox", "<f4", (4,)),
+    ("error", "<f4", (2,)),
+    ("confidence", "<f4"),
+    ("label_id", "<u2"),
+    ("track_id", "<u2"),
+])
+
+assert DETECTION.size == DETECTION_DTYPE.itemsize
+
+
+class DetectionFrame:
+    """
+    Decoded message. `detections` is a structured array (DETECTION_DTYPE fields),
+    `stage_times` holds the wall-clock stamps named in STAGE_NAMES (0.0 when not sent),
+    `locked_id` the track id of the publisher's locked target (0 = none / older publisher).
+    """
+    __slots__ = ("version", "frame_id", "capture_ts", "detections", "pts_ns", "stage_times", "locked_id")
+
+    def __init__(self, version, frame_id, capture_ts, detections, pts_ns=0, stage_times=(0.0, 0.0, 0.0, 0.0),
+                 locked_id=0):
+        self.version = version
+        self.frame_id = frame_id
+        self.capture_ts = capture_ts
+        self.detections = detections
+        self.pts_ns = pts_ns
+        self.stage_times = stage_times
+        self.locked_id = locked_id
+
+    @property
+    def count(self):
+        return len(self.detections)
+
+
+class DetectionEncoder:
+    """
+    Writes detections straight into a preallocated message buffer.
+    Call reset() at the start of a frame, add() per detection, then encode().
+    """
+    HEADER_SIZE = HEADER.size + STAGE_TIMES.size + TRACKING.size
+
+    def __init__(self, max_detections=16):
+        self.max_detections = max_detections
+        self._buf = bytearray(self.HEADER_SIZE + max_detections * DETECTION.size)
+        self._view = memoryview(self._buf)
+        self.count = 0
+
+    def reset(self):
+        self.count = 0
+
+    def add(self, xmin, ymin, xmax, ymax, confidence, label_id=0, track_id=0):
+        if self.count >= self.max_detections:
+            return False
+
+        # Center of screen is 0.5 -> error 0.0, edges map to -1.0 / +1.0
+        error_x = (xmin + xmax) - 1.0
+        error_y = (ymin + ymax) - 1.0
+
+        DETECTION.pack_into(self._buf, self.HEADER_SIZE + self.count * DETECTION.size,
+                            xmin, ymin, xmax, ymax, error_x, error_y, confidence, label_id, track_id)
+        self.count += 1
+        return True
+
+    def encode(self, frame_id, capture_ts, pts_ns=0, stage_times=None, locked_id=0):
+        """
+        `stage_times` is (decoded, inferred, postprocessed) wall-clock stamps for this frame;
+        the publish stamp is taken here, right before the message goes out.
+        Add detections in rank order, the locked target (`locked_id`) first.
+        """
+        decoded, inferred, postprocessed = stage_times or (0.0, 0.0, 0.0)
+        HEADER.pack_into(self._buf, 0, PROTOCOL_MAGIC, PROTOCOL_VERSION, 0,
+                         self.HEADER_SIZE, DETECTION.size, frame_id & 0xFFFFFFFF, capture_ts, self.count)
+        STAGE_TIMES.pack_into(self._buf, HEADER.size, pts_ns, decoded, inferred, postprocessed, time.time())
+        TRACKING.pack_into(self._buf, HEADER.size + STAGE_TIMES.size, locked_id)
+        # zmq copies small messages on send, so the buffer can be reused on the next frame
+        return self._view[:self.HEADER_SIZE + self.count * DETECTION.size]
+
+    def encode_json(self, frame_id, capture_ts, pts_ns=0, stage_times=None, locked_id=0):
+        """Debug mode: same content as encode(), as a JSON document."""
+        frame = decode(self.encode(frame_id, capture_ts, pts_ns, stage_times, locked_id))
+        return json.dumps(to_dict(frame)).encode()
+
+
+def decode(buf):
+    """
+    Decodes a binary (or legacy JSON) message. The returned detections array is a
+    read-only view on `buf` (no copy), so keep `buf` alive while using it.
+    """
+    buf = memoryview(buf)
+    if buf[:1] == b"{":
+        return _decode_json(bytes(buf))
+
+    magic, version, _flags, header_size, record_size, frame_id, capture_ts, count = HEADER.unpack_from(buf)
+    if magic != PROTOCOL_MAGIC:
+        raise ValueError(f"Bad message magic: {bytes(magic)!r}")
+    if record_size < DETECTION_V2_SIZE:
+        raise ValueError(f"Detection record too small: {record_size} bytes")
+
+    pts_ns, stage_times = 0, (0.0, 0.0, 0.0, 0.0)
+    if header_size >= HEADER.size + STAGE_TIMES.size:
+        pts_ns, *stage_times = STAGE_TIMES.unpack_from(buf, HEADER.size)
+        stage_times = tuple(stage_times)
+    locked_id = 0
+    if header_size >= HEADER.size + STAGE_TIMES.size + TRACKING.size:
+        locked_id, = TRACKING.unpack_from(buf, HEADER.size + STAGE_TIMES.size)
+
+    # Newer publishers may append fields: stride over them using the advertised record size.
+    # Older (v2) records lack track_id: read the fields they have, the rest stays 0.
+    names = [n for n in DETECTION_DTYPE.names
+             if DETECTION_DTYPE.fields[n][1] + DETECTION_DTYPE.fields[n][0].itemsize <= record_size]
+    dtype = np.dtype({
+        "names": names,
+        "formats": [DETECTION_DTYPE.fields[n][0] for n in names],
+        "offsets": [DETECTION_DTYPE.fields[n][1] for n in names],
+        "itemsize": record_size,
+    })
+    detections = np.frombuffer(buf, dtype=dtype, count=count, offset=header_size)
+    if len(names) < len(DETECTION_DTYPE.names):
+        full = np.zeros(count, dtype=DETECTION_DTYPE)
+        for name in names:
+            full[name] = detections[name]
+        detections = full
+    return DetectionFrame(version, frame_id, capture_ts, detections, pts_ns, stage_times, locked_id)
+
+
+def _decode_json(raw):
+    msg = json.loads(raw)
+    items = msg.get("detections", [])
+    detections = np.zeros(len(items), dtype=DETECTION_DTYPE)
+    for i, item in enumerate(items):
+        err = item["normalized_error"]
+        detections[i]["error"] = (err["x"], err["y"])
+        detections[i]["bbox"] = item.get("bbox", (0.0, 0.0, 0.0, 0.0))
+        detections[i]["confidence"] = item.get("confidence", 0.0)
+        detections[i]["label_id"] = item.get("label_id", 0)
+        detections[i]["track_id"] = item.get("track_id", 0)
+    stamps = msg.get("stage_times", {})
+    return DetectionFrame(msg.get("version", 0), msg.get("frame_id", 0), msg.get("capture_ts", 0.0), detections,
+                          msg.get("pts_ns", 0), tuple(stamps.get(name, 0.0) for name in STAGE_NAMES),
+                          msg.get("locked_id", 0))
+
+
+def to_dict(frame):
+    """JSON-friendly view of a decoded message (debug tools only, not for the hot path)."""
+    return {
+        "version": frame.version,
+        "frame_id": frame.frame_id,
+        "capture_ts": frame.capture_ts,
+        "pts_ns": frame.pts_ns,
+        "stage_times": dict(zip(STAGE_NAMES, frame.stage_times)),
+        "locked_id": frame.locked_id,
+        "detections": [
+            {
+                "label_id": int(det["label_id"]),
+                "track_id": int(det["track_id"]),
+                "confidence": round(float(det["confidence"]), 4),
+                "bbox": [round(float(v), 4) for v in det["bbox"]],
+                "normalized_error": {
+                    "x": round(float(det["error"][0]), 4),
+                    "y": round(float(det["error"][1]), 4),
+                },
+            }
+            for det in frame.detections
+        ],
+    }
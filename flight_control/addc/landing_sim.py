@@ -0,0 +1,309 @@
+import os
+import sys
+import math
+import time
+import argparse
+import itertools
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+from controller import (horizontal_velocity, descent_speed, KP_X, KP_Y, ALIGN_THRESHOLD, DESCENT_SPEED_FAST,
+                        DESCENT_SPEED_SLOW, LANDING_ALTITUDE, VISION_TIMEOUT, MAX_SPEED_XY, DESCENT_CONE,
+                        DESCENT_BLENDING, TOUCHDOWN_CONFIRM, TOUCHDOWN_HYSTERESIS, TARGET_TRACKER, CONTROL_PERIOD,
+                        TRACK_DESCENT_STD, TRACK_LOST_STD, TRACK_MAX_COAST, MIN_COMPENSATION_ALTITUDE)
+from control_laws import make_law, LAWS
+from target_tracker import TargetTracker
+from camera_model import CAMERA_HFOV_DEG, CAMERA_VFOV_DEG
+
+# -----------------------------------------------------------------------------------------------
+# MONTE-CARLO LANDING SIMULATOR
+# -----------------------------------------------------------------------------------------------
+# Batched point-mass model of the offboard landing loop. Every simulated landing is one lane of
+# a NumPy array, and every lane runs the control law we fly (control_laws.py, followed by
+# controller.horizontal_velocity / descent_speed) with its own gains, so one step advances all
+# landings of all parameter sets at once. Parameter sets are split in chunks across processes.
+#
+# The controller steps on every camera frame (1 / fps), and with the target tracker also every
+# CONTROL_PERIOD between frames, like DroneController.run. Between steps:
+#   - drone velocity follows the commanded velocity with a first-order lag (VELOCITY_TAU)
+#   - wind gusts: Ornstein-Uhlenbeck velocity disturbance
+#   - the detector sees the state `latency` seconds ago, adds noise, misses frames at random
+#     and loses the target when it leaves the camera FOV
+# With TARGET_TRACKER (default, as flown) every lane feeds its own lane of a TargetTracker with
+# the detection in metres (level camera, altitude at capture) and the measured drone velocity,
+# the law runs on the estimate, descent pauses above TRACK_DESCENT_STD, and the target is lost
+# (hover) above TRACK_LOST_STD or after TRACK_MAX_COAST without a detection. Without it the law
+# runs on detections and the last command is held until VISION_TIMEOUT, then hover.
+# Touchdown once the altitude stayed below LANDING_ALTITUDE for TOUCHDOWN_CONFIRM.
+# -----------------------------------------------------------------------------------------------
+VELOCITY_TAU = 0.3       # Drone velocity response time constant (s)
+START_ALTITUDE = 4.0     # Matches missionMode.FLIGHT_ALTITUDE (m)
+START_OFFSET = 1.0       # Max initial horizontal offset from the pad (m)
+MAX_TIME = 60.0          # Landing attempts longer than this count as failed (s)
+
+
+class SimConditions:
+    def __init__(self, fps=30.0, latency=0.08, noise=0.02, dropout=0.05, gust_sigma=0.1, gust_tau=2.0,
+                 hfov_deg=CAMERA_HFOV_DEG, vfov_deg=CAMERA_VFOV_DEG, start_altitude=START_ALTITUDE,
+                 start_offset=START_OFFSET, max_time=MAX_TIME):
+        self.fps = fps
+        self.latency = latency          # Camera -> setpoint latency (s)
+        self.noise = noise              # Std-dev of the normalised error noise
+        self.dropout = dropout          # Probability of a missed detection per frame
+        self.gust_sigma = gust_sigma    # Std-dev of the gust velocity (m/s)
+        self.gust_tau = gust_tau        # Gust correlation time (s)
+        self.hfov_deg = hfov_deg
+        self.vfov_deg = vfov_deg
+        self.start_altitude = start_altitude
+        self.start_offset = start_offset
+        self.max_time = max_time
+
+
+DESCENT_KEYS = ("align_threshold", "descent_fast", "descent_slow", "descent_cone")
+
+
+def simulate(gains, conditions, rng, law="p", blending=DESCENT_BLENDING, tracker=TARGET_TRACKER):
+    """
+    Runs one landing per lane. `gains` maps keyword -> array (one value per lane): gains of the
+    control law `law` (see control_laws.py) and/or descent_speed's DESCENT_KEYS. `blending` selects
+    the blended or the original gated descent profile, `tracker` the TARGET_TRACKER control loop.
+    Returns per-lane arrays: landed, time_to_land, touchdown_error (m), lost_rate.
+    """
+    n = len(next(iter(gains.values())))
+    descent = {k: v for k, v in gains.items() if k in DESCENT_KEYS}
+    controller_law = make_law({"law": law, **{k: v for k, v in gains.items() if k not in DESCENT_KEYS}},
+                              limit=MAX_SPEED_XY)
+    frame_dt = 1.0 / conditions.fps
+    # Controller steps within one frame period: at the frame, then every CONTROL_PERIOD until the next
+    period = CONTROL_PERIOD if tracker else frame_dt
+    steps_per_frame = max(int(math.ceil(frame_dt / period - 1e-9)), 1)
+    frames_total = int(conditions.max_time / frame_dt)
+    delay = max(int(round(conditions.latency / frame_dt)), 0)
+    tan_h = math.tan(math.radians(conditions.hfov_deg) / 2)
+    tan_v = math.tan(math.radians(conditions.vfov_deg) / 2)
+
+    # Target position relative to the drone, body frame (forward, right), and altitude
+    radius = conditions.start_offset * np.sqrt(rng.random(n))
+    angle = rng.random(n) * 2 * np.pi
+    rel_f = radius * np.cos(angle)
+    rel_r = radius * np.sin(angle)
+    alt = np.full(n, conditions.start_altitude)
+
+    vel = np.zeros((3, n))    # forward, right, down
+    cmd = np.zeros((3, n))
+    gust = np.zeros((2, n))
+    last_detection = np.zeros(n)
+    last_step = 0.0
+    below_since = np.full(n, np.nan)
+    target = TargetTracker(shape=(n,)) if tracker else None
+
+    # What the camera saw `delay` frames ago
+    history = np.empty((delay + 1, 3, n))
+    history[:] = (rel_f, rel_r, alt)
+
+    active = np.ones(n, dtype=bool)
+    landed = np.zeros(n, dtype=bool)
+    time_to_land = np.full(n, np.nan)
+    touchdown_error = np.full(n, np.nan)
+    lost_frames = np.zeros(n)
+    frames = np.zeros(n)
+
+    for frame in range(frames_total):
+        for sub in range(steps_per_frame):
+            t = frame * frame_dt + sub * period
+            dt = min((frame + 1) * frame_dt, t + period) - t
+
+            # --- CAMERA (new frame) ---
+            if sub == 0:
+                seen_f, seen_r, seen_alt = history[frame % (delay + 1)]
+                err_x = seen_r / (seen_alt * tan_h) + rng.normal(0.0, conditions.noise, n)
+                err_y = -seen_f / (seen_alt * tan_v) + rng.normal(0.0, conditions.noise, n)
+                in_view = (np.abs(err_x) <= 1.0) & (np.abs(err_y) <= 1.0)
+                seen = in_view & (rng.random(n) >= conditions.dropout) & active
+                lost_frames += active & ~in_view
+                frames += active
+            else:
+                seen = np.zeros(n, dtype=bool)
+
+            # --- CONTROLLER ---
+            if tracker:
+                found, err_x, err_y, uncertain = _track(target, t, seen, err_x, err_y, seen_alt, alt,
+                                                        vel[:2] + gust, tan_h, tan_v, conditions.latency)
+                found &= active
+            else:
+                found = seen
+            u_x, u_y = controller_law.step(err_x, err_y, alt, t - last_step, active=found)
+            vel_fwd, vel_right = horizontal_velocity(u_x, u_y)
+            vel_down = descent_speed(err_x, err_y, alt, blending=blending, **descent)
+            if tracker:
+                vel_down = np.where(uncertain, 0.0, vel_down)
+                # Target lost: hover
+                cmd[:, ~found] = 0.0
+                last_step = t
+            else:
+                cmd[:, (t - last_detection >= VISION_TIMEOUT) & ~found] = 0.0
+                last_step = np.where(found, t, last_step)
+            cmd[:, found] = np.stack((vel_fwd, vel_right, vel_down))[:, found]
+            last_detection[seen] = t
+
+            low = found & (alt < LANDING_ALTITUDE)
+            below_since[low & np.isnan(below_since)] = t
+            below_since[found & (alt > LANDING_ALTITUDE + TOUCHDOWN_HYSTERESIS)] = np.nan
+            touchdown = low & (t - below_since >= TOUCHDOWN_CONFIRM - 1e-9)
+            landed |= touchdown
+            time_to_land[touchdown] = t
+            touchdown_error[touchdown] = np.hypot(rel_f, rel_r)[touchdown]
+            active &= ~touchdown
+
+            # --- DRONE ---
+            lag = dt / (VELOCITY_TAU + dt)
+            gust_decay = dt / conditions.gust_tau
+            vel += (cmd - vel) * lag
+            gust += -gust * gust_decay + conditions.gust_sigma * math.sqrt(2 * gust_decay) * rng.standard_normal((2, n))
+            rel_f -= (vel[0] + gust[0]) * dt * active
+            rel_r -= (vel[1] + gust[1]) * dt * active
+            alt = np.maximum(alt - vel[2] * dt * active, 0.05)
+        history[frame % (delay + 1)] = (rel_f, rel_r, alt)
+        if not active.any():
+            break
+
+    return landed, time_to_land, touchdown_error, lost_frames / np.maximum(frames, 1)
+
+
+def _track(target, t, seen, err_x, err_y, seen_alt, alt, velocity, tan_h, tan_v, age):
+    """
+    DroneController.track for all lanes: detections -> metres (level camera) -> tracker, and the
+    law's input from the estimate. Returns (found, err_x, err_y, uncertain).
+    """
+    # Too low to put a detection in metres: the controller flies on the raw error
+    raw = seen & (seen_alt < MIN_COMPENSATION_ALTITUDE)
+    fused = seen & ~raw
+    forward = -err_y * seen_alt * tan_v
+    right = err_x * seen_alt * tan_h
+    target.update(t, (forward, right), velocity, seen_alt, age, lanes=fused)
+    target.predict(t, velocity, lanes=~fused)
+
+    std = target.position_std()
+    lost = target.initialized & ((t - target.last_update > TRACK_MAX_COAST) | (std > TRACK_LOST_STD))
+    target.reset(lost)
+    found = target.initialized | raw
+
+    forward, right = target.offset()
+    height = np.maximum(alt, MIN_COMPENSATION_ALTITUDE)
+    est_x = np.where(raw, err_x, right / (height * tan_h))
+    est_y = np.where(raw, err_y, -forward / (height * tan_v))
+    uncertain = ~raw & (std > TRACK_DESCENT_STD) # Reset lanes are not found anyway
+    return found, est_x, est_y, uncertain
+
+
+def _run_chunk(args):
+    combos, names, trials, conditions, seed, law, blending, tracker = args
+    rng = np.random.default_rng(seed)
+    values = np.repeat(np.array(combos, dtype=float), trials, axis=0)
+    gains = {name: values[:, i] for i, name in enumerate(names)}
+    landed, time_to_land, touchdown_error, lost_rate = simulate(gains, conditions, rng, law, blending, tracker)
+
+    rows = []
+    for i, combo in enumerate(combos):
+        lane = slice(i * trials, (i + 1) * trials)
+        ok = landed[lane]
+        rows.append({
+            **dict(zip(names, combo)),
+            "landed_rate": float(ok.mean()),
+            "time_to_land_s": float(np.mean(time_to_land[lane][ok])) if ok.any() else float("nan"),
+            "touchdown_error_m": float(np.mean(touchdown_error[lane][ok])) if ok.any() else float("nan"),
+            "touchdown_error_p95_m": float(np.percentile(touchdown_error[lane][ok], 95)) if ok.any() else float("nan"),
+            "lost_target_rate": float(lost_rate[lane].mean()),
+        })
+    return rows
+
+
+def sweep(grid, trials=200, conditions=None, workers=None, chunk_size=16, seed=0, law="p",
+          blending=DESCENT_BLENDING, tracker=TARGET_TRACKER):
+    """
+    Evaluates every combination in `grid` (law gain / descent keyword -> list of values) with
+    `trials` randomised landings each. Returns one result dict per combination.
+    """
+    conditions = conditions or SimConditions()
+    names = list(grid)
+    combos = list(itertools.product(*(grid[name] for name in names)))
+    chunks = [(combos[i:i + chunk_size], names, trials, conditions, (seed, i), law, blending, tracker)
+              for i in range(0, len(combos), chunk_size)]
+
+    with ProcessPoolExecutor(max_workers=workers or os.cpu_count()) as pool:
+        return [row for rows in pool.map(_run_chunk, chunks) for row in rows]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Monte-Carlo sweep of the precision landing gains.")
+    parser.add_argument("--law", choices=list(LAWS), default="p", help="Control law (see control_laws.py)")
+    parser.add_argument("--kp-x", type=float, nargs="+", default=[KP_X])
+    parser.add_argument("--kp-y", type=float, nargs="+", default=[KP_Y])
+    parser.add_argument("--ki-x", type=float, nargs="+", default=[0.0], help="pi / pid only")
+    parser.add_argument("--ki-y", type=float, nargs="+", default=[0.0], help="pi / pid only")
+    parser.add_argument("--kd-x", type=float, nargs="+", default=[0.0], help="pid only")
+    parser.add_argument("--kd-y", type=float, nargs="+", default=[0.0], help="pid only")
+    parser.add_argument("--align", type=float, nargs="+", default=[ALIGN_THRESHOLD], help="ALIGN_THRESHOLD values")
+    parser.add_argument("--descent-fast", type=float, nargs="+", default=[DESCENT_SPEED_FAST])
+    parser.add_argument("--descent-slow", type=float, nargs="+", default=[DESCENT_SPEED_SLOW])
+    parser.add_argument("--cone", type=float, nargs="+", default=[DESCENT_CONE], help="DESCENT_CONE values")
+    parser.add_argument("--descent", choices=("blended", "gated"), default="blended" if DESCENT_BLENDING else "gated",
+                        help="Descent profile: blended (DESCENT_BLENDING) or the original align-then-descend gating")
+    parser.add_argument("--tracker", choices=("on", "off"), default="on" if TARGET_TRACKER else "off",
+                        help="Control loop: target tracker at CONTROL_PERIOD (TARGET_TRACKER) or per-frame law")
+    parser.add_argument("--trials", type=int, default=200, help="Landings per parameter set")
+    parser.add_argument("--fps", type=float, default=30.0, help="Detector frame rate")
+    parser.add_argument("--latency", type=float, default=0.08, help="Camera to setpoint latency (s)")
+    parser.add_argument("--noise", type=float, default=0.02, help="Detection noise (normalised error std-dev)")
+    parser.add_argument("--dropout", type=float, default=0.05, help="Missed detection probability per frame")
+    parser.add_argument("--gust", type=float, default=0.1, help="Wind gust std-dev (m/s)")
+    parser.add_argument("--workers", type=int, default=None)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--top", type=int, default=10, help="Print the best N parameter sets")
+    parser.add_argument("--csv", help="Write all results to this CSV")
+    args = parser.parse_args()
+
+    grid = {
+        "kp_x": args.kp_x,
+        "kp_y": args.kp_y,
+        "align_threshold": args.align,
+        "descent_fast": args.descent_fast,
+        "descent_slow": args.descent_slow,
+    }
+    if args.descent == "blended":
+        grid["descent_cone"] = args.cone
+    if args.law in ("pi", "pid"):
+        grid.update(ki_x=args.ki_x, ki_y=args.ki_y)
+    if args.law == "pid":
+        grid.update(kd_x=args.kd_x, kd_y=args.kd_y)
+    conditions = SimConditions(fps=args.fps, latency=args.latency, noise=args.noise,
+                               dropout=args.dropout, gust_sigma=args.gust)
+    n_combos = math.prod(len(v) for v in grid.values())
+    print(f"-- Simulating {n_combos} parameter sets x {args.trials} landings...")
+
+    start = time.perf_counter()
+    results = sweep(grid, trials=args.trials, conditions=conditions, workers=args.workers, seed=args.seed,
+                    law=args.law, blending=args.descent == "blended", tracker=args.tracker == "on")
+    elapsed = time.perf_counter() - start
+    print(f"-- {n_combos * args.trials} landings in {elapsed:.1f}s")
+
+    # Best first: most reliable, then most accurate, then fastest
+    results.sort(key=lambda r: (-r["landed_rate"], np.nan_to_num(r["touchdown_error_m"], nan=np.inf),
+                                np.nan_to_num(r["time_to_land_s"], nan=np.inf)))
+
+    columns = list(results[0])
+    print(" ".join(f"{c:>12.12}" for c in columns))
+    for row in results[:args.top]:
+        print(" ".join(f"{row[c]:>12.3f}" for c in columns))
+
+    if args.csv:
+        with open(args.csv, "w") as f:
+            f.write(",".join(columns) + "\n")
+            for row in results:
+                f.write(",".join(f"{row[c]:.5g}" for c in columns) + "\n")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
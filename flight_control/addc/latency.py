@@ -0,0 +1,82 @@
+import json
+import numpy as np
+
+# -----------------------------------------------------------------------------------------------
+# END-TO-END LATENCY: camera frame -> MAVLink velocity setpoint
+# -----------------------------------------------------------------------------------------------
+# Each stage is the time between two consecutive stamps of the same frame:
+#
+#   capture -> decoded -> inferred -> postprocessed -> published  (Hailo side, in the ZMQ message)
+#           -> received -> control                                (controller side)
+#
+# All stamps are time.time() on the RPi5, so both processes share the same clock.
+# -----------------------------------------------------------------------------------------------
+STAGES = ("decode", "inference", "postprocess", "publish", "receive", "control")
+HISTOGRAM_EDGES_MS = (0, 1, 2, 5, 10, 20, 50, 100, 200, 500, np.inf)
+
+
+class LatencyTracker:
+    def __init__(self, max_samples=20000):
+        # One row per controlled frame: per-stage durations (s) + total; NaN where a stamp is missing
+        self._samples = np.full((max_samples, len(STAGES) + 1), np.nan)
+        self._next = 0
+        self.count = 0
+
+    def record(self, frame, received, controlled):
+        """`frame` is the DetectionFrame that drove the setpoint sent at `controlled`."""
+        if frame is None or frame.capture_ts <= 0.0:
+            return
+
+        stamps = np.array((frame.capture_ts, *frame.stage_times, received, controlled))
+        durations = np.diff(stamps)
+        # A stage is unknown if either of its stamps was not sent (0.0)
+        durations[(stamps[:-1] <= 0.0) | (stamps[1:] <= 0.0)] = np.nan
+
+        row = self._samples[self._next]
+        row[:-1] = durations
+        row[-1] = controlled - frame.capture_ts
+        self._next = (self._next + 1) % len(self._samples)
+        self.count = min(self.count + 1, len(self._samples))
+
+    def summary(self):
+        """Per-stage percentiles (ms) and histogram counts over HISTOGRAM_EDGES_MS."""
+        samples = self._samples[:self.count] * 1000.0
+        result = {}
+        for i, name in enumerate(STAGES + ("total",)):
+            values = samples[:, i]
+            values = values[~np.isnan(values)]
+            if len(values) == 0:
+                result[name] = {"n": 0}
+                continue
+            p50, p90, p99 = np.percentile(values, (50, 90, 99))
+            counts, _ = np.histogram(values, bins=HISTOGRAM_EDGES_MS)
+            result[name] = {
+                "n": int(len(values)),
+                "p50_ms": float(p50),
+                "p90_ms": float(p90),
+                "p99_ms": float(p99),
+                "max_ms": float(values.max()),
+                "histogram": counts.tolist(),
+            }
+        return result
+
+    def report(self, path=None):
+        """Prints the per-stage table + histogram, and optionally dumps it as JSON to `path`."""
+        summary = self.summary()
+        edges = [f"<{int(e)}" if np.isfinite(e) else f">={int(HISTOGRAM_EDGES_MS[-2])}" for e in HISTOGRAM_EDGES_MS[1:]]
+
+        print(f"-- Latency Report ({self.count} frames, ms) --")
+        print(f"{'stage':<12}{'n':>7}{'p50':>9}{'p90':>9}{'p99':>9}{'max':>9}   " + " ".join(f"{e:>6}" for e in edges))
+        for name, stats in summary.items():
+            if stats["n"] == 0:
+                print(f"{name:<12}{0:>7}   (not traced)")
+                continue
+            print(f"{name:<12}{stats['n']:>7}{stats['p50_ms']:>9.1f}{stats['p90_ms']:>9.1f}"
+                  f"{stats['p99_ms']:>9.1f}{stats['max_ms']:>9.1f}   "
+                  + " ".join(f"{c:>6}" for c in stats["histogram"]))
+
+        if path:
+            with open(path, "w") as f:
+                edges_ms = [float(e) if np.isfinite(e) else None for e in HISTOGRAM_EDGES_MS]
+                json.dump({"bin_edges_ms": edges_ms, "stages": summary}, f, indent=2)
+            print(f"-- Latency report saved to {path}")
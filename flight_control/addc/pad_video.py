@@ -0,0 +1,329 @@
+import sys
+import json
+import math
+import time
+import argparse
+
+import cv2
+import numpy as np
+
+from camera_model import CameraModel, CAMERA_HFOV_DEG
+from detection_protocol import to_dict
+from vision_sources import single_detection_frame
+from vision_module import MARKER_RADIUS, detect, arc_error
+
+# -----------------------------------------------------------------------------------------------
+# SYNTHETIC LANDING-PAD VIDEO
+# -----------------------------------------------------------------------------------------------
+# Renders the landing marker (white ring + H on a dark pad, MARKER_RADIUS) on a procedural
+# ground texture, as seen by the downward camera (camera_model.py conventions) along a descent
+# over the pad, with exact ground truth for every frame.
+#
+# Rendering is one cv2.warpPerspective per frame: the ground (marker included) is a single
+# texture drawn once, and the ground -> image homographies of all frames are computed up front
+# in one batched NumPy step from the poses (altitude, offset, roll / pitch wobble, yaw). Lighting
+# (gain, offset, gradient), blur and sensor noise vary per frame; the noise comes from a bank of
+# precomputed frames, so no per-frame random image is drawn.
+#
+# Per frame ground truth (--truth, JSONL): pose, marker centre (projection of the pad centre, px),
+# marker radius (mean projected radius of the ring, px) and the normalised error the controller
+# expects. The same frames can:
+#   - feed vision_module.py: --video out.avi, then OPENCV_PIPELINE = "out.avi" (controller) or
+#     test/bench_vision_module.py --input out.avi; --benchmark runs detect() on the frames in
+#     memory and reports accuracy against the ground truth
+#   - feed the Hailo pipelines: the video is a filesrc clip (checking/bench_pipelines.py
+#     --source file --clip out.avi); render_frames() yields frames for an appsrc
+#   - feed the replay harness: --replay log.jsonl writes detections (ground truth, or the
+#     detector's with --replay-detector) and telemetry in the replay.py log format
+#
+#   python addc/pad_video.py --frames 3000 --video pad.avi --truth pad_truth.jsonl
+#   python addc/pad_video.py --frames 600 --benchmark --tilt 10 --blur 2 --noise 8
+# -----------------------------------------------------------------------------------------------
+WIDTH = 640
+HEIGHT = 480
+FPS = 30
+GROUND_SIZE = 30.0         # Ground texture side (m), pad in the middle
+GROUND_RESOLUTION = 100    # Texture pixels per metre
+PAD_SIZE = 1.6             # Dark square under the ring (m)
+RING_WIDTH = 0.06          # Ring line width (m)
+NOISE_BANK = 16            # Precomputed noise frames
+
+# Default descent and appearance ranges (per frame values are drawn uniformly inside them)
+START_ALTITUDE = 8.0       # (m)
+END_ALTITUDE = 0.2         # (m), below controller.LANDING_ALTITUDE so replayed descents touch down
+START_OFFSET = 1.5         # Initial horizontal offset from the pad, shrinks with the descent (m)
+TILT = 5.0                 # Max roll / pitch wobble (deg)
+BRIGHTNESS = (0.7, 1.3)    # Gain range
+GRADIENT = 0.2             # Max brightness change across the frame (sun / vignetting)
+BLUR = 1.0                 # Max Gaussian blur sigma (px), 0 = none
+NOISE = 4.0                # Sensor noise std (grey levels)
+
+
+def ground_texture(seed, size=GROUND_SIZE, resolution=GROUND_RESOLUTION):
+    """BGR ground texture (grass / soil octaves, a few tiles and paths) with the pad in the middle."""
+    rng = np.random.default_rng(seed)
+    n = int(size * resolution)
+    shade = np.zeros((n, n), np.float32)
+    for cells, weight in ((8, 0.5), (40, 0.3), (200, 0.15), (n // 2, 0.05)):
+        octave = rng.random((cells, cells), dtype=np.float32)
+        shade += weight * cv2.resize(octave, (n, n), interpolation=cv2.INTER_CUBIC)
+    texture = np.empty((n, n, 3), np.uint8)
+    for channel, (low, high) in enumerate(((40, 90), (80, 150), (50, 110))): # B, G, R: grass to soil
+        texture[..., channel] = np.clip(low + (high - low) * shade, 0, 255)
+    for _ in range(12): # Paths and stones: straight edges and blobs around the pad
+        p0 = tuple(int(v) for v in rng.integers(0, n, 2))
+        p1 = tuple(int(v) for v in rng.integers(0, n, 2))
+        cv2.line(texture, p0, p1, (120, 130, 135), int(rng.integers(10, 40)))
+        cv2.circle(texture, p1, int(rng.integers(5, 30)), (100, 105, 110), -1)
+
+    # Pad: dark square, white ring, H
+    c = n // 2
+    half = int(PAD_SIZE / 2 * resolution)
+    cv2.rectangle(texture, (c - half, c - half), (c + half, c + half), (45, 45, 45), -1)
+    radius = int(MARKER_RADIUS * resolution)
+    cv2.circle(texture, (c, c), radius, (235, 235, 235), max(int(RING_WIDTH * resolution), 1), cv2.LINE_AA)
+    h, w, t = int(0.5 * radius), int(0.35 * radius), max(int(0.08 * radius), 1)
+    for x in (c - w, c + w):
+        cv2.line(texture, (x, c - h), (x, c + h), (235, 235, 235), t)
+    cv2.line(texture, (c - w, c), (c + w, c), (235, 235, 235), t)
+    return texture
+
+
+def descent_poses(count, fps=FPS, start_altitude=START_ALTITUDE, end_altitude=END_ALTITUDE,
+                  start_offset=START_OFFSET, tilt=TILT, seed=0):
+    """
+    Per-frame poses of a descent over the pad, as arrays: t, north, east (drone relative to the
+    pad, m), altitude (m), roll, pitch, yaw (deg) and velocity (N x 3, NED m/s). The offset shrinks with the descent; roll and
+    pitch wobble up to `tilt`.
+    """
+    rng = np.random.default_rng(seed)
+    t = np.arange(count) / fps
+    progress = np.linspace(0.0, 1.0, count)
+    altitude = start_altitude + (end_altitude - start_altitude) * progress
+    heading = rng.uniform(0, 2 * np.pi)
+    shrink = start_offset * (1.0 - progress)
+    drift = 0.1 * np.sin(2 * np.pi * t / rng.uniform(3, 6))
+    north = (shrink + drift) * np.cos(heading)
+    east = (shrink + drift) * np.sin(heading)
+    roll = tilt * np.sin(2 * np.pi * t / rng.uniform(1.5, 3) + rng.uniform(0, 2 * np.pi))
+    pitch = tilt * np.sin(2 * np.pi * t / rng.uniform(1.5, 3) + rng.uniform(0, 2 * np.pi))
+    yaw = np.full(count, rng.uniform(0, 360))
+    step = 1.0 / fps
+    velocity = np.stack([np.gradient(north, step), np.gradient(east, step), -np.gradient(altitude, step)], -1) \
+        if count > 1 else np.zeros((count, 3))
+    return {"t": t, "north": north, "east": east, "altitude": altitude, "roll": roll, "pitch": pitch, "yaw": yaw,
+            "velocity": velocity}
+
+
+def camera_for(width, height, hfov_deg=CAMERA_HFOV_DEG):
+    """CameraModel for a width x height frame with square pixels."""
+    vfov_deg = math.degrees(2 * math.atan(math.tan(math.radians(hfov_deg) / 2) * height / width))
+    return CameraModel.from_fov(hfov_deg, vfov_deg, width, height)
+
+
+def homographies(poses, camera, width, height, resolution=GROUND_RESOLUTION, size=GROUND_SIZE):
+    """Ground texture pixel -> image pixel homography of every pose, (N, 3, 3) in one batch."""
+    n = len(poses["t"])
+    centre = size * resolution / 2
+    yaw = np.radians(poses["yaw"])
+    roll, pitch = np.radians(poses["roll"]), np.radians(poses["pitch"])
+    zeros, ones = np.zeros(n), np.ones(n)
+
+    # Texture (u, v, 1) -> level frame (forward, right, down): north = -(v - centre), east = u - centre
+    to_ne = np.array([[0.0, -1.0 / resolution, centre / resolution],
+                      [1.0 / resolution, 0.0, -centre / resolution],
+                      [0.0, 0.0, 1.0]])
+    cy, sy = np.cos(yaw), np.sin(yaw)
+    level = np.stack([
+        np.stack([cy, sy, -(cy * poses["north"] + sy * poses["east"])], -1),
+        np.stack([-sy, cy, -(-sy * poses["north"] + cy * poses["east"])], -1),
+        np.stack([zeros, zeros, poses["altitude"]], -1),
+    ], 1) @ to_ne # Last column of the pad-relative (north, east, 1) is the drone offset; down = altitude
+
+    # Level -> body: inverse of CameraModel.ground_offset (undo roll, then pitch)
+    cp, sp, cr, sr = np.cos(pitch), np.sin(pitch), np.cos(roll), np.sin(roll)
+    pitch_t = np.stack([np.stack([cp, zeros, -sp], -1), np.stack([zeros, ones, zeros], -1),
+                        np.stack([sp, zeros, cp], -1)], 1)
+    roll_t = np.stack([np.stack([ones, zeros, zeros], -1), np.stack([zeros, cr, sr], -1),
+                       np.stack([zeros, -sr, cr], -1)], 1)
+
+    # Body (forward, right, down) -> pixels: err_x = cx + fx * right / down, err_y = cy - fy * forward / down
+    intrinsics = np.array([[0.0, camera.fx * width / 2, (1 + camera.cx) * width / 2],
+                           [-camera.fy * height / 2, 0.0, (1 + camera.cy) * height / 2],
+                           [0.0, 0.0, 1.0]])
+    return intrinsics @ roll_t @ pitch_t @ level
+
+
+def ground_truth(H, width, height, resolution=GROUND_RESOLUTION, size=GROUND_SIZE, ring_points=64):
+    """Marker centre (px), mean projected ring radius (px) and normalised error of every homography."""
+    centre = size * resolution / 2
+    angles = np.linspace(0, 2 * np.pi, ring_points, endpoint=False)
+    r = MARKER_RADIUS * resolution
+    points = np.stack([np.r_[centre, centre + r * np.cos(angles)],
+                       np.r_[centre, centre + r * np.sin(angles)],
+                       np.ones(ring_points + 1)])
+    projected = H @ points
+    xy = projected[:, :2] / projected[:, 2:3] # (N, 2, 1 + ring_points)
+    cx, cy = xy[:, 0, 0], xy[:, 1, 0]
+    radius = np.hypot(xy[:, 0, 1:] - cx[:, None], xy[:, 1, 1:] - cy[:, None]).mean(axis=1)
+    in_front = (projected[:, 2] > 0).all(axis=1)
+    return {"cx": cx, "cy": cy, "radius": np.where(in_front, radius, np.nan),
+            "err_x": cx / (width / 2) - 1.0, "err_y": cy / (height / 2) - 1.0}
+
+
+def render_frames(count, width=WIDTH, height=HEIGHT, fps=FPS, seed=0, brightness=BRIGHTNESS, gradient=GRADIENT,
+                  blur=BLUR, noise=NOISE, hfov_deg=CAMERA_HFOV_DEG, **descent):
+    """
+    Yields (frame, truth) for `count` frames of a descent (descent_poses keyword arguments).
+    `truth` is a dict: frame, t, pose and marker ground truth (see ground_truth).
+    """
+    rng = np.random.default_rng(seed + 1)
+    texture = ground_texture(seed)
+    poses = descent_poses(count, fps, seed=seed, **descent)
+    camera = camera_for(width, height, hfov_deg)
+    H = homographies(poses, camera, width, height)
+    truth = ground_truth(H, width, height)
+
+    # Appearance, drawn for all frames at once
+    gains = rng.uniform(*brightness, count)
+    slopes = rng.uniform(-gradient, gradient, (count, 2))
+    sigmas = rng.uniform(0.0, blur, count) if blur > 0 else np.zeros(count)
+    ramp_x = np.broadcast_to(np.linspace(-0.5, 0.5, width, dtype=np.float32)[None, :, None], (height, width, 3)).copy()
+    ramp_y = np.broadcast_to(np.linspace(-0.5, 0.5, height, dtype=np.float32)[:, None, None], (height, width, 3)).copy()
+    bank = rng.normal(0.0, noise, (NOISE_BANK, height, width, 3)) if noise > 0 else None
+    noise_up = np.clip(bank, 0, 255).astype(np.uint8) if bank is not None else None
+    noise_down = np.clip(-bank, 0, 255).astype(np.uint8) if bank is not None else None
+    noise_index = rng.integers(0, NOISE_BANK, count)
+
+    frame = np.empty((height, width, 3), np.uint8)
+    light = np.empty((height, width, 3), np.float32)
+    for i in range(count):
+        cv2.warpPerspective(texture, H[i], (width, height), dst=frame, flags=cv2.INTER_LINEAR,
+                            borderMode=cv2.BORDER_REFLECT)
+        cv2.addWeighted(ramp_x, slopes[i, 0], ramp_y, slopes[i, 1], gains[i], dst=light) # Gain + gradient
+        out = cv2.multiply(frame, light, dtype=cv2.CV_8U)
+        if sigmas[i] > 0.3:
+            out = cv2.GaussianBlur(out, (0, 0), sigmas[i])
+        if noise_up is not None:
+            j = noise_index[i]
+            cv2.add(out, noise_up[j], dst=out)
+            cv2.subtract(out, noise_down[j], dst=out)
+        yield out, {
+            "frame": i,
+            "t": round(float(poses["t"][i]), 4),
+            "altitude": float(poses["altitude"][i]),
+            "north": float(poses["north"][i]), "east": float(poses["east"][i]),
+            "roll": float(poses["roll"][i]), "pitch": float(poses["pitch"][i]), "yaw": float(poses["yaw"][i]),
+            "velocity": [float(v) for v in poses["velocity"][i]],
+            "cx": float(truth["cx"][i]), "cy": float(truth["cy"][i]), "radius": float(truth["radius"][i]),
+            "err_x": float(truth["err_x"][i]), "err_y": float(truth["err_y"][i]),
+            "visible": bool(0 <= truth["cx"][i] < width and 0 <= truth["cy"][i] < height),
+        }
+
+
+def replay_events(truth, arc=None, size=(WIDTH, HEIGHT), dt=1.0 / FPS):
+    """replay.py log events of one frame: telemetry, then the detection (ground truth, or `arc` if given)."""
+    t = truth["t"]
+    events = [
+        {"t": t, "type": "position", "relative_altitude_m": truth["altitude"]},
+        {"t": t, "type": "attitude_euler", "roll_deg": truth["roll"], "pitch_deg": truth["pitch"], "yaw_deg": truth["yaw"]},
+        {"t": t, "type": "velocity_ned", "north_m_s": truth["velocity"][0], "east_m_s": truth["velocity"][1],
+         "down_m_s": truth["velocity"][2]},
+    ]
+    width, height = size
+    if arc is False:
+        frame = None # Detector mode, nothing found
+    elif arc is not None:
+        err_x, err_y = arc_error(arc, width, height)
+        frame = single_detection_frame(truth["frame"], 0.0, err_x, err_y, 2 * arc[2] / width, 1.0)
+    elif truth["visible"]:
+        frame = single_detection_frame(truth["frame"], 0.0, truth["err_x"], truth["err_y"],
+                                       2 * truth["radius"] / width, 1.0)
+    else:
+        frame = None
+    if frame is not None:
+        events.append({"t": round(t + dt / 2, 4), "type": "detection", "capture_t": t, "frame": to_dict(frame)})
+    return events
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Render a synthetic landing-pad descent with ground truth.")
+    parser.add_argument("--frames", type=int, default=300)
+    parser.add_argument("--width", type=int, default=WIDTH)
+    parser.add_argument("--height", type=int, default=HEIGHT)
+    parser.add_argument("--fps", type=int, default=FPS)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--altitude", type=float, nargs=2, default=(START_ALTITUDE, END_ALTITUDE),
+                        metavar=("START", "END"), help="Descent from START to END metres")
+    parser.add_argument("--offset", type=float, default=START_OFFSET, help="Initial offset from the pad (m)")
+    parser.add_argument("--tilt", type=float, default=TILT, help="Max roll / pitch (deg)")
+    parser.add_argument("--brightness", type=float, nargs=2, default=BRIGHTNESS, metavar=("MIN", "MAX"))
+    parser.add_argument("--gradient", type=float, default=GRADIENT)
+    parser.add_argument("--blur", type=float, default=BLUR, help="Max blur sigma (px)")
+    parser.add_argument("--noise", type=float, default=NOISE, help="Noise std (grey levels)")
+    parser.add_argument("--video", help="Write the frames to this video file (.avi = MJPG, .mp4 = mp4v)")
+    parser.add_argument("--truth", help="Write the per-frame ground truth to this JSONL file")
+    parser.add_argument("--replay", help="Write a replay.py log (telemetry + detections) to this JSONL file")
+    parser.add_argument("--replay-detector", action="store_true",
+                        help="Replay log detections from vision_module.detect instead of the ground truth")
+    parser.add_argument("--benchmark", action="store_true", help="Run vision_module.detect on every frame")
+    args = parser.parse_args()
+
+    frames = render_frames(args.frames, args.width, args.height, args.fps, args.seed, tuple(args.brightness),
+                           args.gradient, args.blur, args.noise, start_altitude=args.altitude[0],
+                           end_altitude=args.altitude[1], start_offset=args.offset, tilt=args.tilt)
+    writer = None
+    if args.video:
+        fourcc = cv2.VideoWriter_fourcc(*("mp4v" if args.video.endswith(".mp4") else "MJPG"))
+        writer = cv2.VideoWriter(args.video, fourcc, args.fps, (args.width, args.height))
+    truth_file = open(args.truth, "w") if args.truth else None
+    replay_file = open(args.replay, "w") if args.replay else None
+    run_detector = args.benchmark or args.replay_detector
+    results = {"full": [], "pyramid": []}
+    detect_s = {"full": 0.0, "pyramid": 0.0}
+
+    render_s = 0.0
+    while True:
+        start = time.perf_counter()
+        frame, truth = next(frames, (None, None))
+        render_s += time.perf_counter() - start
+        if frame is None:
+            break
+        if writer:
+            writer.write(frame)
+        if truth_file:
+            truth_file.write(json.dumps(truth) + "\n")
+        arc = None
+        if run_detector:
+            for mode in results:
+                t0 = time.perf_counter()
+                found = detect(frame, truth["altitude"], pyramid=mode == "pyramid")
+                detect_s[mode] += time.perf_counter() - t0
+                results[mode].append((found, truth))
+                if mode == "pyramid":
+                    arc = found if found is not None else False
+        if replay_file:
+            for event in replay_events(truth, arc if args.replay_detector else None, (args.width, args.height), 1.0 / args.fps):
+                replay_file.write(json.dumps(event) + "\n")
+
+    if writer:
+        writer.release()
+    for f in (truth_file, replay_file):
+        if f:
+            f.close()
+    n = args.frames
+    print(f"{n} frames {args.width}x{args.height}: rendering {render_s * 1000.0 / n:.2f} ms/frame "
+          f"({n / render_s * 60:.0f} frames/min)")
+    if args.benchmark:
+        for mode, found in results.items():
+            visible = [(arc, truth) for arc, truth in found if truth["visible"]]
+            errors = [math.hypot(arc[0] - truth["cx"], arc[1] - truth["cy"]) for arc, truth in visible if arc is not None]
+            false = sum(1 for arc, truth in found if arc is not None and not truth["visible"])
+            p50, p95 = np.percentile(errors, (50, 95)) if errors else (float("nan"), float("nan"))
+            print(f"  detect ({mode:>7}): {detect_s[mode] * 1000.0 / n:6.2f} ms/frame | detected {len(errors)}/{len(visible)} "
+                  f"visible | centre error p50 {p50:.1f} px p95 {p95:.1f} px | detections off-frame: {false}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
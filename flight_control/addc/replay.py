@@ -0,0 +1,430 @@
+import io
+import sys
+import json
+import math
+import time
+import asyncio
+import argparse
+import contextlib
+from types import SimpleNamespace
+
+import numpy as np
+
+import controller
+from controller import DroneController
+from vision_sources import VisionSource, select_target
+from detection_protocol import decode, to_dict
+from camera_model import CameraModel
+from telemetry import TELEMETRY_RATES
+from landing_sim import VELOCITY_TAU
+
+# -----------------------------------------------------------------------------------------------
+# OFFLINE LANDING REPLAY
+# -----------------------------------------------------------------------------------------------
+# Drives the real DroneController from a recorded log instead of Gazebo SITL + Hailo, in closed
+# loop: the commanded velocities move a simulated drone, and the recorded detections are
+# re-projected from where that drone is.
+#   - RecordedFlight puts every recorded detection on the ground (north, east in metres) from the
+#     drone pose at its capture time: altitude, attitude, and the position integrated from
+#     velocity_ned. The detection noise, dropouts and timing of the recording are kept.
+#   - PointMassDrone is the simulated drone: its velocity follows the commanded body velocity with
+#     a first-order lag (landing_sim.VELOCITY_TAU), level attitude, starting from the recorded state
+#   - ReplayVision stands in for the Hailo publisher and the ZMQ subscriber: it delivers each
+#     recorded frame at its recorded time, with the errors the simulated drone's (level) camera
+#     would see. Detections outside the camera view are dropped.
+#   - FakeSystem stands in for mavsdk.System (telemetry of the simulated drone, offboard, action)
+#   - ReplayClock is virtual time: waiting for the next detection jumps straight to it, so a
+#     landing runs as fast as the control step allows (about a hundred times real time)
+#
+# Landing time and touchdown offset (metres from the recorded target) therefore follow from the
+# control law and descent profile being replayed, not from the recording. The replay ends with
+# the log: a landing slower than the recorded one counts as not landed.
+#
+# Log format (JSONL, one event per line, `t` in seconds from the start of the recording):
+#   {"t": 0.033, "type": "detection", "capture_t": 0.012, "frame": <detection_protocol.to_dict() of the message>}
+#   {"t": 0.050, "type": "position", "relative_altitude_m": 3.98}
+#   {"t": 0.051, "type": "attitude_euler", "roll_deg": 1.2, "pitch_deg": -3.4, "yaw_deg": 90.1}
+#   {"t": 0.052, "type": "velocity_ned", "north_m_s": 0.1, "east_m_s": 0.0, "down_m_s": 0.2}
+#
+# Record a log from a real / SITL flight by setting RECORD_PATH in controller.py.
+# -----------------------------------------------------------------------------------------------
+
+
+class FlightRecorder:
+    """Writes what DroneController sees (detections + telemetry) in the replay log format."""
+    def __init__(self, path, clock=time.monotonic):
+        self.clock = clock
+        self._t0 = clock()
+        self._file = open(path, "w")
+
+    def detection(self, frame):
+        if frame is not None:
+            event = {"type": "detection", "frame": to_dict(frame)}
+            if frame.capture_ts > 0.0:
+                # Capture time on the log's time base (capture_ts is wall clock)
+                event["capture_t"] = round(self.clock() - self._t0 - (time.time() - frame.capture_ts), 4)
+            self._write(event)
+
+    def telemetry(self, stream, **fields):
+        """`stream` is the mavsdk telemetry method name, `fields` the sample attributes used."""
+        self._write({"type": stream, **fields})
+
+    def close(self):
+        self._file.close()
+
+    def _write(self, event):
+        event["t"] = round(self.clock() - self._t0, 4)
+        self._file.write(json.dumps(event) + "\n")
+
+
+class ReplayFinished(Exception):
+    pass
+
+
+class ReplayClock:
+    def __init__(self, drone=None):
+        self.now = 0.0
+        self.drone = drone
+
+    def __call__(self):
+        return self.now
+
+    def advance(self, t):
+        """Moves virtual time forward to `t`, flying the simulated drone along."""
+        if t > self.now:
+            if self.drone is not None:
+                self.drone.step(t - self.now)
+            self.now = t
+
+
+class RecordedFlight:
+    """Recorded drone pose (interpolated), to put recorded detections on the ground."""
+    def __init__(self, samples, camera):
+        self.camera = camera
+        position = [e for e in samples if e["type"] == "position"]
+        attitude = [e for e in samples if e["type"] == "attitude_euler"]
+        velocity = [e for e in samples if e["type"] == "velocity_ned"]
+        if not position:
+            raise ValueError("Replay log has no position samples (altitude)")
+        self._altitude = self._series(position, "relative_altitude_m")
+        self._attitude = [self._series(attitude, key) for key in ("roll_deg", "pitch_deg", "yaw_deg")]
+        self._velocity = [self._series(velocity, key) for key in ("north_m_s", "east_m_s", "down_m_s")]
+        # Horizontal position from the velocity (trapezoid), 0, 0 at the first sample
+        t, v_north = self._velocity[0]
+        _, v_east = self._velocity[1]
+        dt = np.diff(t)
+        self._north = (t, np.concatenate(([0.0], np.cumsum((v_north[1:] + v_north[:-1]) / 2 * dt))))
+        self._east = (t, np.concatenate(([0.0], np.cumsum((v_east[1:] + v_east[:-1]) / 2 * dt))))
+
+    @staticmethod
+    def _series(events, key):
+        if not events:
+            return np.zeros(1), np.zeros(1)
+        return np.array([e["t"] for e in events]), np.array([e[key] for e in events], dtype=float)
+
+    def pose(self, t):
+        """(north, east, altitude, roll, pitch, yaw) at `t` (number or array) - metres and degrees."""
+        return (np.interp(t, *self._north), np.interp(t, *self._east), np.interp(t, *self._altitude),
+                *(np.interp(t, *series) for series in self._attitude))
+
+    def velocity(self, t):
+        return [float(np.interp(t, *series)) for series in self._velocity]
+
+    def ground_position(self, err_x, err_y, pose):
+        """Normalised image errors (arrays) seen from `pose` -> (north, east) on the ground, metres."""
+        north, east, altitude, roll, pitch, yaw = pose
+        forward, right = self.camera.ground_offset(err_x, err_y, altitude, roll, pitch)
+        yaw = math.radians(yaw)
+        return (north + forward * math.cos(yaw) - right * math.sin(yaw),
+                east + forward * math.sin(yaw) + right * math.cos(yaw))
+
+
+class PointMassDrone:
+    """
+    Simulated drone: velocity follows the commanded body velocity (first-order lag, VELOCITY_TAU),
+    constant heading, level attitude.
+    """
+    def __init__(self, north, east, altitude, yaw, velocity, tau=VELOCITY_TAU):
+        self.north = north
+        self.east = east
+        self.altitude = altitude
+        self.yaw = yaw
+        self.velocity = np.array(velocity, dtype=float) # NED (m/s)
+        self.command = np.zeros(3)                      # NED (m/s)
+        self.tau = tau
+
+    @classmethod
+    def from_flight(cls, flight, t=0.0):
+        north, east, altitude, _, _, yaw = (float(v) for v in flight.pose(t))
+        return cls(north, east, altitude, yaw, flight.velocity(t))
+
+    def command_body(self, forward, right, down):
+        """VelocityBodyYawspeed (forward, right, down) -> NED command."""
+        yaw = math.radians(self.yaw)
+        self.command = np.array((forward * math.cos(yaw) - right * math.sin(yaw),
+                                 forward * math.sin(yaw) + right * math.cos(yaw), down))
+
+    def step(self, dt):
+        velocity = self.command + (self.velocity - self.command) * math.exp(-dt / self.tau)
+        mean = (self.velocity + velocity) / 2
+        self.north += mean[0] * dt
+        self.east += mean[1] * dt
+        self.altitude = max(self.altitude - mean[2] * dt, 0.0)
+        self.velocity = velocity
+
+    def heading_offset(self, north, east, age=0.0):
+        """Ground point(s) -> (forward, right) from where the drone was `age` seconds ago."""
+        rel_north = north - (self.north - self.velocity[0] * age)
+        rel_east = east - (self.east - self.velocity[1] * age)
+        yaw = math.radians(self.yaw)
+        return (rel_north * math.cos(yaw) + rel_east * math.sin(yaw),
+                -rel_north * math.sin(yaw) + rel_east * math.cos(yaw))
+
+
+class ReplayVision(VisionSource):
+    """
+    Vision source (see vision_sources.py) fed from the recorded detections, on the virtual clock,
+    as seen from the simulated drone.
+    """
+    def __init__(self, detections, clock, flight, drone, camera):
+        super().__init__()
+        # Pre-serialize once: replay goes through the same decode() as the live subscriber
+        self._times = [event["t"] for event in detections]
+        self._capture_times = [event.get("capture_t", event["t"]) for event in detections]
+        self._messages = [json.dumps(event["frame"]).encode() for event in detections]
+        # Recorded drone pose at every capture, in one batch
+        self._poses = np.stack(flight.pose(np.array(self._capture_times)), axis=1) if detections else None
+        self._next = 0
+        self.clock = clock
+        self.flight = flight
+        self.drone = drone
+        self.camera = camera
+        self.target = None # (north, east) of the recorded target in the latest recorded frame
+
+    async def wait_for_detection(self, timeout):
+        await asyncio.sleep(0) # Let the telemetry task run, as a real socket wait would
+        if self._next >= len(self._times):
+            raise ReplayFinished()
+
+        t = self._times[self._next]
+        if t > self.clock.now + timeout:
+            self.clock.advance(self.clock.now + timeout)
+            return None
+
+        self.clock.advance(t)
+        frame = decode(self._messages[self._next])
+        capture_t = self._capture_times[self._next]
+        frame.capture_ts = capture_t # On the virtual clock, like telemetry
+        frame.stage_times = (0.0, 0.0, 0.0, 0.0) # Recorded wall-clock stamps: not on this clock
+        self._reproject(frame, capture_t, self._poses[self._next])
+        self._next += 1
+        return self._deliver(frame, self.clock.now)
+
+    def _reproject(self, frame, capture_t, pose):
+        """Recorded errors -> the errors the simulated drone's level camera saw at capture."""
+        if frame.count == 0:
+            return
+        found, err_x, err_y = select_target(frame)
+        if found:
+            self.target = self.flight.ground_position(err_x, err_y, pose)
+
+        detections = frame.detections
+        error = detections["error"].astype(float)
+        north, east = self.flight.ground_position(error[:, 0], error[:, 1], pose)
+        age = max(self.clock.now - capture_t, 0.0)
+        forward, right = self.drone.heading_offset(north, east, age)
+        altitude = max(self.drone.altitude + self.drone.velocity[2] * age, 0.1)
+        new_x, new_y = self.camera.nadir_error(forward, right, altitude)
+
+        # Boxes follow their centre, and scale with the altitude
+        scale = pose[2] / altitude
+        bbox = detections["bbox"].astype(float)
+        half_w = (bbox[:, 2] - bbox[:, 0]) / 2 * scale
+        half_h = (bbox[:, 3] - bbox[:, 1]) / 2 * scale
+        cx, cy = (new_x + 1.0) / 2, (new_y + 1.0) / 2
+        detections["bbox"] = np.stack((cx - half_w, cy - half_h, cx + half_w, cy + half_h), axis=1)
+        detections["error"] = np.stack((new_x, new_y), axis=1)
+        frame.detections = detections[(np.abs(new_x) <= 1.0) & (np.abs(new_y) <= 1.0)]
+
+
+class FakeTelemetry:
+    """mavsdk telemetry streams of the simulated drone, at TELEMETRY_RATES on the virtual clock."""
+    def __init__(self, drone, clock):
+        self.drone = drone
+        self.clock = clock
+
+    def position(self):
+        return self._stream("position", lambda: SimpleNamespace(relative_altitude_m=self.drone.altitude))
+
+    def attitude_euler(self):
+        return self._stream("attitude_euler", lambda: SimpleNamespace(roll_deg=0.0, pitch_deg=0.0,
+                                                                      yaw_deg=self.drone.yaw))
+
+    def velocity_ned(self):
+        def sample():
+            north, east, down = (float(v) for v in self.drone.velocity)
+            return SimpleNamespace(north_m_s=north, east_m_s=east, down_m_s=down)
+        return self._stream("velocity_ned", sample)
+
+    def distance_sensor(self):
+        return self._silent()
+
+    def landed_state(self):
+        return self._silent()
+
+    async def set_rate(self, rate_hz):
+        pass # Streams follow TELEMETRY_RATES already
+
+    set_rate_position = set_rate_attitude_euler = set_rate_velocity_ned = set_rate
+    set_rate_distance_sensor = set_rate_landed_state = set_rate
+
+    async def _silent(self):
+        """A stream the simulated drone does not provide: never yields, until cancelled."""
+        await asyncio.Event().wait()
+        yield
+
+    async def _stream(self, stream, sample):
+        period = 1.0 / TELEMETRY_RATES[stream]
+        due = self.clock.now
+        while True:
+            if self.clock.now >= due:
+                due = self.clock.now + period
+                yield sample()
+            await asyncio.sleep(0)
+
+
+class FakeOffboard:
+    def __init__(self, clock, drone):
+        self.clock = clock
+        self.drone = drone
+        self.trace = [] # (t, forward, right, down)
+
+    async def set_velocity_body(self, command):
+        self.trace.append((self.clock.now, command.forward_m_s, command.right_m_s, command.down_m_s))
+        self.drone.command_body(command.forward_m_s, command.right_m_s, command.down_m_s)
+
+    async def start(self):
+        pass
+
+
+class FakeAction:
+    def __init__(self, clock, drone):
+        self.clock = clock
+        self.drone = drone
+        self.land_time = None
+        self.land_position = None # (north, east) of the simulated drone at land()
+
+    async def land(self):
+        self.land_time = self.clock.now
+        self.land_position = (self.drone.north, self.drone.east)
+
+
+class FakeSystem:
+    def __init__(self, drone, clock):
+        self.telemetry = FakeTelemetry(drone, clock)
+        self.offboard = FakeOffboard(clock, drone)
+        self.action = FakeAction(clock, drone)
+
+
+def load_log(path):
+    with open(path) as f:
+        events = [json.loads(line) for line in f if line.strip()]
+    events.sort(key=lambda event: event["t"])
+    detections = [e for e in events if e["type"] == "detection"]
+    samples = [e for e in events if e["type"] != "detection"]
+    return detections, samples
+
+
+async def _run(ctrl):
+    try:
+        await ctrl.run()
+    except ReplayFinished:
+        pass
+
+
+def replay_landing(path, verbose=False):
+    """Replays one log through DroneController. Returns a summary dict (+ the velocity trace)."""
+    detections, samples = load_log(path)
+    camera = CameraModel.default()
+    flight = RecordedFlight(samples, camera)
+    plant = PointMassDrone.from_flight(flight)
+    clock = ReplayClock(plant)
+    drone = FakeSystem(plant, clock)
+    vision = ReplayVision(detections, clock, flight, plant, camera)
+    # Capture and telemetry stamps are on the virtual clock too: latency is measured in virtual time
+    ctrl = DroneController(drone, vision=vision, clock=clock, wall_clock=clock)
+    ctrl.latency_report_path = None # No report files from replayed landings
+
+    start = time.perf_counter()
+    output = sys.stdout if verbose else io.StringIO()
+    with contextlib.redirect_stdout(output):
+        asyncio.run(_run(ctrl))
+    wall_time = time.perf_counter() - start
+
+    result = {
+        "log": str(path),
+        "landed": drone.action.land_time is not None,
+        "landing_time_s": drone.action.land_time,
+        "sim_time_s": clock.now,
+        "wall_time_s": wall_time,
+        "speedup": clock.now / wall_time if wall_time > 0 else float("inf"),
+        "setpoints": len(drone.offboard.trace),
+        "touchdown_offset_m": None,
+        "trace": drone.offboard.trace,
+    }
+    if result["landed"] and vision.target is not None:
+        north = float(drone.action.land_position[0] - vision.target[0])
+        east = float(drone.action.land_position[1] - vision.target[1])
+        result["touchdown_offset_m"] = {"north": north, "east": east, "norm": math.hypot(north, east)}
+    return result
+
+
+def write_trace(path, trace):
+    with open(path, "w") as f:
+        f.write("t,forward_m_s,right_m_s,down_m_s\n")
+        for row in trace:
+            f.write(",".join(f"{v:.4f}" for v in row) + "\n")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Replay recorded landings through DroneController (no SITL).")
+    parser.add_argument("logs", nargs="+", help="Replay logs (JSONL) recorded with controller.RECORD_PATH")
+    parser.add_argument("--trace", help="Write the commanded velocity trace of the (single) log to this CSV")
+    parser.add_argument("--json", help="Write all results to this JSON file")
+    parser.add_argument("--verbose", action="store_true", help="Show the controller's own output")
+    parser.add_argument("--law", help="Control law config (JSON, see control_laws.py) instead of CONTROL_LAW_CONFIG")
+    parser.add_argument("--descent", choices=("blended", "gated"), help="Override DESCENT_BLENDING")
+    args = parser.parse_args()
+
+    if args.law:
+        controller.CONTROL_LAW_CONFIG = args.law
+    if args.descent:
+        controller.DESCENT_BLENDING = args.descent == "blended"
+
+    results = []
+    for path in args.logs:
+        result = replay_landing(path, verbose=args.verbose)
+        results.append(result)
+        offset = result["touchdown_offset_m"]
+        offset_str = f"{offset['norm']:.3f} m (N {offset['north']:+.3f}, E {offset['east']:+.3f})" if offset else "n/a"
+        landed_str = f"{result['landing_time_s']:.2f}s" if result["landed"] else "NOT LANDED"
+        print(f"{path}: {landed_str} | touchdown offset {offset_str} | {result['setpoints']} setpoints | "
+              f"{result['speedup']:.0f}x real time")
+
+    if args.trace:
+        write_trace(args.trace, results[0]["trace"])
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump([{k: v for k, v in r.items() if k != "trace"} for r in results], f, indent=2)
+
+    landed = sum(r["landed"] for r in results)
+    times = [r["landing_time_s"] for r in results if r["landed"]]
+    offsets = [r["touchdown_offset_m"]["norm"] for r in results if r["touchdown_offset_m"]]
+    mean_str = f" | mean landing time {sum(times) / len(times):.2f}s" if times else ""
+    mean_str += f" | mean touchdown offset {sum(offsets) / len(offsets):.3f} m" if offsets else ""
+    print(f"-- {landed}/{len(results)} landed{mean_str}")
+    return 0 if landed == len(results) else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
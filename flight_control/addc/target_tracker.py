@@ -0,0 +1,156 @@
+import math
+import numpy as np
+
+# -----------------------------------------------------------------------------------------------
+# TARGET TRACKER
+# -----------------------------------------------------------------------------------------------
+# Constant-velocity Kalman filter of the landing target relative to the drone, in the level
+# heading frame of VelocityBodyYawspeed:
+#
+#   state = [forward, right, target_vel_forward, target_vel_right]   (m, m/s)
+#
+# Between frames the offset is predicted from the drone's own velocity (telemetry velocity_ned
+# rotated by yaw), so the control loop can run faster than the detector and ride through short
+# dropouts. Detections (ground offsets from camera_model.py) are timestamped at capture: they are
+# moved forward to "now" with the drone velocity before the update, and their noise is inflated
+# by the age. The position covariance tells the controller how far the estimate can be trusted.
+#
+# Like control_laws.py, the filter is written with NumPy ops over a trailing `shape` of lanes
+# (x is 4 x shape, P is 4 x 4 x shape): shape () flies the drone (scalars in, floats out),
+# shape (n,) runs n landings at once in landing_sim.py, with `lanes` masks selecting which ones
+# a call applies to. The small matrix products are written out so every op runs over all lanes.
+# -----------------------------------------------------------------------------------------------
+MEASUREMENT_NOISE = 0.02 # Detection noise as an angle (rad): std-dev in metres = this * altitude
+VELOCITY_NOISE = 0.1     # Drone velocity telemetry error (m/s), integrated into the offset
+TARGET_ACCEL_NOISE = 0.05 # Target velocity random walk (m/s^2) - ~0 for a static pad, absorbs drift
+INITIAL_VELOCITY_STD = 0.2 # Target velocity std-dev when a track starts (m/s)
+GATE = 9.21              # Mahalanobis distance^2 above which a detection is rejected (chi2, 2 dof, 99%)
+MAX_REJECTS = 3          # Consecutive rejected detections before the track restarts on the new one
+
+
+def heading_velocity(snapshot):
+    """Drone velocity from a TelemetrySnapshot, NED -> level heading frame (forward, right) in m/s."""
+    yaw = math.radians(snapshot.yaw)
+    forward = snapshot.vel_north * math.cos(yaw) + snapshot.vel_east * math.sin(yaw)
+    right = -snapshot.vel_north * math.sin(yaw) + snapshot.vel_east * math.cos(yaw)
+    return forward, right
+
+
+class TargetTracker:
+    def __init__(self, measurement_noise=MEASUREMENT_NOISE, velocity_noise=VELOCITY_NOISE,
+                 accel_noise=TARGET_ACCEL_NOISE, shape=()):
+        self.measurement_noise = measurement_noise
+        self.velocity_noise = velocity_noise
+        self.accel_noise = accel_noise
+        self.shape = shape
+        self.x = np.zeros((4,) + shape)
+        self.P = np.zeros((4, 4) + shape)
+        self.t = np.full(shape, np.nan)            # Time of the state (NaN = no track)
+        self.last_update = np.full(shape, np.nan)  # Time of the last accepted detection
+        self.rejects = np.zeros(shape, dtype=int)
+        self.reset()
+
+    def reset(self, lanes=True):
+        """Drops the track (of the `lanes` mask, default all)."""
+        self.x = np.where(lanes, 0.0, self.x)
+        self.P = np.where(lanes, _eye(4, self.shape), self.P)
+        self.t = np.where(lanes, np.nan, self.t)
+        self.last_update = np.where(lanes, np.nan, self.last_update)
+        self.rejects = np.where(lanes, 0, self.rejects)
+
+    @property
+    def initialized(self):
+        return self._out(~np.isnan(self.t))
+
+    def predict(self, now, drone_velocity, lanes=True):
+        """Propagates the state to `now` (controller clock) given the drone velocity (forward, right)."""
+        dt = now - self.t
+        step = np.asarray(lanes) & (dt > 0.0) # False without a track (NaN)
+        dt = np.where(step, dt, 0.0)
+        self.t = np.where(step, now, self.t)
+
+        # Relative offset moves with (target velocity - drone velocity)
+        self.x[0] += (self.x[2] - drone_velocity[0]) * dt
+        self.x[1] += (self.x[3] - drone_velocity[1]) * dt
+
+        # P = F P F^T + Q, F = identity + dt at (0, 2) and (1, 3)
+        P = self.P
+        P[:2] += dt * P[2:]
+        P[:, :2] += dt * P[:, 2:]
+        q = self.accel_noise ** 2
+        diagonal = q * dt ** 3 / 3 + self.velocity_noise ** 2 * dt
+        cross = q * dt ** 2 / 2
+        for i in (0, 1):
+            P[i, i] += diagonal
+            P[i, i + 2] += cross
+            P[i + 2, i] += cross
+            P[i + 2, i + 2] += q * dt
+
+    def update(self, now, offset, drone_velocity, altitude, age=0.0, lanes=True):
+        """
+        Fuses a detection: `offset` = (forward, right) in metres seen `age` seconds before `now`.
+        Returns False (per lane) where the detection was gated out as an outlier.
+        """
+        lanes = np.broadcast_to(lanes, self.shape)
+        # Move the detection to "now" (the pad is static, the drone kept flying during the latency)
+        z = np.zeros((2,) + self.shape)
+        z[0] = offset[0] - drone_velocity[0] * age
+        z[1] = offset[1] - drone_velocity[1] * age
+        r = (self.measurement_noise * np.maximum(altitude, 0.1)) ** 2 + self.velocity_noise ** 2 * age
+
+        new = lanes & np.isnan(self.t)
+        tracked = lanes & ~new
+        self.predict(now, drone_velocity, tracked)
+        y = z - self.x[:2]
+        S_inv = _inverse_2x2(self.P[:2, :2] + r * _eye(2, self.shape))
+        gated = tracked & (np.einsum("i...,ij...,j...->...", y, S_inv, y) > GATE)
+        self.rejects = np.where(gated, self.rejects + 1, self.rejects)
+        # After MAX_REJECTS the estimate, not the detections, is wrong: start over on the latest one
+        start = new | (gated & (self.rejects >= MAX_REJECTS))
+        fuse = tracked & ~gated
+
+        K = np.einsum("ik...,kj...->ij...", self.P[:, :2], S_inv)
+        x = self.x + np.einsum("ij...,j...->i...", K, y)
+        P = self.P - np.einsum("ik...,kj...->ij...", K, self.P[:2]) # (I - K H) P
+        P = (P + P.swapaxes(0, 1)) / 2
+        self.x = np.where(fuse, x, self.x)
+        self.P = np.where(fuse, P, self.P)
+        self.last_update = np.where(fuse, now, self.last_update)
+        self.rejects = np.where(fuse, 0, self.rejects)
+        self._start(now, z, r, start)
+        return self._out(fuse | start | ~lanes)
+
+    def offset(self):
+        """Estimated (forward, right) of the target relative to the drone, in metres."""
+        return self._out(self.x[0]), self._out(self.x[1])
+
+    def position_std(self):
+        """1-sigma position uncertainty along the worst axis (m), inf without a track."""
+        a, b, d = self.P[0, 0], self.P[0, 1], self.P[1, 1]
+        variance = (a + d) / 2 + np.sqrt(((a - d) / 2) ** 2 + b ** 2) # Largest eigenvalue
+        return self._out(np.where(np.isnan(self.t), np.inf, np.sqrt(variance)))
+
+    def _start(self, now, z, r, lanes):
+        x = np.zeros((4,) + self.shape)
+        x[:2] = z
+        P = np.zeros((4, 4) + self.shape)
+        P[0, 0] = P[1, 1] = r
+        P[2, 2] = P[3, 3] = INITIAL_VELOCITY_STD ** 2
+        self.x = np.where(lanes, x, self.x)
+        self.P = np.where(lanes, P, self.P)
+        self.t = np.where(lanes, now, self.t)
+        self.last_update = np.where(lanes, now, self.last_update)
+        self.rejects = np.where(lanes, 0, self.rejects)
+
+    def _out(self, value):
+        """Plain Python numbers for a single tracker (shape ()), arrays for lanes."""
+        return value.item() if self.shape == () else value
+
+
+def _eye(size, shape):
+    return np.eye(size).reshape((size, size) + (1,) * len(shape))
+
+
+def _inverse_2x2(S):
+    a, b, c, d = S[0, 0], S[0, 1], S[1, 0], S[1, 1]
+    return np.array(((d, -b), (-c, a))) / (a * d - b * c)
@@ -0,0 +1,160 @@
+import time
+import asyncio
+import numpy as np
+
+# -----------------------------------------------------------------------------------------------
+# TELEMETRY CACHE
+# -----------------------------------------------------------------------------------------------
+# One background task per MAVSDK telemetry stream keeps the newest sample of each in a single
+# slotted object. The control step reads snapshot() synchronously: no awaits, and a slow or
+# missing stream (e.g. no rangefinder) never blocks the others or the landing loop.
+#
+# Timestamps are wall clock (time.time()) so they line up with the capture_ts of detections.
+# -----------------------------------------------------------------------------------------------
+TELEMETRY_RATES = {      # Requested stream rates (Hz); the FC may ignore or clamp them
+    "position": 20.0,
+    "attitude_euler": 50.0,
+    "velocity_ned": 20.0,
+    "distance_sensor": 20.0,
+    "landed_state": 2.0,
+}
+HISTORY_SIZE = 128       # Samples kept per history ring (~2.5 s of attitude at 50 Hz)
+
+
+class TelemetrySnapshot:
+    """Latest sample of every stream, each with the time it was received (0.0 = never)."""
+    __slots__ = (
+        "altitude", "altitude_ts",
+        "roll", "pitch", "yaw", "attitude_ts",
+        "vel_north", "vel_east", "vel_down", "velocity_ts",
+        "distance", "distance_ts",
+        "landed_state", "landed_state_ts",
+    )
+
+    def __init__(self):
+        self.altitude = 0.0                             # Relative altitude (m)
+        self.roll = self.pitch = self.yaw = 0.0         # Attitude (deg)
+        self.vel_north = self.vel_east = self.vel_down = 0.0 # NED velocity (m/s)
+        self.distance = float("nan")                    # Rangefinder distance (m)
+        self.landed_state = None                        # mavsdk.telemetry.LandedState
+        self.altitude_ts = self.attitude_ts = self.velocity_ts = 0.0
+        self.distance_ts = self.landed_state_ts = 0.0
+
+    def copy(self):
+        snap = TelemetrySnapshot.__new__(TelemetrySnapshot)
+        for name in self.__slots__:
+            setattr(snap, name, getattr(self, name))
+        return snap
+
+
+class TelemetryHistory:
+    """Fixed-size ring of timestamped samples, interpolated at an arbitrary time (e.g. frame capture)."""
+    def __init__(self, width, size=HISTORY_SIZE):
+        self._t = np.zeros(size)
+        self._values = np.zeros((size, width))
+        self._count = 0
+
+    def append(self, t, *values):
+        i = self._count % len(self._t)
+        self._t[i] = t
+        self._values[i] = values
+        self._count += 1
+
+    def at(self, t):
+        """Values at time `t` (linear interpolation, clamped to the oldest/newest sample), None if empty."""
+        if self._count == 0:
+            return None
+        size = len(self._t)
+        if self._count <= size:
+            order = slice(0, self._count)
+        else:
+            order = (np.arange(size) + self._count) % size # Oldest first
+        times = self._t[order]
+        values = self._values[order]
+        return [float(np.interp(t, times, values[:, k])) for k in range(values.shape[1])]
+
+
+class TelemetryCache:
+    def __init__(self, drone, clock=time.time, rates=None, recorder=None):
+        self.drone = drone
+        self.clock = clock
+        self.rates = TELEMETRY_RATES if rates is None else rates
+        self.recorder = recorder
+        self._latest = TelemetrySnapshot()
+        self._tasks = []
+
+        # Recent altitude and (roll, pitch), to look up the state at a frame's capture time
+        self.altitude_history = TelemetryHistory(1)
+        self.attitude_history = TelemetryHistory(2)
+
+    def start(self):
+        handlers = {
+            "position": self._on_position,
+            "attitude_euler": self._on_attitude,
+            "velocity_ned": self._on_velocity,
+            "distance_sensor": self._on_distance,
+            "landed_state": self._on_landed_state,
+        }
+        self._tasks = [asyncio.create_task(self._follow(name, handler)) for name, handler in handlers.items()]
+
+    def stop(self):
+        for task in self._tasks:
+            task.cancel()
+        self._tasks = []
+
+    def snapshot(self):
+        """Consistent copy of the latest samples (updates only happen between awaits)."""
+        return self._latest.copy()
+
+    async def _follow(self, name, handler):
+        telemetry = self.drone.telemetry
+        try:
+            rate = self.rates.get(name)
+            if rate:
+                try:
+                    await getattr(telemetry, f"set_rate_{name}")(rate)
+                except Exception as e:
+                    print(f"[Telemetry] Could not set {name} rate: {e}")
+
+            async for sample in getattr(telemetry, name)():
+                handler(sample, self.clock())
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            print(f"[Telemetry] {name} stream unavailable: {e}")
+
+    def _on_position(self, position, now):
+        latest = self._latest
+        latest.altitude = position.relative_altitude_m
+        latest.altitude_ts = now
+        self.altitude_history.append(now, latest.altitude)
+        if self.recorder:
+            self.recorder.telemetry("position", relative_altitude_m=latest.altitude)
+
+    def _on_attitude(self, attitude, now):
+        latest = self._latest
+        latest.roll = attitude.roll_deg
+        latest.pitch = attitude.pitch_deg
+        latest.yaw = attitude.yaw_deg
+        latest.attitude_ts = now
+        self.attitude_history.append(now, latest.roll, latest.pitch)
+        if self.recorder:
+            self.recorder.telemetry("attitude_euler", roll_deg=latest.roll, pitch_deg=latest.pitch, yaw_deg=latest.yaw)
+
+    def _on_velocity(self, velocity, now):
+        latest = self._latest
+        latest.vel_north = velocity.north_m_s
+        latest.vel_east = velocity.east_m_s
+        latest.vel_down = velocity.down_m_s
+        latest.velocity_ts = now
+        if self.recorder:
+            self.recorder.telemetry("velocity_ned", north_m_s=latest.vel_north, east_m_s=latest.vel_east,
+                                    down_m_s=latest.vel_down)
+
+    def _on_distance(self, distance, now):
+        self._latest.distance = distance.current_distance_m
+        self._latest.distance_ts = now
+
+    def _on_landed_state(self, landed_state, now):
+        self._latest.landed_state = landed_state
+        self._latest.landed_state_ts = now
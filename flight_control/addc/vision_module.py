@@ -1,18 +1,329 @@
 import cv2
+import math
 import threading
 import numpy as np
 import time
 
+from camera_model import CAMERA_HFOV_DEG
+
+# -----------------------------------------------------------------------------------------------
+# ARC / CIRCLE DETECTOR
+# -----------------------------------------------------------------------------------------------
+# Edges -> external contours -> the longest contour that is a clean circular arc.
+#
+# Scoring is batched instead of one contour at a time in Python:
+#   1. contours too short to matter are dropped on point count alone (a CHAIN_APPROX_NONE
+#      contour advances at most sqrt(2) px per point, so fewer than MIN_ARC_LENGTH / sqrt(2) + 1
+#      points can never reach MIN_ARC_LENGTH)
+#   2. the rest go into one concatenated x / y array with segment offsets; bounding boxes, arc
+#      lengths and circle fits of all of them come from np.*.reduceat over the segments
+#   3. circles come from a least-squares (Kasa) fit, which recovers the full circle from a
+#      partial arc, where minEnclosingCircle only returns the circle around the visible points;
+#      at full resolution every FIT_STEP-th contour point is enough for all of these
+#   4. one radial error pass over all points scores every contour that passed the bounding box,
+#      arc length and radius checks; the longest consistent one wins, as before, except that a
+#      clean arc is preferred over a closed polygon and an open contour must be a clean arc
+#
+# Pyramid mode (detect): the search runs on a downscaled frame first (level L = 1 / 2^L of the
+# resolution, 2x2 area averages of the grey frame, with a blur kernel shrunk to match) and only
+# a window around the candidate is processed again at a finer level. The starting level is the
+# coarsest one where the marker, at the current altitude, still has a radius of LEVEL_MIN_RADIUS
+# pixels: high up the marker is small and the search starts fine, low down it fills the frame
+# and the search starts coarse. The altitude also bounds the coarse arcs (MAX_RADIUS_RATIO x the
+# expected radius): large, gentle ground-texture arcs would otherwise outscore the marker.
+# A coarse arc is only returned once a window around it confirms it, at full resolution when the
+# window fits REFINE_MAX_AREA of the frame, otherwise on the same window at the finest level where
+# it does (large markers low down). When a level finds nothing or is not confirmed, the next finer
+# level is tried, and last the whole frame without any bound, so a wrong altitude costs time, not lock.
+# -----------------------------------------------------------------------------------------------
+MIN_ARC_LENGTH = 50      # Shorter contours are noise, too small to judge curvature (px)
+MIN_RADIUS = 10          # (px)
+MAX_RADIUS_FACTOR = 2.0  # Radius above MAX_RADIUS_FACTOR * frame width is a straight line
+MAX_CONSISTENCY = 0.15   # Mean |distance - radius| / radius accepted for a closed contour
+OPEN_CONSISTENCY = 0.05  # ... for an open one (a straight-line corner fits like a square, ~0.1)
+CLOSED_OFFSET = 0.25     # Closed: fitted centre within this x radius of the contour's point mean
+FIT_STEP = 2             # Measure, fit and score every FIT_STEP-th contour point (full resolution)
+
+# Display: the capture thread never draws; a separate thread renders the latest result
+HEADLESS = False         # True: no window and no drawing at all
+DISPLAY_FPS = 10         # Max window refresh rate
+
+# Pyramid
+PYRAMID = True           # False: full-resolution detection only
+MAX_PYRAMID_LEVEL = 2    # Coarsest level (1/4 resolution)
+LEVEL_MIN_RADIUS = 8     # Expected marker radius kept at the starting level (px)
+MARKER_RADIUS = 0.5      # Landing marker radius (m), gives the expected size at an altitude
+DEFAULT_LEVEL = 1        # Starting level while the altitude is unknown
+REFINE_MARGIN = 16       # Full-resolution window: candidate circle box + this (px)
+REFINE_MAX_AREA = 0.25   # Refinement window budget (fraction of the full-resolution frame area)
+MAX_RADIUS_RATIO = 3.0   # Coarse arcs above this x the expected marker radius are ground texture (pad ~2x)
+
+
+def pyramid_level(altitude, width, hfov_deg=CAMERA_HFOV_DEG):
+    """Starting pyramid level for a frame `width` pixels wide at `altitude` (m, None = unknown)."""
+    radius = marker_radius(altitude, width, hfov_deg)
+    if radius is None:
+        return DEFAULT_LEVEL
+    level = 0
+    while level < MAX_PYRAMID_LEVEL and radius / 2 ** (level + 1) >= LEVEL_MIN_RADIUS:
+        level += 1
+    return level
+
+
+def marker_radius(altitude, width, hfov_deg=CAMERA_HFOV_DEG):
+    """Expected marker radius (full-resolution px) at `altitude` (m), None if unknown."""
+    if altitude is None or altitude <= 0.0:
+        return None
+    focal = (width / 2) / math.tan(math.radians(hfov_deg) / 2)
+    return focal * MARKER_RADIUS / altitude
+
+
+def preprocess(frame, level=0):
+    """BGR frame -> dilated Canny edge map, at 1 / 2^level of the frame resolution."""
+    gray = cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY)
+    for _ in range(level):
+        gray = _half(gray)
+    return _edges(gray, level)
+
+
+def _half(gray):
+    """Next pyramid level: 2x2 pixel average (INTER_AREA, ~4x cheaper than pyrDown; blurred after)."""
+    return cv2.resize(gray, (gray.shape[1] // 2, gray.shape[0] // 2), interpolation=cv2.INTER_AREA)
+
+
+def _edges(gray, level=0):
+    """Edge map of a grey image that is already at 1 / 2^level of the frame resolution."""
+    # Slightly stronger blur to smooth out pixelated arcs (9x9 at full resolution, scaled down)
+    ksize = max(3, (9 >> level) | 1)
+    blur = cv2.GaussianBlur(gray, (ksize, ksize), 2.0 / 2 ** level)
+    edges = cv2.Canny(blur, 40, 100)
+    if level:
+        return edges # A 3x3 dilation here would merge everything within 2^level px at full resolution
+    # Dilate to connect broken arc segments
+    kernel = np.ones((3, 3), np.uint8)
+    return cv2.dilate(edges, kernel, iterations=1)
+
+
+def _segments(contours):
+    """
+    Concatenated x and y coordinates of `contours`, per-contour start offsets and point counts,
+    and the contour index of every point.
+    """
+    counts = np.array([len(c) for c in contours])
+    offsets = np.zeros(len(contours), dtype=counts.dtype)
+    np.cumsum(counts[:-1], out=offsets[1:])
+    x, y = np.concatenate(contours).reshape(-1, 2).T.astype(np.float64, order="C")
+    return x, y, offsets, counts, np.repeat(np.arange(len(contours)), counts)
+
+
+def _arc_lengths(x, y, offsets):
+    """Open polyline length of every segment."""
+    dx, dy = np.diff(x), np.diff(y)
+    steps = np.zeros(len(x))
+    np.sqrt(dx * dx + dy * dy, out=steps[:-1])
+    steps[offsets[1:] - 1] = 0.0 # No step between the last point of a segment and the next segment
+    return np.add.reduceat(steps, offsets)
+
+
+def _fit_circles(x, y, offsets, counts, segment):
+    """
+    Kasa least-squares circle per segment: (cx, cy, radius, offset) arrays, offset = distance of
+    the centre from the segment's point mean. Points are centred on their segment mean first,
+    which leaves a 2x2 system per segment. Collinear points give radius inf.
+    """
+    mx = np.add.reduceat(x, offsets) / counts
+    my = np.add.reduceat(y, offsets) / counts
+    u, v = x - mx[segment], y - my[segment]
+    terms = np.empty((5, len(x)))
+    np.multiply(u, u, out=terms[0])
+    np.multiply(v, v, out=terms[1])
+    np.multiply(u, v, out=terms[2])
+    w = terms[0] + terms[1]
+    np.multiply(u, w, out=terms[3])
+    np.multiply(v, w, out=terms[4])
+    suu, svv, suv, suw, svw = np.add.reduceat(terms, offsets, axis=1)
+    det = suu * svv - suv * suv
+    with np.errstate(divide="ignore", invalid="ignore"):
+        uc = 0.5 * (suw * svv - svw * suv) / det
+        vc = 0.5 * (svw * suu - suw * suv) / det
+        radius = np.sqrt(uc * uc + vc * vc + (suu + svv) / counts)
+    radius[~np.isfinite(radius) | (np.abs(det) < 1e-9)] = np.inf
+    return mx + uc, my + vc, radius, np.hypot(uc, vc)
+
+
+def _consistency(x, y, offsets, counts, segment, cx, cy, radius):
+    """Mean absolute radial error of every segment, normalised by its radius."""
+    dx, dy = x - cx[segment], y - cy[segment]
+    errors = np.abs(np.sqrt(dx * dx + dy * dy) - radius[segment])
+    return np.add.reduceat(errors, offsets) / counts / radius
+
+
+def find_arc(edges, width, scale=1, max_radius=None):
+    """
+    Longest consistent arc in an edge map: (cx, cy, radius, score, contour) or None.
+    `width` is the frame width used for the straight-line radius limit, in edge map pixels.
+    `scale`: full-resolution pixels per edge map pixel (the size limits are in full resolution).
+    `max_radius`: optional upper radius limit (full-resolution px), e.g. from the altitude.
+    """
+    min_length = MIN_ARC_LENGTH / scale
+    min_radius = MIN_RADIUS / scale
+    contours, _ = cv2.findContours(edges, cv2.RETR_EXTERNAL, cv2.CHAIN_APPROX_NONE)
+
+    # 1. Point count
+    min_points = int(min_length / np.sqrt(2)) + 1
+    candidates = [cnt for cnt in contours if len(cnt) >= min_points]
+    if not candidates:
+        return None
+
+    # 2-3. Bounding box, arc length and circle fit of every candidate at once
+    step = max(FIT_STEP // scale, 1)
+    x, y, offsets, counts, segment = _segments([cnt[::step] for cnt in candidates] if step > 1 else candidates)
+    box_w = np.maximum.reduceat(x, offsets) - np.minimum.reduceat(x, offsets) + 1
+    box_h = np.maximum.reduceat(y, offsets) - np.minimum.reduceat(y, offsets) + 1
+    lengths = _arc_lengths(x, y, offsets)
+    cx, cy, radius, offset = _fit_circles(x, y, offsets, counts, segment)
+    sane = (box_w * box_w + box_h * box_h >= 4 * min_radius * min_radius) & (lengths >= min_length) \
+        & (radius >= min_radius) & (radius <= width * MAX_RADIUS_FACTOR)
+    if max_radius is not None:
+        sane &= radius * scale <= max_radius
+    if not sane.any():
+        return None
+
+    # 4. Radial consistency
+    # Thresholds:
+    # < 0.05: Very Clean Circle/Arc
+    # 0.05 - 0.15: Distorted Circle (Angled view), or a square (the pad around the ring, ~0.1)
+    # Around a least-squares circle a square scores much lower than around minEnclosingCircle,
+    # and so does a straight-line corner of it, whose fitted centre is off the pad. So only a
+    # closed contour (points all around the fitted centre) gets the loose threshold.
+    radius = np.where(sane, radius, np.inf)
+    with np.errstate(invalid="ignore"):
+        score = _consistency(x, y, offsets, counts, segment, cx, cy, radius)
+    closed = offset < CLOSED_OFFSET * radius
+    hits = sane & (score < np.where(closed, MAX_CONSISTENCY, OPEN_CONSISTENCY))
+    if not hits.any():
+        return None
+    # Longest arc wins (prefer longer curves), clean arcs (the ring) before closed polygons
+    # (the pad); argmax keeps the first on ties, like the stable sort
+    arcs = hits & (score < OPEN_CONSISTENCY)
+    i = np.argmax(np.where(arcs if arcs.any() else hits, lengths, -1.0))
+    return float(cx[i]), float(cy[i]), float(radius[i]), float(score[i]), candidates[i]
+
+
+def detect(frame, altitude=None, pyramid=PYRAMID):
+    """find_arc on a BGR frame, in full-resolution pixels; pyramid search from the altitude's level."""
+    h, w = frame.shape[:2]
+    if not pyramid:
+        return find_arc(preprocess(frame), w)
+
+    start = pyramid_level(altitude, w)
+    levels = [cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY)]
+    for _ in range(start):
+        levels.append(_half(levels[-1]))
+    expected = marker_radius(altitude, w)
+    max_radius = expected * MAX_RADIUS_RATIO if expected else None
+    for level in range(start, 0, -1):
+        scale = 2 ** level
+        arc = find_arc(_edges(levels[level], level), w / scale, scale, max_radius)
+        if arc is None:
+            continue
+        fine = _refine(levels, arc, level, w, h, max_radius)
+        if fine is not None:
+            return fine
+    # Last resort, the whole frame as without the pyramid (ungated: a wrong altitude costs time, not lock)
+    return find_arc(_edges(levels[0]), w)
+
+
+def _refine(levels, arc, level, w, h, max_radius):
+    """
+    Confirm a level `level` arc in a window around it, at the finest level below whose window fits
+    REFINE_MAX_AREA of the full-resolution frame (full resolution for small markers, a subsampled
+    window for large ones). Returns the confirmed arc in full-resolution pixels, or None.
+    """
+    scale = 2 ** level
+    cx, cy, radius = arc[0] * scale, arc[1] * scale, arc[2] * scale
+    x0, y0 = max(int(cx - radius) - REFINE_MARGIN, 0), max(int(cy - radius) - REFINE_MARGIN, 0)
+    x1, y1 = min(int(cx + radius) + REFINE_MARGIN, w), min(int(cy + radius) + REFINE_MARGIN, h)
+    if x1 <= x0 or y1 <= y0:
+        return None
+    for fine_level in range(level):
+        step = 2 ** fine_level
+        if (x1 - x0) * (y1 - y0) <= REFINE_MAX_AREA * w * h * step * step:
+            break
+    else:
+        return None # Window too large even one level finer: the caller tries that level whole
+    wx0, wy0 = x0 // step, y0 // step
+    window = levels[fine_level][wy0:-(-y1 // step), wx0:-(-x1 // step)]
+    fine = find_arc(_edges(window, fine_level), w / step, step, max_radius)
+    if fine is None:
+        return None # Not confirmed: the coarse arc may be noise
+    fx, fy = (fine[0] + wx0) * step, (fine[1] + wy0) * step
+    if math.hypot(fx - cx, fy - cy) > scale + 0.25 * radius:
+        return None # Refinement locked onto something else in the window
+    return fx, fy, fine[2] * step, fine[3], (fine[4] + np.array((wx0, wy0), dtype=np.int32)) * step
+
+
+def arc_error(arc, width, height):
+    """Normalised error (-1.0 .. 1.0 across the frame) of a detect() result's centre."""
+    # NAVIGATION LOGIC
+    # Even if target_x is -500 (off screen), this math works.
+    # It creates a strong vector pulling the drone toward the virtual center.
+    target_x, target_y = int(arc[0]), int(arc[1])
+    return (target_x - width // 2) / (width / 2), (target_y - height // 2) / (height / 2)
+
+
+def draw_arc(frame, arc):
+    """Draw a find_arc result on `frame` (in place)."""
+    h, w = frame.shape[:2]
+    mx, my, radius, consistency_score, cnt = arc
+    target_x, target_y = int(mx), int(my)
+
+    # Draw the "Theoretical" Full Circle (Green)
+    cv2.circle(frame, (target_x, target_y), int(radius), (0, 255, 0), 2)
+
+    # Draw the center (which might be off-screen, but we try)
+    if 0 <= target_x < w and 0 <= target_y < h:
+         cv2.circle(frame, (target_x, target_y), 5, (0, 0, 255), -1)
+         cv2.putText(frame, "CENTER", (target_x+10, target_y),
+                     cv2.FONT_HERSHEY_SIMPLEX, 0.5, (0, 0, 255), 1)
+
+    # Draw the detected Arc segment (Red) to show what we actually see
+    cv2.drawContours(frame, [cnt], -1, (0, 0, 255), 2)
+
+    # Debug info
+    cv2.putText(frame, f"Error: {consistency_score:.3f}", (10, 30),
+                cv2.FONT_HERSHEY_SIMPLEX, 0.7, (0, 255, 255), 2)
+
+
 class VisionSystem:
-    def __init__(self):
+    """
+    Capture + detection thread. The capture thread only detects and publishes the result; with
+    headless=False a separate display thread renders the latest (frame, result) snapshot at up to
+    display_fps, so the detection rate does not depend on the window (or on anyone watching it).
+
+    `pipeline`: GStreamer pipeline ending in an appsink (default: the SITL RTP stream), or a video
+    file / device for cv2.VideoCapture. A file stops the system at its end.
+    `on_frame(frame_number, capture_ts, arc, width, height)` is called from the capture thread
+    after every frame (capture_ts: time.time() when the frame was read, arc: detect() result).
+    """
+
+    def __init__(self, headless=HEADLESS, display_fps=DISPLAY_FPS, pyramid=PYRAMID, pipeline=None, on_frame=None):
         self.target_detected = False
-        self.err_x = 0.0 
-        self.err_y = 0.0 
+        self.err_x = 0.0
+        self.err_y = 0.0
         self.running = False
+        self.headless = headless
+        self.display_fps = display_fps
+        self.pyramid = pyramid
+        self.altitude = None # Set from telemetry with set_altitude(); picks the pyramid level
+        self.frames = 0 # Frames run through the detector
         self._thread = None
+        self._display_thread = None
         self._lock = threading.Lock()
+        self._snapshot = None # (frame number, frame, find_arc result) for the display thread
+        self.on_frame = on_frame
 
-        self.pipeline = (
+        self.pipeline = pipeline if pipeline is not None else (
             "udpsrc port=5600 buffer-size=0 ! "
             "application/x-rtp, payload=96 ! "
             "rtph264depay ! h264parse config-interval=1 ! "
@@ -27,125 +338,88 @@ class VisionSystem:
         self._thread = threading.Thread(target=self._update_loop)
         self._thread.daemon = True
         self._thread.start()
-        print("[Vision] Thread Started.")
+        if not self.headless:
+            self._display_thread = threading.Thread(target=self._display_loop)
+            self._display_thread.daemon = True
+            self._display_thread.start()
+        print(f"[Vision] Thread Started ({'headless' if self.headless else f'display at {self.display_fps} FPS'}).")
 
     def stop(self):
         self.running = False
         if self._thread: self._thread.join()
+        if self._display_thread: self._display_thread.join()
         print("[Vision] Thread Stopped.")
 
     def get_target_data(self):
         with self._lock:
             return self.target_detected, self.err_x, self.err_y
 
+    def set_altitude(self, altitude):
+        """Current altitude above the marker (m), or None if unknown."""
+        self.altitude = altitude
+
     def _update_loop(self):
-        cap = cv2.VideoCapture(self.pipeline, cv2.CAP_GSTREAMER)
+        streaming = isinstance(self.pipeline, str) and "!" in self.pipeline
+        if streaming:
+            cap = cv2.VideoCapture(self.pipeline, cv2.CAP_GSTREAMER)
+        else:
+            cap = cv2.VideoCapture(self.pipeline)
         if not cap.isOpened():
+            print(f"[Vision] Cannot open {self.pipeline}")
             self.running = False
             return
 
         while self.running:
             ret, frame = cap.read()
-            if not ret: continue
-
-            # --- PRE-PROCESSING ---
-            gray = cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY)
-            # Slightly stronger blur to smooth out pixelated arcs
-            blur = cv2.GaussianBlur(gray, (9, 9), 2) 
-            edges = cv2.Canny(blur, 40, 100)
-            
-            # Dilate to connect broken arc segments
-            kernel = np.ones((3,3), np.uint8)
-            edges = cv2.dilate(edges, kernel, iterations=1)
-            
-            contours, _ = cv2.findContours(edges, cv2.RETR_EXTERNAL, cv2.CHAIN_APPROX_NONE)
-            
-            detected = False
-            curr_err_x = 0.0
-            curr_err_y = 0.0
-            
+            if not ret:
+                if not streaming:
+                    self.running = False # End of the file
+                continue
+            capture_ts = time.time()
+
             h, w = frame.shape[:2]
-            center_x, center_y = w // 2, h // 2
-
-            # Sort by Arc Length (prefer longer curves)
-            contours = sorted(contours, key=lambda x: cv2.arcLength(x, False), reverse=True)
-
-            for cnt in contours:
-                # 1. Filter tiny noise (too small to judge curvature)
-                if cv2.arcLength(cnt, False) < 50:
-                    continue
-
-                # 2. Fit the "Theoretical" Circle
-                # minEnclosingCircle works even on partial arcs
-                (mx, my), radius = cv2.minEnclosingCircle(cnt)
-                
-                # Sanity check: Radius shouldn't be impossibly huge (e.g., fitting a straight line)
-                if radius > w * 2 or radius < 10:
-                    continue
-
-                # 3. RADIAL CONSISTENCY CHECK (The Logic Fix)
-                # We calculate how well the points actually fit that circle.
-                
-                # Get all points in the contour
-                pts = cnt.squeeze() # Shape (N, 2)
-                if pts.ndim < 2: continue # Handle edge case of single point
-                
-                # Calculate distance of every point from the center (mx, my)
-                # formula: sqrt((x-mx)^2 + (y-my)^2)
-                distances = np.linalg.norm(pts - [mx, my], axis=1)
-                
-                # Calculate the deviation from the radius
-                # If it's a perfect arc, abs(distance - radius) should be 0 for all points.
-                errors = np.abs(distances - radius)
-                
-                # We use Mean Absolute Error (MAE) normalized by the radius
-                # e.g., 0.05 means the average point is within 5% of the radius ring
-                consistency_score = np.mean(errors) / radius
-
-                # Thresholds:
-                # < 0.10: Very Clean Circle/Arc
-                # 0.10 - 0.20: Distorted Circle (Angled view)
-                # > 0.25: Square or irregular blob (Corners pull the average up)
-                if consistency_score < 0.15:
-                    
-                    target_x = int(mx)
-                    target_y = int(my)
-
-                    # 4. NAVIGATION LOGIC
-                    # Even if target_x is -500 (off screen), this math works.
-                    # It creates a strong vector pulling the drone toward the virtual center.
-                    curr_err_x = (target_x - center_x) / (w / 2)
-                    curr_err_y = (target_y - center_y) / (h / 2)
-                    
-                    detected = True
-
-                    # --- VISUALIZATION ---
-                    # Draw the "Theoretical" Full Circle (Green)
-                    cv2.circle(frame, (target_x, target_y), int(radius), (0, 255, 0), 2)
-                    
-                    # Draw the center (which might be off-screen, but we try)
-                    if 0 <= target_x < w and 0 <= target_y < h:
-                         cv2.circle(frame, (target_x, target_y), 5, (0, 0, 255), -1)
-                         cv2.putText(frame, "CENTER", (target_x+10, target_y), 
-                                     cv2.FONT_HERSHEY_SIMPLEX, 0.5, (0, 0, 255), 1)
-                    
-                    # Draw the detected Arc segment (Red) to show what we actually see
-                    cv2.drawContours(frame, [cnt], -1, (0, 0, 255), 2)
-                    
-                    # Debug info
-                    cv2.putText(frame, f"Error: {consistency_score:.3f}", (10, 30), 
-                                cv2.FONT_HERSHEY_SIMPLEX, 0.7, (0, 255, 255), 2)
-                    
-                    break # Locked onto the best arc
+            arc = detect(frame, self.altitude, self.pyramid)
+            detected = arc is not None
+            curr_err_x, curr_err_y = arc_error(arc, w, h) if detected else (0.0, 0.0)
 
             with self._lock:
                 self.target_detected = detected
                 self.err_x = curr_err_x
                 self.err_y = curr_err_y
+                self.frames += 1
+                if not self.headless:
+                    # cap.read() returns a new array per frame: hand it over without copying
+                    self._snapshot = (self.frames, frame, arc)
+                frame_number = self.frames
+            if self.on_frame:
+                self.on_frame(frame_number, capture_ts, arc, w, h)
 
+        cap.release()
+
+    def _display_loop(self):
+        """Renders the latest snapshot at up to display_fps; frames in between are never drawn."""
+        period = 1.0 / self.display_fps
+        shown = 0
+        next_draw = time.monotonic()
+        while self.running:
+            now = time.monotonic()
+            if now < next_draw:
+                time.sleep(next_draw - now)
+            next_draw = max(next_draw + period, time.monotonic())
+
+            with self._lock:
+                snapshot = self._snapshot
+            if snapshot is None or snapshot[0] == shown:
+                # Nothing new: keep the window responsive
+                if cv2.waitKey(1) & 0xFF == ord('q'):
+                    self.running = False
+                continue
+            shown, frame, arc = snapshot # The capture thread is done with this frame: draw on it
+
+            if arc is not None:
+                draw_arc(frame, arc)
             cv2.imshow("Drone Vision", frame)
             if cv2.waitKey(1) & 0xFF == ord('q'):
                 self.running = False
 
-        cap.release()
-        cv2.destroyAllWindows()
\ No newline at end of file
+        cv2.destroyAllWindows()
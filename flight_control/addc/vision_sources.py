@@ -0,0 +1,291 @@
+import json
+import math
+import time
+import asyncio
+import numpy as np
+import zmq
+import zmq.asyncio
+
+from detection_protocol import DetectionFrame, DETECTION_DTYPE, decode
+
+# -----------------------------------------------------------------------------------------------
+# VISION SOURCES
+# -----------------------------------------------------------------------------------------------
+# Everything DroneController lands on comes through one interface, so detectors can be swapped
+# (and A/B benchmarked against the same controller) by configuration only:
+#
+#   await source.wait_for_detection(timeout) -> (found, err_x, err_y) of a new frame, or None
+#                                               if no frame arrived within `timeout` seconds
+#   source.last_frame      the DetectionFrame (detection_protocol.py) of that frame: ranked
+#                          detections, frame_id, capture_ts and stage stamps on time.time()
+#   source.last_received   time.time() when the frame reached the controller (0.0 = unknown)
+#   source.set_altitude(m) altitude hint from telemetry (used by the OpenCV detector)
+#   source.close()
+#
+# Sources (VISION_SOURCE in controller.py):
+#   "zmq"        the Hailo publisher (direct_sitl.py / first_flight.py) over ZMQ
+#   "opencv"     vision_module.py arc detector, in-process (Phase 1)
+#   "recording"  detections of a replay log (replay.py format) played back in real time
+#   "synthetic"  generated detections of a drifting target with noise, dropouts and latency
+# replay.py's ReplayVision implements the same interface on a virtual clock.
+# -----------------------------------------------------------------------------------------------
+SYNTHETIC_FPS = 30.0        # Frames per second
+SYNTHETIC_AMPLITUDE = 0.4   # Target drift amplitude (normalised image units)
+SYNTHETIC_PERIOD = 20.0     # Target drift period (s)
+SYNTHETIC_NOISE = 0.02      # Detection noise (std, normalised image units)
+SYNTHETIC_DROPOUT = 0.05    # Probability of a frame without detection
+SYNTHETIC_LATENCY = 0.05    # Capture -> publish delay stamped on the frames (s)
+SYNTHETIC_SIZE = 0.2        # Detection box size (normalised, 0.0 .. 1.0)
+
+
+def select_target(frame):
+    """
+    Picks the detection to land on: the publisher's locked track, else the best ranked (first).
+    While the locked track is missed (the publisher keeps the lock for a few frames) nothing is
+    found, so the target tracker predicts instead of jumping to another marker.
+    Returns (found, err_x, err_y).
+    """
+    if frame.count > 0:
+        detection = frame.detections[0]
+        if frame.locked_id:
+            locked = frame.detections[frame.detections["track_id"] == frame.locked_id]
+            if not len(locked):
+                return False, 0.0, 0.0
+            detection = locked[0]
+        err = detection["error"]
+        return True, float(err[0]), float(err[1])
+    return False, 0.0, 0.0
+
+
+def single_detection_frame(frame_id, capture_ts, err_x, err_y, size, confidence, stage_times=(0.0, 0.0, 0.0, 0.0)):
+    """DetectionFrame holding one detection centred on (err_x, err_y), `size` wide and high (0.0 .. 1.0)."""
+    detections = np.zeros(1, dtype=DETECTION_DTYPE)
+    cx, cy = (err_x + 1.0) / 2, (err_y + 1.0) / 2
+    detections[0]["bbox"] = (cx - size / 2, cy - size / 2, cx + size / 2, cy + size / 2)
+    detections[0]["error"] = (err_x, err_y)
+    detections[0]["confidence"] = confidence
+    return DetectionFrame(0, frame_id, capture_ts, detections, stage_times=stage_times)
+
+
+class VisionSource:
+    """Base: keeps last_frame / last_received; subclasses implement wait_for_detection."""
+
+    def __init__(self):
+        self.last_frame = None
+        self.last_received = 0.0
+
+    async def wait_for_detection(self, timeout):
+        raise NotImplementedError
+
+    def set_altitude(self, altitude):
+        pass
+
+    def close(self):
+        pass
+
+    def _deliver(self, frame, received):
+        self.last_frame = frame
+        self.last_received = received
+        return select_target(frame)
+
+
+class ZmqVisionSource(VisionSource):
+    def __init__(self, address="tcp://127.0.0.1:5555"):
+        super().__init__()
+        self.context = zmq.asyncio.Context()
+        self.socket = self.context.socket(zmq.SUB)
+        # Latency Fix: Keep only the newest message
+        self.socket.setsockopt(zmq.CONFLATE, 1)
+        self.socket.connect(address)
+        self.socket.setsockopt_string(zmq.SUBSCRIBE, "")
+
+    async def wait_for_detection(self, timeout):
+        """Sleeps on the socket until a message arrives (no polling period), or `timeout` seconds pass."""
+        try:
+            if not await self.socket.poll(timeout * 1000, zmq.POLLIN):
+                return None
+            msg = await self.socket.recv(flags=zmq.NOBLOCK, copy=False)
+            received = time.time()
+            return self._deliver(decode(msg.buffer), received)
+        except zmq.Again:
+            return None
+        except Exception as e:
+            print(f"ZMQ Error: {e}")
+        return False, 0.0, 0.0
+
+    def close(self):
+        self.socket.close(linger=0)
+
+
+class OpenCVVisionSource(VisionSource):
+    """
+    vision_module.VisionSystem in a thread of this process. Its results are handed to the event
+    loop as they come; like the ZMQ CONFLATE socket, only the newest undelivered frame is kept.
+    The detector starts on the first wait_for_detection().
+    """
+
+    def __init__(self, pipeline=None, headless=True, pyramid=None):
+        super().__init__()
+        import vision_module # Needs OpenCV: only imported when this source is used
+        options = {"headless": headless, "pipeline": pipeline, "on_frame": self._on_frame}
+        if pyramid is not None:
+            options["pyramid"] = pyramid
+        self.vision = vision_module.VisionSystem(**options)
+        self._arc_error = vision_module.arc_error
+        self._max_score = vision_module.MAX_CONSISTENCY
+        self._loop = None
+        self._event = None
+        self._pending = None
+
+    async def wait_for_detection(self, timeout):
+        if self._loop is None:
+            self._loop = asyncio.get_running_loop()
+            self._event = asyncio.Event()
+            self.vision.start()
+        try:
+            await asyncio.wait_for(self._event.wait(), timeout)
+        except asyncio.TimeoutError:
+            return None
+        self._event.clear()
+        frame, self._pending = self._pending, None
+        return self._deliver(frame, time.time())
+
+    def set_altitude(self, altitude):
+        self.vision.set_altitude(altitude)
+
+    def close(self):
+        if self.vision.running:
+            self.vision.stop()
+
+    def _on_frame(self, frame_number, capture_ts, arc, width, height):
+        """Capture thread: result -> DetectionFrame, handed to the event loop."""
+        detected = time.time()
+        if arc is None:
+            frame = DetectionFrame(0, frame_number, capture_ts, np.zeros(0, dtype=DETECTION_DTYPE),
+                                   stage_times=(capture_ts, detected, detected, detected))
+        else:
+            err_x, err_y = self._arc_error(arc, width, height)
+            size = 2 * arc[2] / width
+            confidence = max(0.0, 1.0 - arc[3] / self._max_score)
+            frame = single_detection_frame(frame_number, capture_ts, err_x, err_y, size, confidence,
+                                           (capture_ts, detected, detected, detected))
+        self._loop.call_soon_threadsafe(self._publish, frame)
+
+    def _publish(self, frame):
+        self._pending = frame
+        self._event.set()
+
+
+class RecordingVisionSource(VisionSource):
+    """
+    Detections of a replay log (see replay.py), played back on the wall clock at `speed` times
+    the recorded rate. Telemetry in the log is ignored: the controller flies the live drone.
+    After the last detection the source stays silent (the controller hovers), or restarts with loop.
+    """
+
+    def __init__(self, path, speed=1.0, loop=False):
+        super().__init__()
+        with open(path) as f:
+            events = [json.loads(line) for line in f if line.strip()]
+        detections = sorted((e for e in events if e["type"] == "detection"), key=lambda e: e["t"])
+        if not detections:
+            raise ValueError(f"No detections in {path}")
+        # Pre-serialize once: playback goes through the same decode() as the live subscriber
+        self._times = [event["t"] for event in detections]
+        self._capture_times = [event.get("capture_t", event["t"]) for event in detections]
+        self._messages = [json.dumps(event["frame"]).encode() for event in detections]
+        self.speed = speed
+        self.loop = loop
+        self._next = 0
+        self._start = None
+
+    async def wait_for_detection(self, timeout):
+        now = time.monotonic()
+        if self._start is None:
+            self._start = now - self._times[0] / self.speed
+        if self._next >= len(self._times):
+            if not self.loop:
+                await asyncio.sleep(timeout)
+                return None
+            self._next = 0
+            self._start = now - self._times[0] / self.speed
+
+        due = self._start + self._times[self._next] / self.speed
+        if due - now > timeout:
+            await asyncio.sleep(timeout)
+            return None
+        await asyncio.sleep(max(due - now, 0.0))
+
+        frame = decode(self._messages[self._next])
+        # Recorded capture -> receive delay, kept on the wall clock
+        received = time.time()
+        frame.capture_ts = received - (self._times[self._next] - self._capture_times[self._next]) / self.speed
+        frame.stage_times = (0.0, 0.0, 0.0, 0.0)
+        self._next += 1
+        return self._deliver(frame, received)
+
+
+class SyntheticVisionSource(VisionSource):
+    """
+    Open-loop detections of a target drifting on a Lissajous path, at `fps`, with Gaussian noise,
+    random dropouts and a fixed capture latency. The drift ignores the drone's motion: meant for
+    exercising the control loop and timing, not for judging landing accuracy.
+    """
+
+    def __init__(self, fps=SYNTHETIC_FPS, amplitude=SYNTHETIC_AMPLITUDE, period=SYNTHETIC_PERIOD,
+                 noise=SYNTHETIC_NOISE, dropout=SYNTHETIC_DROPOUT, latency=SYNTHETIC_LATENCY, seed=0):
+        super().__init__()
+        self.fps = fps
+        self.amplitude = amplitude
+        self.period = period
+        self.noise = noise
+        self.dropout = dropout
+        self.latency = latency
+        self.rng = np.random.default_rng(seed)
+        self._frame_id = 0
+        self._start = None
+
+    def target(self, t):
+        """True target error at `t` seconds from the start."""
+        w = 2 * math.pi / self.period
+        return self.amplitude * math.sin(w * t), self.amplitude * math.sin(2 * w * t + math.pi / 4) / 2
+
+    async def wait_for_detection(self, timeout):
+        now = time.monotonic()
+        if self._start is None:
+            self._start = now
+        due = self._start + (self._frame_id + 1) / self.fps
+        if due - now > timeout:
+            await asyncio.sleep(timeout)
+            return None
+        await asyncio.sleep(max(due - now, 0.0))
+
+        self._frame_id += 1
+        received = time.time()
+        capture_ts = received - self.latency
+        if self.rng.random() < self.dropout:
+            frame = DetectionFrame(0, self._frame_id, capture_ts, np.zeros(0, dtype=DETECTION_DTYPE))
+        else:
+            err_x, err_y = self.target(due - self._start - self.latency)
+            err_x += self.rng.normal(0.0, self.noise)
+            err_y += self.rng.normal(0.0, self.noise)
+            frame = single_detection_frame(self._frame_id, capture_ts, err_x, err_y, SYNTHETIC_SIZE, 1.0)
+        return self._deliver(frame, received)
+
+
+SOURCES = ("zmq", "opencv", "recording", "synthetic")
+
+
+def make_vision_source(name, zmq_address="tcp://127.0.0.1:5555", opencv_pipeline=None, recording=None):
+    """Builds the source called `name` (one of SOURCES)."""
+    if name == "zmq":
+        return ZmqVisionSource(zmq_address)
+    if name == "opencv":
+        return OpenCVVisionSource(opencv_pipeline)
+    if name == "recording":
+        if not recording:
+            raise ValueError("The 'recording' vision source needs a replay log path")
+        return RecordingVisionSource(recording)
+    if name == "synthetic":
+        return SyntheticVisionSource()
+    raise ValueError(f"Unknown vision source '{name}' (expected one of: {', '.join(SOURCES)})")
@@ -0,0 +1,199 @@
+import sys
+import time
+import argparse
+from pathlib import Path
+
+import cv2
+import numpy as np
+
+sys.path.append(str(Path(__file__).resolve().parents[1] / "addc"))
+import math
+from vision_module import preprocess, find_arc, detect, MARKER_RADIUS
+from camera_model import CAMERA_HFOV_DEG
+
+# -----------------------------------------------------------------------------------------------
+# Arc detector benchmark
+# -----------------------------------------------------------------------------------------------
+# Runs the previous per-contour scoring loop (arcLength sort + minEnclosingCircle + np.linalg.norm
+# per contour) and vision_module.find_arc on the same frames, and reports the detector frame
+# rate and whether both found the target at the same place. Frames come from a recorded clip
+# (--input, any file cv2.VideoCapture opens) or are synthetic: a landing ring, fully or partly in
+# view, on a cluttered ground (--clutter shapes per frame) with noise; the ring position is known,
+# so both are also checked against it, including which one is on the ring where they disagree.
+# Every frame is run --repeat times per detector, interleaved, and the fastest run is timed.
+#
+# The second part times whole frames (preprocessing included): full-resolution detect() against
+# the pyramid search, with the altitude taken from the ring size (synthetic) or --altitude.
+#
+#   python test/bench_vision_module.py
+#   python test/bench_vision_module.py --input sitl_clip.mp4
+# -----------------------------------------------------------------------------------------------
+AGREE_PX = 5.0 # Centres closer than this count as the same detection
+
+
+def legacy_find_arc(edges, width):
+    """The previous VisionSystem._update_loop scoring, returning (cx, cy, radius, score) or None."""
+    contours, _ = cv2.findContours(edges, cv2.RETR_EXTERNAL, cv2.CHAIN_APPROX_NONE)
+    contours = sorted(contours, key=lambda x: cv2.arcLength(x, False), reverse=True)
+    for cnt in contours:
+        if cv2.arcLength(cnt, False) < 50:
+            continue
+        (mx, my), radius = cv2.minEnclosingCircle(cnt)
+        if radius > width * 2 or radius < 10:
+            continue
+        pts = cnt.squeeze()
+        if pts.ndim < 2: continue
+        distances = np.linalg.norm(pts - [mx, my], axis=1)
+        consistency_score = np.mean(np.abs(distances - radius)) / radius
+        if consistency_score < 0.15:
+            return mx, my, radius, consistency_score
+    return None
+
+
+def synthetic_frames(count, width, height, clutter, seed):
+    """(frame, (cx, cy, radius)) pairs: a ring on a cluttered ground (tiles, strokes, blobs)."""
+    rng = np.random.default_rng(seed)
+    for i in range(count):
+        frame = np.full((height, width, 3), 90, np.uint8)
+        for _ in range(clutter):
+            x, y = int(rng.integers(0, width)), int(rng.integers(0, height))
+            size = int(rng.integers(6, 60))
+            shade = tuple(int(c) for c in rng.integers(0, 256, 3))
+            kind = rng.integers(3)
+            if kind == 0:
+                cv2.rectangle(frame, (x, y), (x + size, y + size), shade, 2)
+            elif kind == 1:
+                cv2.line(frame, (x, y), (x + int(rng.integers(-size, size)), y + size), shade, 2)
+            else:
+                cv2.ellipse(frame, (x, y), (size // 2, size // 5), float(rng.uniform(0, 180)), 0, 360, shade, -1)
+        radius = int(rng.integers(40, height // 2))
+        # Every third frame the ring is partly out of view
+        cx = int(rng.integers(0, width)) if i % 3 == 0 else int(rng.integers(radius, width - radius))
+        cy = int(rng.integers(radius, height - radius))
+        cv2.circle(frame, (cx, cy), radius, (255, 255, 255), 4)
+        noise = rng.normal(0, 6, frame.shape)
+        yield np.clip(frame + noise, 0, 255).astype(np.uint8), (cx, cy, radius)
+
+
+def timed(functions, items, repeat):
+    """
+    Runs every function in `functions` (name -> fn) on every item, interleaved so load changes hit
+    all alike. Returns (name -> [fn(*item), ...], name -> summed per-item fastest of `repeat` runs, s).
+    """
+    results = {name: [] for name in functions}
+    totals = dict.fromkeys(functions, 0.0)
+    for item in items:
+        for name, fn in functions.items():
+            best = np.inf
+            for _ in range(repeat):
+                start = time.perf_counter()
+                result = fn(*item)
+                best = min(best, time.perf_counter() - start)
+            results[name].append(result)
+            totals[name] += best
+    return results, totals
+
+
+def clip_frames(path, count):
+    cap = cv2.VideoCapture(path)
+    read = 0
+    while count <= 0 or read < count:
+        ret, frame = cap.read()
+        if not ret:
+            break
+        yield frame
+        read += 1
+    cap.release()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Previous per-contour arc scoring vs find_arc.")
+    parser.add_argument("--input", help="Recorded clip; synthetic frames if omitted")
+    parser.add_argument("--frames", type=int, default=300, help="Frames to use (0 = whole clip)")
+    parser.add_argument("--width", type=int, default=640)
+    parser.add_argument("--height", type=int, default=480)
+    parser.add_argument("--clutter", type=int, default=60, help="Synthetic clutter shapes per frame")
+    parser.add_argument("--altitude", type=float, help="Altitude of the clip frames for the pyramid (m)")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--repeat", type=int, default=5, help="Runs per frame, the fastest is timed")
+    args = parser.parse_args()
+
+    if args.input:
+        frames = list(clip_frames(args.input, args.frames))
+        truth = None
+    else:
+        frames, truth = zip(*synthetic_frames(args.frames, args.width, args.height, args.clutter, args.seed))
+    if not frames:
+        print(f"No frames read from {args.input}")
+        return 1
+    results, timings = timed({"preprocess": preprocess}, [(frame,) for frame in frames], args.repeat)
+    edge_maps, preprocess_s = results["preprocess"], timings["preprocess"]
+    results, timings = timed({"contours": lambda edges: cv2.findContours(edges, cv2.RETR_EXTERNAL, cv2.CHAIN_APPROX_NONE)[0]},
+                             [(edges,) for edges in edge_maps], args.repeat)
+    contours, contours_s = results["contours"], timings["contours"]
+
+    results, timings = timed({"legacy": legacy_find_arc, "find_arc": find_arc},
+                             [(edges, edges.shape[1]) for edges in edge_maps], args.repeat)
+
+    both = only_legacy = only_new = agree = 0
+    on_ring = {} # (legacy on the ring, find_arc on the ring) -> frames, of those detected by both
+    for i, (old, new) in enumerate(zip(results["legacy"], results["find_arc"])):
+        if old is not None and new is not None:
+            both += 1
+            agree += np.hypot(old[0] - new[0], old[1] - new[1]) <= AGREE_PX
+            if truth is not None:
+                key = tuple(bool(np.hypot(r[0] - truth[i][0], r[1] - truth[i][1]) <= AGREE_PX) for r in (old, new))
+                on_ring[key] = on_ring.get(key, 0) + 1
+        elif old is not None:
+            only_legacy += 1
+        elif new is not None:
+            only_new += 1
+
+    n = len(frames)
+    print(f"{n} frames ({frames[0].shape[1]}x{frames[0].shape[0]}), detector only (edges precomputed)")
+    print(f"  preprocess (blur + Canny + dilate): {preprocess_s * 1000.0 / n:.3f} ms/frame")
+    print(f"  findContours (in both detectors): {contours_s * 1000.0 / n:.3f} ms/frame, "
+          f"{sum(map(len, contours)) / n:.0f} contours/frame")
+    for name, seconds in timings.items():
+        line = (f"  {name:>8}: {seconds * 1000.0 / n:7.3f} ms/frame  {n / seconds:8.1f} FPS, "
+                f"scoring {(seconds - contours_s) * 1000.0 / n:.3f} ms/frame")
+        if truth is not None:
+            hits = [np.hypot(r[0] - t[0], r[1] - t[1]) for r, t in zip(results[name], truth) if r is not None]
+            on_target = sum(d <= AGREE_PX for d in hits)
+            line += f" | on the ring (within {AGREE_PX:.0f} px): {on_target}/{n}"
+        print(line)
+    print(f"  speed-up: {timings['legacy'] / timings['find_arc']:.1f}x, scoring alone "
+          f"{(timings['legacy'] - contours_s) / max(timings['find_arc'] - contours_s, 1e-9):.1f}x")
+    print(f"  detected by both: {both} (centres within {AGREE_PX:.0f} px: {agree}) | "
+          f"legacy only: {only_legacy} | find_arc only: {only_new}")
+    if truth is not None:
+        # Where they disagree, which one is on the ring
+        print(f"  of those detected by both, on the ring: both {on_ring.get((True, True), 0)} | "
+              f"find_arc only {on_ring.get((False, True), 0)} | legacy only {on_ring.get((True, False), 0)} | "
+              f"neither {on_ring.get((False, False), 0)}")
+
+    # Whole frames: full resolution vs pyramid
+    focal = (frames[0].shape[1] / 2) / math.tan(math.radians(CAMERA_HFOV_DEG) / 2)
+    if truth is None:
+        altitudes = [args.altitude] * n
+    else:
+        altitudes = [focal * MARKER_RADIUS / t[2] for t in truth]
+    print(f"whole frames (preprocess + detect), altitude {'from the ring size' if truth else args.altitude}")
+    results, timings = timed({"full": lambda frame, altitude: detect(frame, altitude, False),
+                              "pyramid": lambda frame, altitude: detect(frame, altitude, True)},
+                             list(zip(frames, altitudes)), args.repeat)
+    for name in ("full", "pyramid"):
+        line = f"  {name:>8}: {timings[name] * 1000.0 / n:7.3f} ms/frame  {n / timings[name]:8.1f} FPS"
+        if truth is not None:
+            hits = [np.hypot(r[0] - t[0], r[1] - t[1]) for r, t in zip(results[name], truth) if r is not None]
+            line += f" | on the ring (within {AGREE_PX:.0f} px): {sum(d <= AGREE_PX for d in hits)}/{n}"
+        print(line)
+    same = sum(1 for a, b in zip(results["full"], results["pyramid"])
+               if (a is None and b is None) or (a is not None and b is not None
+                                                and np.hypot(a[0] - b[0], a[1] - b[1]) <= AGREE_PX))
+    print(f"  speed-up: {timings['full'] / timings['pyramid']:.1f}x | same result as full resolution: {same}/{n}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
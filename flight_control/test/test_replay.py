@@ -0,0 +1,31 @@
+import sys
+from pathlib import Path
+
+import pytest
+
+sys.path.append(str(Path(__file__).resolve().parents[1] / "addc"))
+pytest.importorskip("mavsdk") # controller.py flies through mavsdk types
+import controller
+import replay
+
+# Synthetic hover log at 3 m, pad ~0.9 m off-centre, 10 Hz detections with noise and dropouts
+HOVER_LOG = Path(__file__).resolve().parent / "logs" / "hover_3m.jsonl"
+
+
+def test_replay_lands_on_the_pad():
+    result = replay.replay_landing(HOVER_LOG)
+    assert result["landed"]
+    assert result["touchdown_offset_m"]["norm"] < 0.1
+    # Aligning from 0.9 m then descending 3 m takes well over the pure descent time
+    assert 8.0 < result["landing_time_s"] < 25.0
+
+
+def test_blended_descent_lands_faster_in_replay(monkeypatch):
+    """Replay is closed loop: the descent profile changes the landing, not just the commands."""
+    times = {}
+    for blending in (True, False):
+        monkeypatch.setattr(controller, "DESCENT_BLENDING", blending)
+        result = replay.replay_landing(HOVER_LOG)
+        assert result["landed"]
+        times[blending] = result["landing_time_s"]
+    assert times[True] < times[False]
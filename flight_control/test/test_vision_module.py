@@ -0,0 +1,60 @@
+import sys
+import math
+from pathlib import Path
+
+import numpy as np
+import pytest
+
+sys.path.append(str(Path(__file__).resolve().parents[1] / "addc"))
+cv2 = pytest.importorskip("cv2")
+import pad_video
+import vision_module
+from bench_vision_module import legacy_find_arc
+
+# Rendered descent from 8 m to 0.2 m over the pad: textured ground, tilt, lighting, blur and noise
+FRAMES = 150
+SEED = 1
+
+
+@pytest.fixture(scope="module")
+def descent():
+    return [(frame, truth) for frame, truth in pad_video.render_frames(FRAMES, seed=SEED) if truth["visible"]]
+
+
+def centre_errors(descent, detector):
+    """Distance (px) from every frame's detection to the true marker centre, inf when nothing is found."""
+    errors = []
+    for frame, truth in descent:
+        arc = detector(frame, truth)
+        errors.append(math.hypot(arc[0] - truth["cx"], arc[1] - truth["cy"]) if arc is not None else np.inf)
+    return np.array(errors)
+
+
+def test_pyramid_is_as_accurate_as_full_resolution(descent):
+    full = centre_errors(descent, lambda frame, truth: vision_module.detect(frame, truth["altitude"], pyramid=False))
+    pyramid = centre_errors(descent, lambda frame, truth: vision_module.detect(frame, truth["altitude"], pyramid=True))
+    assert np.isfinite(pyramid).sum() >= np.isfinite(full).sum()
+    assert np.median(pyramid) <= np.median(full)
+    assert (pyramid < 5).sum() >= (full < 5).sum()
+
+
+def test_pyramid_keeps_lock_with_a_wrong_altitude(descent):
+    """The altitude only steers the search: far off, the whole-frame fallback still finds the marker."""
+    full = centre_errors(descent, lambda frame, truth: vision_module.detect(frame, pyramid=False))
+    for factor in (0.5, 2.0):
+        wrong = centre_errors(descent, lambda frame, truth: vision_module.detect(frame, truth["altitude"] * factor, pyramid=True))
+        assert np.isfinite(wrong).sum() >= np.isfinite(full).sum()
+        assert np.median(wrong) <= np.median(full)
+
+
+def test_find_arc_is_as_accurate_as_the_previous_scoring(descent):
+    """Least-squares fit vs the per-contour minEnclosingCircle loop, on the same edge maps."""
+    legacy = centre_errors(descent, lambda frame, truth: legacy_find_arc(vision_module.preprocess(frame), frame.shape[1]))
+    new = centre_errors(descent, lambda frame, truth: vision_module.find_arc(vision_module.preprocess(frame), frame.shape[1]))
+    assert np.isfinite(new).sum() >= np.isfinite(legacy).sum()
+    assert (new < 5).sum() >= (legacy < 5).sum()
+    assert np.median(new) <= np.median(legacy)
+    # Where both find it (the previous scoring mostly takes the ring, find_arc the ring or the pad)
+    both = np.isfinite(new) & np.isfinite(legacy)
+    assert np.median(new[both]) <= np.median(legacy[both])
+    assert np.percentile(new[both], 90) <= np.percentile(legacy[both], 90)
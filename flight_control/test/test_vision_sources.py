@@ -0,0 +1,76 @@
+import sys
+from pathlib import Path
+
+import numpy as np
+import pytest
+
+sys.path.append(str(Path(__file__).resolve().parents[1] / "addc"))
+sys.path.append(str(Path(__file__).resolve().parents[2] / "hailo-rpi5-examples" / "checking"))
+from detection_protocol import DetectionFrame, DETECTION_DTYPE
+from detection_tracker import DetectionTracker, MAX_MISSES, MIN_HITS_TO_LOCK, HAILO_ID_COUNT
+from vision_sources import select_target
+
+# Two markers in view: A near the centre (takes the lock), B off to the side
+MARKER_A = (0.45, 0.45, 0.55, 0.55)
+MARKER_B = (0.70, 0.20, 0.80, 0.30)
+
+
+def publish(tracker, boxes):
+    """What the vision publisher sends for one frame: ranked detections + locked id."""
+    ranked, locked_id = tracker.update([(box, 0.9, 0, None) for box in boxes])
+    detections = np.zeros(len(ranked), dtype=DETECTION_DTYPE)
+    for record, (bbox, confidence, label_id, track_id) in zip(detections, ranked):
+        record["bbox"] = bbox
+        record["error"] = ((bbox[0] + bbox[2]) - 1.0, (bbox[1] + bbox[3]) - 1.0)
+        record["confidence"] = confidence
+        record["track_id"] = track_id
+    return DetectionFrame(3, 0, 0.0, detections, locked_id=locked_id)
+
+
+def error_of(box):
+    return pytest.approx(((box[0] + box[2]) - 1.0, (box[1] + box[3]) - 1.0), abs=1e-6)
+
+
+@pytest.mark.parametrize("dropout", range(1, MAX_MISSES + 1))
+def test_lock_does_not_flip_while_locked_marker_is_missed(dropout):
+    tracker = DetectionTracker()
+    for _ in range(5):
+        found, err_x, err_y = select_target(publish(tracker, [MARKER_A, MARKER_B]))
+    assert found and (err_x, err_y) == error_of(MARKER_A)
+
+    # A is missed for `dropout` frames: nothing is selected, B never is
+    for _ in range(dropout):
+        assert select_target(publish(tracker, [MARKER_B])) == (False, 0.0, 0.0)
+
+    found, err_x, err_y = select_target(publish(tracker, [MARKER_A, MARKER_B]))
+    assert found and (err_x, err_y) == error_of(MARKER_A)
+
+
+def test_lock_moves_once_the_locked_track_is_gone():
+    tracker = DetectionTracker()
+    for _ in range(5):
+        publish(tracker, [MARKER_A, MARKER_B])
+    for _ in range(MAX_MISSES + 1):
+        frame = publish(tracker, [MARKER_B])
+    found, err_x, err_y = select_target(frame)
+    assert found and (err_x, err_y) == error_of(MARKER_B)
+
+
+def test_detections_without_a_hailo_id_keep_their_track():
+    """hailotracker ids on some detections only: the others are still tracked and can take the lock."""
+    tracker = DetectionTracker()
+    ids = set()
+    for _ in range(MIN_HITS_TO_LOCK):
+        # B carries hailotracker id HAILO_ID_COUNT (maps to track id 1), A has none
+        ranked, locked_id = tracker.update([(MARKER_B, 0.9, 0, HAILO_ID_COUNT), (MARKER_A, 0.9, 0, None)])
+        ids.add(tuple(track_id for _, _, _, track_id in ranked))
+    assert len(ids) == 1 # Same ids every frame
+    track_b, track_a = sorted(ids.pop())
+    assert track_b == 1 and track_a > HAILO_ID_COUNT # Disjoint id ranges
+    assert locked_id == track_a # A, the centred marker, reached MIN_HITS_TO_LOCK
+
+
+def test_untracked_frames_use_the_best_ranked():
+    detections = np.zeros(2, dtype=DETECTION_DTYPE)
+    detections["error"] = ((0.1, 0.2), (0.5, 0.5))
+    assert select_target(DetectionFrame(2, 0, 0.0, detections)) == (True, pytest.approx(0.1), pytest.approx(0.2))
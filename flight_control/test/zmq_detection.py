@@ -1,5 +1,11 @@
+import sys
 import zmq
 import json
+from pathlib import Path
+
+# Decoder is shared with controller.py
+sys.path.append(str(Path(__file__).resolve().parents[1] / "addc"))
+from detection_protocol import decode, to_dict
 
 def receive_data():
     context = zmq.Context()
@@ -16,8 +22,9 @@ def receive_data():
 
     while True:
         try:
-            # Receive JSON data directly
-            data = socket.recv_json()
+            # Binary or JSON-debug messages decode to the same structure
+            msg = socket.recv()
+            data = to_dict(decode(msg))
             
             # Print formatted JSON
             print(json.dumps(data, indent=2))
@@ -30,4 +37,4 @@ def receive_data():
             print(f"Error: {e}")
 
 if __name__ == "__main__":
-    receive_data()
\ No newline at end of file
+    receive_data()
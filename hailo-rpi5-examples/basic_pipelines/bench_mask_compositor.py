@@ -0,0 +1,82 @@
+import sys
+import time
+import argparse
+import numpy as np
+import cv2
+from mask_compositor import MaskCompositor, COLORS
+
+# -----------------------------------------------------------------------------------------------
+# Mask compositing benchmark
+# -----------------------------------------------------------------------------------------------
+# Frame time of the per-detection overlay (np.zeros_like + cv2.addWeighted per person, as
+# instance_segmentation.py did) against MaskCompositor, for 0..N synthetic detections on the
+# frame size instance_segmentation.py draws on (a quarter of the 1280x720 input by default).
+#
+#   python basic_pipelines/bench_mask_compositor.py --max-detections 10 --width 320 --height 180
+# -----------------------------------------------------------------------------------------------
+MASK_SIZE = 160 # yolov5*_seg prototype mask resolution
+
+
+def per_detection_overlay(frame, masks, colors):
+    """The previous instance_segmentation.py drawing loop."""
+    height, width = frame.shape[:2]
+    for color_index, (xmin, ymin, bbox_width, bbox_height), data in masks:
+        roi_width = int(bbox_width * width)
+        roi_height = int(bbox_height * height)
+        resized_mask_data = cv2.resize(data, (roi_width, roi_height), interpolation=cv2.INTER_LINEAR)
+        x_min, y_min = int(xmin * width), int(ymin * height)
+        x_max, y_max = x_min + roi_width, y_min + roi_height
+        y_min, x_min = max(y_min, 0), max(x_min, 0)
+        y_max, x_max = min(y_max, height), min(x_max, width)
+        if x_max > x_min and y_max > y_min:
+            mask_overlay = np.zeros_like(frame)
+            color = colors[color_index % len(colors)]
+            mask_overlay[y_min:y_max, x_min:x_max] = (resized_mask_data[:y_max-y_min, :x_max-x_min, np.newaxis] > 0.5) * color
+            frame = cv2.addWeighted(frame, 1, mask_overlay, 0.5, 0)
+    return frame
+
+
+def synthetic_masks(rng, count):
+    masks = []
+    for i in range(count):
+        bbox_width, bbox_height = rng.uniform(0.1, 0.3), rng.uniform(0.2, 0.5)
+        xmin, ymin = rng.uniform(0, 1 - bbox_width), rng.uniform(0, 1 - bbox_height)
+        yy, xx = np.mgrid[-1:1:MASK_SIZE * 1j, -1:1:MASK_SIZE * 1j]
+        data = (1.0 - np.hypot(xx / 0.8, yy)).astype(np.float32) # Ellipse-like person blob
+        masks.append((i, (xmin, ymin, bbox_width, bbox_height), data))
+    return masks
+
+
+def time_ms(fn, repeats):
+    fn() # Warm-up (buffer allocation)
+    start = time.perf_counter()
+    for _ in range(repeats):
+        fn()
+    return (time.perf_counter() - start) * 1000.0 / repeats
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Per-detection mask overlay vs MaskCompositor.")
+    parser.add_argument("--max-detections", type=int, default=10)
+    parser.add_argument("--width", type=int, default=320, help="Frame width drawn on")
+    parser.add_argument("--height", type=int, default=180, help="Frame height drawn on")
+    parser.add_argument("--repeats", type=int, default=200)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(args.seed)
+    frame = rng.integers(0, 256, (args.height, args.width, 3), dtype=np.uint8)
+    compositor = MaskCompositor(COLORS)
+
+    print(f"{args.width}x{args.height} frame, {args.repeats} repeats")
+    print(f"{'detections':>10} | {'per-detection':>13} | {'compositor':>10} | speed-up")
+    for count in range(args.max_detections + 1):
+        masks = synthetic_masks(rng, count)
+        old = time_ms(lambda: per_detection_overlay(frame.copy(), masks, COLORS), args.repeats)
+        new = time_ms(lambda: compositor.draw(frame.copy(), masks), args.repeats)
+        print(f"{count:>10} | {old:10.3f} ms | {new:7.3f} ms | {old / new:5.1f}x")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,219 @@
+import os
+import sys
+import json
+import time
+import atexit
+import functools
+import threading
+import tracemalloc
+from collections import deque
+
+# -----------------------------------------------------------------------------------------------
+# Callback profiler
+# -----------------------------------------------------------------------------------------------
+# app_callback runs in the GStreamer streaming thread: every millisecond it takes is a
+# millisecond the pipeline waits. Decorate the callback to measure it:
+#
+#   @profile_callback()
+#   def app_callback(pad, info, user_data):
+#       ...
+#
+# The decorator does nothing unless CALLBACK_PROFILE=1 is set in the environment, so it can stay
+# in place. When enabled it records, per call:
+#   - wall time, and thread CPU time (time.thread_time). Python code only runs while holding the
+#     GIL, so CPU time approximates how long the callback holds it; wall - CPU is time spent
+#     blocked (waiting for the GIL, or on I/O such as print to a slow terminal)
+#   - calls over the frame budget (CALLBACK_PROFILE_BUDGET_MS, default one frame at 30 FPS)
+#   - with CALLBACK_PROFILE_ALLOC=1: bytes allocated (tracemalloc peak) and retained per call
+#   - with CALLBACK_PROFILE_STACKS=<file>: time per call stack, written at exit in the folded
+#     format read by flamegraph.pl and speedscope. Tracing every Python call slows the
+#     callback several times over: read the stacks for proportions, take timings from a run
+#     without it
+# A summary is printed every CALLBACK_PROFILE_REPORT calls and at exit, and written to
+# CALLBACK_PROFILE_JSON if set.
+#
+#   CALLBACK_PROFILE=1 CALLBACK_PROFILE_STACKS=callback.folded python basic_pipelines/detection.py
+#   flamegraph.pl callback.folded > callback.svg
+# -----------------------------------------------------------------------------------------------
+DEFAULT_BUDGET_MS = 1000.0 / 30
+DEFAULT_REPORT_EVERY = 300 # Calls between printed summaries
+RECENT_CALLS = 1000        # Calls kept for the percentiles
+
+
+def _env_flag(name):
+    return os.environ.get(name, "0").lower() not in ("", "0", "false", "no")
+
+
+class CallbackProfile:
+    def __init__(self, name, budget_ms, allocations=False, stacks_path=None, json_path=None,
+                 report_every=DEFAULT_REPORT_EVERY):
+        self.name = name
+        self.budget_ms = budget_ms
+        self.allocations = allocations
+        self.stacks_path = stacks_path
+        self.json_path = json_path
+        self.report_every = report_every
+        self.calls = 0
+        self.over_budget = 0
+        self.total_wall_ms = 0.0
+        self.total_cpu_ms = 0.0
+        self.max_wall_ms = 0.0
+        self.wall_ms = deque(maxlen=RECENT_CALLS)
+        self.alloc_bytes = deque(maxlen=RECENT_CALLS)
+        self.retained_bytes = 0
+        self.stacks = {} # "frame;frame;frame" -> self time (s)
+        self._lock = threading.Lock()
+        if allocations and not tracemalloc.is_tracing():
+            tracemalloc.start()
+
+    def wrap(self, callback):
+        @functools.wraps(callback)
+        def profiled(*args, **kwargs):
+            if self.allocations:
+                before = tracemalloc.get_traced_memory()[0]
+                tracemalloc.reset_peak()
+            tracer = _StackTracer(self.stacks) if self.stacks_path else None
+            if tracer:
+                sys.setprofile(tracer)
+            cpu_start = time.thread_time()
+            start = time.perf_counter()
+            try:
+                return callback(*args, **kwargs)
+            finally:
+                wall = (time.perf_counter() - start) * 1000.0
+                cpu = (time.thread_time() - cpu_start) * 1000.0
+                if tracer:
+                    sys.setprofile(None)
+                    tracer.finish()
+                allocated = retained = 0
+                if self.allocations:
+                    current, peak = tracemalloc.get_traced_memory()
+                    allocated, retained = max(peak - before, 0), current - before
+                self._record(wall, cpu, allocated, retained)
+
+        profiled.profile = self
+        return profiled
+
+    def _record(self, wall, cpu, allocated, retained):
+        with self._lock:
+            self.calls += 1
+            self.total_wall_ms += wall
+            self.total_cpu_ms += cpu
+            self.max_wall_ms = max(self.max_wall_ms, wall)
+            self.wall_ms.append(wall)
+            if self.allocations:
+                self.alloc_bytes.append(allocated)
+                self.retained_bytes += retained
+            if wall > self.budget_ms:
+                self.over_budget += 1
+            report = self.report_every and self.calls % self.report_every == 0
+        if report:
+            self.report()
+
+    def summary(self):
+        with self._lock:
+            wall = sorted(self.wall_ms)
+            alloc = list(self.alloc_bytes)
+            summary = {
+                "callback": self.name,
+                "calls": self.calls,
+                "budget_ms": self.budget_ms,
+                "over_budget": self.over_budget,
+                "wall_ms": {
+                    "mean": self.total_wall_ms / self.calls if self.calls else 0.0,
+                    "p50": wall[len(wall) // 2] if wall else 0.0,
+                    "p95": wall[min(int(len(wall) * 0.95), len(wall) - 1)] if wall else 0.0,
+                    "max": self.max_wall_ms,
+                },
+                "cpu_ms_mean": self.total_cpu_ms / self.calls if self.calls else 0.0,
+                "blocked_ms_mean": (self.total_wall_ms - self.total_cpu_ms) / self.calls if self.calls else 0.0,
+            }
+            if self.allocations:
+                summary["alloc_bytes_mean"] = sum(alloc) / len(alloc) if alloc else 0.0
+                summary["retained_bytes_total"] = self.retained_bytes
+        return summary
+
+    def report(self):
+        s = self.summary()
+        line = (f"[Profile] {s['callback']}: {s['calls']} calls | wall mean {s['wall_ms']['mean']:.2f} ms "
+                f"p95 {s['wall_ms']['p95']:.2f} ms max {s['wall_ms']['max']:.2f} ms | "
+                f"CPU {s['cpu_ms_mean']:.2f} ms blocked {s['blocked_ms_mean']:.2f} ms | "
+                f"over {s['budget_ms']:.1f} ms budget: {s['over_budget']}")
+        if self.allocations:
+            line += f" | alloc {s['alloc_bytes_mean'] / 1024:.1f} KiB/call"
+        print(line, flush=True)
+
+    def finish(self):
+        """Final summary and output files (registered with atexit)."""
+        if self.calls == 0:
+            return
+        self.report()
+        if self.json_path:
+            with open(self.json_path, "w") as f:
+                json.dump(self.summary(), f, indent=2)
+        if self.stacks_path:
+            with open(self.stacks_path, "w") as f:
+                for stack, seconds in sorted(self.stacks.items()):
+                    f.write(f"{stack} {int(seconds * 1e6)}\n") # Microseconds
+            print(f"[Profile] Folded stacks written to {self.stacks_path}")
+
+
+class _StackTracer:
+    """sys.setprofile hook that adds each frame's self time to folded[stack]."""
+
+    def __init__(self, folded):
+        self.folded = folded
+        self.stack = [] # [name, start, child time]
+        self.path = []
+
+    def __call__(self, frame, event, arg):
+        now = time.perf_counter()
+        if event in ("call", "c_call"):
+            if event == "call":
+                code = frame.f_code
+                name = f"{os.path.basename(code.co_filename)}:{code.co_name}"
+            else:
+                name = getattr(arg, "__qualname__", getattr(arg, "__name__", repr(arg)))
+            self.path.append(name)
+            self.stack.append([";".join(self.path), now, 0.0])
+        elif event in ("return", "c_return", "c_exception") and self.stack:
+            self._pop(now)
+
+    def _pop(self, now):
+        key, start, children = self.stack.pop()
+        self.path.pop()
+        elapsed = now - start
+        self.folded[key] = self.folded.get(key, 0.0) + elapsed - children
+        if self.stack:
+            self.stack[-1][2] += elapsed
+
+    def finish(self):
+        now = time.perf_counter()
+        while self.stack:
+            self._pop(now)
+
+
+def profile_callback(budget_ms=None, allocations=None, stacks_path=None, json_path=None, enabled=None):
+    """
+    Decorator for app_callback. Arguments left as None are read from the environment
+    (CALLBACK_PROFILE, CALLBACK_PROFILE_BUDGET_MS, CALLBACK_PROFILE_ALLOC, CALLBACK_PROFILE_STACKS,
+    CALLBACK_PROFILE_JSON); disabled, the callback is returned unchanged.
+    """
+    if enabled is None:
+        enabled = _env_flag("CALLBACK_PROFILE")
+
+    def decorate(callback):
+        if not enabled:
+            return callback
+        profile = CallbackProfile(
+            callback.__name__,
+            budget_ms if budget_ms is not None else float(os.environ.get("CALLBACK_PROFILE_BUDGET_MS", DEFAULT_BUDGET_MS)),
+            allocations if allocations is not None else _env_flag("CALLBACK_PROFILE_ALLOC"),
+            stacks_path if stacks_path is not None else os.environ.get("CALLBACK_PROFILE_STACKS"),
+            json_path if json_path is not None else os.environ.get("CALLBACK_PROFILE_JSON"),
+            int(os.environ.get("CALLBACK_PROFILE_REPORT", DEFAULT_REPORT_EVERY)),
+        )
+        atexit.register(profile.finish)
+        return profile.wrap(callback)
+
+    return decorate
@@ -3,33 +3,31 @@ from pathlib import Path
 import gi
 gi.require_version('Gst', '1.0')
 from gi.repository import Gst
-import numpy as np
 import hailo
 from hailo_apps.hailo_app_python.core.gstreamer.gstreamer_app import app_callback_class
 from hailo_apps.hailo_app_python.apps.depth.depth_pipeline import GStreamerDepthApp
+from callback_profiler import profile_callback
+from depth_stats import DepthStats
+
+# Frames between console reports: printing from the streaming thread on every frame costs FPS
+PRINT_EVERY = 30
 
 # User-defined class to be used in the callback function: Inheritance from the app_callback_class
 class user_app_callback_class(app_callback_class):
 
     def __init__(self):
         super().__init__()
+        self.depth_stats = DepthStats()  # Reuses its buffers from frame to frame
 
     def calculate_average_depth(self, depth_mat):
-        depth_values = np.array(depth_mat).flatten()  # Flatten the array and filter out outlier pixels
-        try:
-            m_depth_values = depth_values[depth_values <= np.percentile(depth_values, 95)]  # drop 5% of highest values (outliers)          
-        except Exception as e:
-            m_depth_values = np.array([])
-        if len(m_depth_values) > 0:
-            average_depth = np.mean(m_depth_values)  # Calculate the average depth of the pixels
-        else:
-            average_depth = 0  # Default value if no valid pixels are found
-        return average_depth
+        return self.depth_stats.mean(depth_mat)  # Mean without the 5% highest values (outliers)
 
 # User-defined callback function: This is the callback function that will be called when data is available from the pipeline
+@profile_callback()
 def app_callback(pad, info, user_data):
     user_data.increment()  # Using the user_data to count the number of frames
-    string_to_print = f"Frame count: {user_data.get_count()}\n"
+    if user_data.get_count() % PRINT_EVERY != 0:  # Only the printed frames need the average depth
+        return Gst.PadProbeReturn.OK
     buffer = info.get_buffer()  # Get the GstBuffer from the probe info
     if buffer is None:  # Check if the buffer is valid
         return Gst.PadProbeReturn.OK
@@ -40,8 +38,7 @@ def app_callback(pad, info, user_data):
         detection_average_depth = user_data.calculate_average_depth(depth_mat[0].get_data())
     else:
         detection_average_depth = 0
-    string_to_print += (f"average depth: {detection_average_depth:.2f}\n")
-    print(string_to_print)
+    print(f"Frame count: {user_data.get_count()} | average depth: {detection_average_depth:.2f}\n")
 
     return Gst.PadProbeReturn.OK
 
@@ -0,0 +1,107 @@
+import numpy as np
+
+# -----------------------------------------------------------------------------------------------
+# Depth statistics
+# -----------------------------------------------------------------------------------------------
+# Robust depth per detection: the values above the PERCENTILE-th percentile are dropped as
+# outliers and the mean / median of the rest reported (same mean as the previous
+# depth_values[depth_values <= np.percentile(depth_values, 95)].mean()).
+#
+# All depth masks of a frame go in one call. Masks of the same size (the usual case: each
+# detection crop is resized to the depth network input) are stacked into a reused 2-D buffer
+# and handled with in-place np.partition selections along the rows (O(pixels), no sort and
+# no per-detection temporary arrays). Returns per detection: mean, median, min, kept pixel
+# count, and a depth histogram over HISTOGRAM_RANGE.
+# -----------------------------------------------------------------------------------------------
+PERCENTILE = 95.0
+HISTOGRAM_BINS = 32
+HISTOGRAM_RANGE = (0.0, 10.0) # scdepthv3 relative depth; values outside go to the first / last bin
+
+
+class DepthStats:
+    def __init__(self, percentile=PERCENTILE, bins=HISTOGRAM_BINS, hist_range=HISTOGRAM_RANGE):
+        self.percentile = percentile
+        self.bins = bins
+        self.hist_range = hist_range
+        self._buffers = {} # mask size -> reused (values, scratch, bin index) buffers
+
+    def compute(self, depth_masks):
+        """
+        depth_masks: list of depth masks (lists or arrays, any shape) - one per detection.
+        Returns a dict of arrays with one entry per mask: "mean", "median", "min", "count"
+        (pixels kept) and "histogram" (masks x bins). Empty masks give 0 and an empty histogram.
+        """
+        n = len(depth_masks)
+        result = {
+            "mean": np.zeros(n),
+            "median": np.zeros(n),
+            "min": np.zeros(n),
+            "count": np.zeros(n, dtype=np.int64),
+            "histogram": np.zeros((n, self.bins), dtype=np.int64),
+        }
+        groups = {}
+        for i, mask in enumerate(depth_masks):
+            size = np.size(mask)
+            if size:
+                groups.setdefault(size, []).append(i)
+        for size, rows in groups.items():
+            stack, scratch, bins = self._stack(size, len(rows))
+            for row, i in enumerate(rows):
+                stack[row] = np.ravel(depth_masks[i])
+            self._histogram(stack, scratch, bins, rows, result)
+            self._robust(stack, rows, result)
+        return result
+
+    def mean(self, depth_mask):
+        """Robust mean of a single mask (0 if empty)."""
+        return float(self.compute([depth_mask])["mean"][0])
+
+    def _stack(self, size, rows):
+        """(values, float scratch, bin indices) buffers for `rows` masks of `size` values, reused."""
+        buffers = self._buffers.get(size)
+        if buffers is None or buffers[0].shape[0] < rows:
+            index_type = np.uint8 if self.bins <= 256 else np.uint16
+            buffers = (np.empty((rows, size), dtype=np.float32), np.empty((rows, size), dtype=np.float32),
+                       np.empty((rows, size), dtype=index_type))
+            self._buffers[size] = buffers
+        return tuple(b[:rows] for b in buffers)
+
+    def _histogram(self, stack, scratch, bins, rows, result):
+        low, high = self.hist_range
+        np.subtract(stack, low, out=scratch)
+        np.multiply(scratch, self.bins / (high - low), out=scratch)
+        np.clip(scratch, 0, self.bins - 1, out=scratch)
+        bins[...] = scratch # Truncates to the bin index
+        for row, i in enumerate(rows):
+            result["histogram"][i] = np.bincount(bins[row], minlength=self.bins)
+
+    def _robust(self, stack, rows, result):
+        n = stack.shape[1]
+        # Percentile threshold as np.percentile (linear): between order statistics lo and lo + 1
+        position = self.percentile / 100.0 * (n - 1)
+        lo = int(np.floor(position))
+        kept = lo + 1 # Values at or below order statistic lo (more if they tie with the threshold)
+        stack.partition(lo, axis=1) # Single selection: the lowest `kept` values end up in front
+        below, above = stack[:, :kept], stack[:, kept:]
+        threshold = stack[:, lo]
+        if above.shape[1]:
+            threshold = threshold + (position - lo) * (above.min(axis=1) - threshold)
+            ties = (above <= threshold[:, None]).sum(axis=1) # Only values equal to the threshold
+        else:
+            ties = np.zeros(len(rows), dtype=np.int64)
+
+        total = below.sum(axis=1, dtype=np.float64) + ties * threshold
+        result["count"][rows] = kept + ties
+        result["mean"][rows] = total / (kept + ties)
+        result["min"][rows] = below.min(axis=1)
+
+        # Median of the kept values: the front part followed by the ties, which all equal the
+        # threshold. Its middle order statistics differ per row with the tie count; a second
+        # selection inside the front part places all of them at once.
+        count = kept + ties
+        order = np.stack(((count - 1) // 2, count // 2)) # (2, rows)
+        inside = np.minimum(order, kept - 1)
+        below.partition(np.unique(inside), axis=1)
+        middle = np.take_along_axis(below, inside.T, axis=1).T
+        middle = np.where(order < kept, middle, threshold)
+        result["median"][rows] = middle.mean(axis=0)
@@ -8,14 +8,18 @@ import cv2
 import hailo
 
 from hailo_apps.hailo_app_python.core.common.buffer_utils import get_caps_from_pad, get_numpy_from_buffer
-from hailo_apps.hailo_app_python.core.gstreamer.gstreamer_app import app_callback_class
 from hailo_apps.hailo_app_python.apps.detection.detection_pipeline import GStreamerDetectionApp
+from callback_profiler import profile_callback
+from frame_workers import worker_app_callback_class
+
+# Frames between console reports
+PRINT_EVERY = 30
 
 # -----------------------------------------------------------------------------------------------
 # User-defined class to be used in the callback function
 # -----------------------------------------------------------------------------------------------
-# Inheritance from the app_callback_class
-class user_app_callback_class(app_callback_class):
+# Inheritance from the worker_app_callback_class (an app_callback_class with a worker pool)
+class user_app_callback_class(worker_app_callback_class):
     def __init__(self):
         super().__init__()
         self.new_variable = 42  # New variable example
@@ -23,11 +27,33 @@ class user_app_callback_class(app_callback_class):
     def new_function(self):  # New function example
         return "The meaning of life is: "
 
+    # Runs on a worker thread: drawing and printing no longer hold up the pipeline
+    def process(self, frame_id, snapshot):
+        persons, frame = snapshot
+        if frame is not None:
+            # Let's print the detection count to the frame
+            cv2.putText(frame, f"Detections: {len(persons)}", (10, 30), cv2.FONT_HERSHEY_SIMPLEX, 1, (0, 255, 0), 2)
+            # Example of how to use the new_variable and new_function from the user_data
+            # Let's print the new_variable and the result of the new_function to the frame
+            cv2.putText(frame, f"{self.new_function()} {self.new_variable}", (10, 60), cv2.FONT_HERSHEY_SIMPLEX, 1, (0, 255, 0), 2)
+            # Convert the frame to BGR
+            frame = cv2.cvtColor(frame, cv2.COLOR_RGB2BGR)
+            self.publish_frame(frame_id, frame)
+
+        if frame_id % PRINT_EVERY == 0:
+            string_to_print = f"Frame count: {frame_id} | Detections: {len(persons)}\n"
+            for track_id, confidence in persons:
+                string_to_print += (f"Detection: ID: {track_id} Label: person Confidence: {confidence:.2f}\n")
+            print(string_to_print)
+        return len(persons)
+
 # -----------------------------------------------------------------------------------------------
 # User-defined callback function
 # -----------------------------------------------------------------------------------------------
 
-# This is the callback function that will be called when data is available from the pipeline
+# This is the callback function that will be called when data is available from the pipeline.
+# It only copies what process() needs out of the buffer and hands it to the worker pool.
+@profile_callback()
 def app_callback(pad, info, user_data):
     # Get the GstBuffer from the probe info
     buffer = info.get_buffer()
@@ -37,47 +63,32 @@ def app_callback(pad, info, user_data):
 
     # Using the user_data to count the number of frames
     user_data.increment()
-    string_to_print = f"Frame count: {user_data.get_count()}\n"
-
-    # Get the caps from the pad
-    format, width, height = get_caps_from_pad(pad)
 
     # If the user_data.use_frame is set to True, we can get the video frame from the buffer
     frame = None
-    if user_data.use_frame and format is not None and width is not None and height is not None:
-        # Get video frame
-        frame = get_numpy_from_buffer(buffer, format, width, height)
+    if user_data.use_frame:
+        # Get the caps from the pad
+        format, width, height = get_caps_from_pad(pad)
+        if format is not None and width is not None and height is not None:
+            # Get video frame (a copy, safe to use after the probe returns)
+            frame = get_numpy_from_buffer(buffer, format, width, height)
 
     # Get the detections from the buffer
     roi = hailo.get_roi_from_buffer(buffer)
     detections = roi.get_objects_typed(hailo.HAILO_DETECTION)
 
-    # Parse the detections
-    detection_count = 0
+    # Parse the detections into plain values (Hailo objects belong to the buffer)
+    persons = []
     for detection in detections:
-        label = detection.get_label()
-        bbox = detection.get_bbox()
-        confidence = detection.get_confidence()
-        if label == "person":
+        if detection.get_label() == "person":
             # Get track ID
             track_id = 0
             track = detection.get_objects_typed(hailo.HAILO_UNIQUE_ID)
             if len(track) == 1:
                 track_id = track[0].get_id()
-            string_to_print += (f"Detection: ID: {track_id} Label: {label} Confidence: {confidence:.2f}\n")
-            detection_count += 1
-    if user_data.use_frame:
-        # Note: using imshow will not work here, as the callback function is not running in the main thread
-        # Let's print the detection count to the frame
-        cv2.putText(frame, f"Detections: {detection_count}", (10, 30), cv2.FONT_HERSHEY_SIMPLEX, 1, (0, 255, 0), 2)
-        # Example of how to use the new_variable and new_function from the user_data
-        # Let's print the new_variable and the result of the new_function to the frame
-        cv2.putText(frame, f"{user_data.new_function()} {user_data.new_variable}", (10, 60), cv2.FONT_HERSHEY_SIMPLEX, 1, (0, 255, 0), 2)
-        # Convert the frame to BGR
-        frame = cv2.cvtColor(frame, cv2.COLOR_RGB2BGR)
-        user_data.set_frame(frame)
+            persons.append((track_id, detection.get_confidence()))
 
-    print(string_to_print)
+    user_data.submit(user_data.get_count(), (persons, frame))
     return Gst.PadProbeReturn.OK
 
 if __name__ == "__main__":
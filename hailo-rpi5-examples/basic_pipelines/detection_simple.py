@@ -6,6 +6,10 @@ from gi.repository import Gst
 import hailo
 from hailo_apps.hailo_app_python.core.gstreamer.gstreamer_app import app_callback_class
 from hailo_apps.hailo_app_python.apps.detection_simple.detection_pipeline_simple import GStreamerDetectionApp
+from callback_profiler import profile_callback
+
+# Frames between console reports: printing from the streaming thread on every frame costs FPS
+PRINT_EVERY = 30
 
 # User-defined class to be used in the callback function: Inheritance from the app_callback_class
 class user_app_callback_class(app_callback_class):
@@ -13,13 +17,18 @@ class user_app_callback_class(app_callback_class):
         super().__init__()
 
 # User-defined callback function: This is the callback function that will be called when data is available from the pipeline
+@profile_callback()
 def app_callback(pad, info, user_data):
     user_data.increment()  # Using the user_data to count the number of frames
+    if user_data.get_count() % PRINT_EVERY != 0:  # Only parse and print every PRINT_EVERY-th frame
+        return Gst.PadProbeReturn.OK
     string_to_print = f"Frame count: {user_data.get_count()}\n"
     buffer = info.get_buffer()  # Get the GstBuffer from the probe info
     if buffer is None:  # Check if the buffer is valid
         return Gst.PadProbeReturn.OK
-    for detection in hailo.get_roi_from_buffer(buffer).get_objects_typed(hailo.HAILO_DETECTION):  # Get the detections from the buffer & Parse the detections
+    detections = hailo.get_roi_from_buffer(buffer).get_objects_typed(hailo.HAILO_DETECTION)  # Get the detections from the buffer
+    string_to_print += f"Detections: {len(detections)}\n"
+    for detection in detections:  # Parse the detections
         string_to_print += (f"Detection: {detection.get_label()} Confidence: {detection.get_confidence():.2f}\n")
     print(string_to_print)
     return Gst.PadProbeReturn.OK
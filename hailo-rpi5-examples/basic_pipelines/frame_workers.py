@@ -0,0 +1,108 @@
+import threading
+from collections import deque, OrderedDict
+from hailo_apps.hailo_app_python.core.gstreamer.gstreamer_app import app_callback_class
+
+# -----------------------------------------------------------------------------------------------
+# Worker pool for app_callback
+# -----------------------------------------------------------------------------------------------
+# app_callback runs in the GStreamer streaming thread, so anything slow in it (cv2 drawing,
+# resizing, color conversion, printing) holds up the pipeline. With worker_app_callback_class
+# the probe only takes a snapshot of what it needs - plain Python values copied out of the Hailo
+# metadata, plus the frame from get_numpy_from_buffer (already a copy) - and returns:
+#
+#   def app_callback(pad, info, user_data):
+#       ...
+#       user_data.submit(user_data.get_count(), (detections, frame))
+#       return Gst.PadProbeReturn.OK
+#
+# process(frame_id, snapshot) runs on one of the worker threads; its return value is kept per
+# frame id (get_result / latest_result). The queue is bounded: when the workers fall behind the
+# oldest pending snapshot is dropped, never the pipeline. cv2 and numpy release the GIL, so their
+# work runs in parallel with the pipeline; pure-Python work still shares the interpreter.
+# Hailo objects (detections, masks) belong to the buffer and must not be passed to workers.
+# -----------------------------------------------------------------------------------------------
+WORKERS = 2       # Worker threads
+MAX_PENDING = 2   # Snapshots waiting for a worker before the oldest is dropped
+MAX_RESULTS = 64  # Results kept for get_result()
+
+
+class worker_app_callback_class(app_callback_class):
+    def __init__(self, workers=WORKERS, max_pending=MAX_PENDING, max_results=MAX_RESULTS):
+        super().__init__()
+        self.max_pending = max_pending
+        self.max_results = max_results
+        self.submitted = 0
+        self.dropped = 0
+        self.processed = 0
+        self._pending = deque()
+        self._results = OrderedDict()
+        self._latest_frame_id = 0 # Last frame handed to set_frame (workers finish out of order)
+        self._cond = threading.Condition()
+        self._stopping = False
+        self._workers = [threading.Thread(target=self._work, name=f"frame-worker-{i}", daemon=True)
+                         for i in range(workers)]
+        for worker in self._workers:
+            worker.start()
+
+    def process(self, frame_id, snapshot):
+        """Override: the per-frame work moved out of the probe. Runs on a worker thread."""
+        raise NotImplementedError
+
+    def submit(self, frame_id, snapshot):
+        """Queue a snapshot for process(); drops the oldest pending one if the queue is full."""
+        with self._cond:
+            if len(self._pending) >= self.max_pending:
+                self._pending.popleft()
+                self.dropped += 1
+            self._pending.append((frame_id, snapshot))
+            self.submitted += 1
+            self._cond.notify()
+
+    def get_result(self, frame_id, default=None):
+        with self._cond:
+            return self._results.get(frame_id, default)
+
+    def latest_result(self):
+        """(frame_id, result) of the newest processed frame, or None."""
+        with self._cond:
+            if not self._results:
+                return None
+            frame_id = max(self._results)
+            return frame_id, self._results[frame_id]
+
+    def publish_frame(self, frame_id, frame):
+        """set_frame() from a worker, skipping frames older than one already shown."""
+        # Compare and set in one step: another worker must not publish between the check and set_frame
+        # (set_frame only queues the frame for the display process)
+        with self._cond:
+            if frame_id < self._latest_frame_id:
+                return
+            self._latest_frame_id = frame_id
+            self.set_frame(frame)
+
+    def stop(self, timeout=1.0):
+        """Let the workers finish what is queued and exit."""
+        with self._cond:
+            self._stopping = True
+            self._cond.notify_all()
+        for worker in self._workers:
+            worker.join(timeout)
+
+    def _work(self):
+        while True:
+            with self._cond:
+                while not self._pending and not self._stopping:
+                    self._cond.wait()
+                if not self._pending:
+                    return
+                frame_id, snapshot = self._pending.popleft()
+            try:
+                result = self.process(frame_id, snapshot)
+            except Exception as e:
+                print(f"[Workers] process() failed on frame {frame_id}: {e}")
+                continue
+            with self._cond:
+                self._results[frame_id] = result
+                while len(self._results) > self.max_results:
+                    self._results.popitem(last=False)
+                self.processed += 1
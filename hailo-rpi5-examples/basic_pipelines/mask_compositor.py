@@ -0,0 +1,87 @@
+import numpy as np
+import cv2
+
+# -----------------------------------------------------------------------------------------------
+# Instance mask compositor
+# -----------------------------------------------------------------------------------------------
+# Drawing each mask with its own full-frame np.zeros_like overlay and cv2.addWeighted costs
+# one frame-sized allocation and blend per person. The compositor instead:
+#   1. writes each thresholded mask as a colour index into one label image (later masks on top),
+#   2. maps the labels to colours with a lookup table into a preallocated overlay,
+#   3. blends once, only inside the box that covers all masks.
+# The label and overlay buffers are reused while the frame size stays the same, and only the
+# area written last frame is cleared.
+# -----------------------------------------------------------------------------------------------
+MASK_THRESHOLD = 0.5
+OVERLAY_WEIGHT = 0.5
+
+# Predefined colors (BGR format), picked by track ID
+COLORS = [
+    (255, 0, 0),    # Red
+    (0, 255, 0),    # Green
+    (0, 0, 255),    # Blue
+    (255, 255, 0),  # Cyan
+    (255, 0, 255),  # Magenta
+    (0, 255, 255),  # Yellow
+    (128, 0, 128),  # Purple
+    (255, 165, 0),  # Orange
+    (0, 128, 128),  # Teal
+    (128, 128, 0)   # Olive
+]
+
+
+class MaskCompositor:
+    def __init__(self, colors=COLORS, threshold=MASK_THRESHOLD, weight=OVERLAY_WEIGHT):
+        # Index 0 = no mask
+        self.lut = np.zeros((len(colors) + 1, 3), dtype=np.uint8)
+        self.lut[1:] = colors
+        self.num_colors = len(colors)
+        self.threshold = threshold
+        self.weight = weight
+        self.labels = None
+        self.overlay = None
+        self._dirty = None # (x0, y0, x1, y1) written last frame
+
+    def _buffers(self, height, width):
+        if self.labels is None or self.labels.shape != (height, width):
+            self.labels = np.zeros((height, width), dtype=np.uint8)
+            self.overlay = np.zeros((height, width, 3), dtype=np.uint8)
+            self._dirty = None
+        elif self._dirty is not None:
+            x0, y0, x1, y1 = self._dirty
+            self.labels[y0:y1, x0:x1] = 0
+            self._dirty = None
+
+    def draw(self, frame, masks):
+        """
+        Blend `masks` onto `frame` (H x W x 3 uint8, modified in place) and return it.
+        masks: iterable of (color_index, (xmin, ymin, width, height) normalised, mask 2-D float array).
+        """
+        height, width = frame.shape[:2]
+        self._buffers(height, width)
+        x0 = y0 = None
+        for color_index, (xmin, ymin, bbox_width, bbox_height), data in masks:
+            # Mask box in frame pixels, clipped to the frame
+            roi_width = int(bbox_width * width)
+            roi_height = int(bbox_height * height)
+            left, top = int(xmin * width), int(ymin * height)
+            x_min, y_min = max(left, 0), max(top, 0)
+            x_max, y_max = min(left + roi_width, width), min(top + roi_height, height)
+            if roi_width <= 0 or roi_height <= 0 or x_max <= x_min or y_max <= y_min:
+                continue
+            resized = cv2.resize(data, (roi_width, roi_height), interpolation=cv2.INTER_LINEAR)
+            inside = resized[y_min - top:y_max - top, x_min - left:x_max - left] > self.threshold
+            np.copyto(self.labels[y_min:y_max, x_min:x_max], color_index % self.num_colors + 1, where=inside)
+            if x0 is None:
+                x0, y0, x1, y1 = x_min, y_min, x_max, y_max
+            else:
+                x0, y0, x1, y1 = min(x0, x_min), min(y0, y_min), max(x1, x_max), max(y1, y_max)
+
+        if x0 is None:
+            return frame
+        self._dirty = (x0, y0, x1, y1)
+        region = frame[y0:y1, x0:x1]
+        overlay = self.overlay[y0:y1, x0:x1]
+        np.take(self.lut, self.labels[y0:y1, x0:x1], axis=0, out=overlay)
+        cv2.addWeighted(region, 1, overlay, self.weight, 0, dst=region)
+        return frame
@@ -8,22 +8,48 @@ import cv2
 import hailo
 
 from hailo_apps.hailo_app_python.core.common.buffer_utils import get_caps_from_pad, get_numpy_from_buffer
-from hailo_apps.hailo_app_python.core.gstreamer.gstreamer_app import app_callback_class
 from hailo_apps.hailo_app_python.apps.pose_estimation.pose_estimation_pipeline import GStreamerPoseEstimationApp
+from callback_profiler import profile_callback
+from frame_workers import worker_app_callback_class
+
+# Frames between console reports
+PRINT_EVERY = 30
 
 # -----------------------------------------------------------------------------------------------
 # User-defined class to be used in the callback function
 # -----------------------------------------------------------------------------------------------
-# Inheritance from the app_callback_class
-class user_app_callback_class(app_callback_class):
+# Inheritance from the worker_app_callback_class (an app_callback_class with a worker pool)
+class user_app_callback_class(worker_app_callback_class):
     def __init__(self):
         super().__init__()
 
+    # Runs on a worker thread: drawing and printing no longer hold up the pipeline
+    def process(self, frame_id, snapshot):
+        persons, frame = snapshot
+        if frame is not None:
+            for _track_id, _confidence, eyes in persons:
+                for _eye, x, y in eyes:
+                    cv2.circle(frame, (x, y), 5, (0, 255, 0), -1)
+            # Convert the frame to BGR
+            frame = cv2.cvtColor(frame, cv2.COLOR_RGB2BGR)
+            self.publish_frame(frame_id, frame)
+
+        if frame_id % PRINT_EVERY == 0:
+            string_to_print = f"Frame count: {frame_id} | Detections: {len(persons)}\n"
+            for track_id, confidence, eyes in persons:
+                string_to_print += (f"Detection: ID: {track_id} Label: person Confidence: {confidence:.2f}\n")
+                for eye, x, y in eyes:
+                    string_to_print += f"{eye}: x: {x:.2f} y: {y:.2f}\n"
+            print(string_to_print)
+        return persons
+
 # -----------------------------------------------------------------------------------------------
 # User-defined callback function
 # -----------------------------------------------------------------------------------------------
 
-# This is the callback function that will be called when data is available from the pipeline
+# This is the callback function that will be called when data is available from the pipeline.
+# It only copies what process() needs out of the buffer and hands it to the worker pool.
+@profile_callback()
 def app_callback(pad, info, user_data):
     # Get the GstBuffer from the probe info
     buffer = info.get_buffer()
@@ -33,7 +59,6 @@ def app_callback(pad, info, user_data):
 
     # Using the user_data to count the number of frames
     user_data.increment()
-    string_to_print = f"Frame count: {user_data.get_count()}\n"
 
     # Get the caps from the pad
     format, width, height = get_caps_from_pad(pad)
@@ -41,48 +66,37 @@ def app_callback(pad, info, user_data):
     # If the user_data.use_frame is set to True, we can get the video frame from the buffer
     frame = None
     if user_data.use_frame and format is not None and width is not None and height is not None:
-        # Get video frame
+        # Get video frame (a copy, safe to use after the probe returns)
         frame = get_numpy_from_buffer(buffer, format, width, height)
 
     # Get the detections from the buffer
     roi = hailo.get_roi_from_buffer(buffer)
     detections = roi.get_objects_typed(hailo.HAILO_DETECTION)
 
-    # Get the keypoints
-    keypoints = get_keypoints()
-
-    # Parse the detections
+    # Parse the detections into plain values (Hailo objects belong to the buffer)
+    persons = []
     for detection in detections:
-        label = detection.get_label()
-        bbox = detection.get_bbox()
-        confidence = detection.get_confidence()
-        if label == "person":
+        if detection.get_label() == "person":
+            bbox = detection.get_bbox()
             # Get track ID
             track_id = 0
             track = detection.get_objects_typed(hailo.HAILO_UNIQUE_ID)
             if len(track) == 1:
                 track_id = track[0].get_id()
-            string_to_print += (f"Detection: ID: {track_id} Label: {label} Confidence: {confidence:.2f}\n")
 
             # Pose estimation landmarks from detection (if available)
+            eyes = []
             landmarks = detection.get_objects_typed(hailo.HAILO_LANDMARKS)
             if len(landmarks) != 0:
                 points = landmarks[0].get_points()
                 for eye in ['left_eye', 'right_eye']:
-                    keypoint_index = keypoints[eye]
-                    point = points[keypoint_index]
+                    point = points[KEYPOINTS[eye]]
                     x = int((point.x() * bbox.width() + bbox.xmin()) * width)
                     y = int((point.y() * bbox.height() + bbox.ymin()) * height)
-                    string_to_print += f"{eye}: x: {x:.2f} y: {y:.2f}\n"
-                    if user_data.use_frame:
-                        cv2.circle(frame, (x, y), 5, (0, 255, 0), -1)
-
-    if user_data.use_frame:
-        # Convert the frame to BGR
-        frame = cv2.cvtColor(frame, cv2.COLOR_RGB2BGR)
-        user_data.set_frame(frame)
+                    eyes.append((eye, x, y))
+            persons.append((track_id, detection.get_confidence(), eyes))
 
-    print(string_to_print)
+    user_data.submit(user_data.get_count(), (persons, frame))
     return Gst.PadProbeReturn.OK
 
 # This function can be used to get the COCO keypoints coorespondence map
@@ -110,6 +124,8 @@ def get_keypoints():
 
     return keypoints
 
+KEYPOINTS = get_keypoints()  # Built once, not per frame
+
 if __name__ == "__main__":
     project_root = Path(__file__).resolve().parent.parent
     env_file     = project_root / ".env"
@@ -0,0 +1,348 @@
+import os
+import re
+import ast
+import sys
+import json
+import time
+import argparse
+import importlib
+import subprocess
+import tempfile
+from pathlib import Path
+import numpy as np
+
+# -----------------------------------------------------------------------------------------------
+# PIPELINE BENCHMARK
+# -----------------------------------------------------------------------------------------------
+# Repeatable FPS / latency numbers for direct_sitl.py, first_flight.py and basic_pipelines/*,
+# written to JSON so two commits can be compared (--baseline).
+#
+# direct_sitl / first_flight run in this process with their own pipeline string, except:
+#   - source     the Gazebo UDP stream / camera is replaced by videotestsrc ("test") or a
+#                recorded clip ("file", decoded with decodebin, played as fast as it decodes)
+#   - inference  "hailo" keeps hailonet / hailofilter; "stub" replaces them (and hailooverlay)
+#                with identity elements that hold each frame STUB_INFERENCE_MS, so the rest
+#                of the pipeline and the callback can be measured without a Hailo device
+#   - sinks      the preview goes to 127.0.0.1, the recording to a temporary file
+# The pipeline string comes from pipelines.py and the target's CONFIGURATION constants, read
+# from its source, so the apps (which import hailo / hailo_apps) are only imported for "hailo".
+# Their app_callback runs on every frame and is timed; with "stub" the frames carry no detections
+# and the hailo-free part of the callback stands in for it (frame timing lookup, tracker update).
+#
+# basic_pipelines/* build their pipeline inside hailo_apps, so they run as a subprocess with
+# --input <clip> --disable-sync --show-fps (Hailo device required, no stub). Their frames are
+# counted from the latency tracer (one pipeline record per buffer reaching a sink), since the
+# scripts only print every PRINT_EVERY-th frame.
+#
+# Per-element and source-to-sink latency come from the GStreamer latency tracer
+# (GST_TRACERS=latency, parsed from the GST_TRACER log); frames before --warmup are ignored.
+#
+#   python checking/bench_pipelines.py direct_sitl --source test --inference stub --json base.json
+#   python checking/bench_pipelines.py first_flight --source file --clip flight_record.mkv
+#   python checking/bench_pipelines.py basic_pipelines/detection.py --clip resources/videos/example.mp4
+#   python checking/bench_pipelines.py direct_sitl --json new.json --baseline base.json
+# -----------------------------------------------------------------------------------------------
+IN_PROCESS_TARGETS = {
+    # target: pipeline builder in pipelines.py
+    "direct_sitl": "sitl_pipeline",
+    "first_flight": "recorder_pipeline",
+}
+STUB_INFERENCE_MS = 20.0 # Frame hold time of the stand-in for hailonet (qr_simulation.hef on Hailo-8L)
+EXAMPLES_DIR = Path(__file__).resolve().parent.parent
+
+ELEMENT_LATENCY = re.compile(r"element-latency, .*?element=\(string\)([^,]+),.*?time=\(guint64\)(\d+), ts=\(guint64\)(\d+)")
+PIPELINE_LATENCY = re.compile(r"\slatency, .*?sink-element=\(string\)([^,]+),.*?time=\(guint64\)(\d+), ts=\(guint64\)(\d+)")
+BASIC_FPS = re.compile(r"FPS: (\d+\.\d+)")
+
+
+def stats_ms(values_ms):
+    if not values_ms:
+        return None
+    values = np.asarray(values_ms, dtype=float)
+    return {
+        "count": int(values.size),
+        "mean": float(values.mean()),
+        "p50": float(np.percentile(values, 50)),
+        "p95": float(np.percentile(values, 95)),
+        "max": float(values.max()),
+    }
+
+
+def tracer_env(log_path):
+    """Environment that makes gst_init() start the latency tracer and log to `log_path`."""
+    return {
+        "GST_TRACERS": "latency(flags=pipeline+element)",
+        "GST_DEBUG": "GST_TRACER:7",
+        "GST_DEBUG_FILE": str(log_path),
+        "GST_DEBUG_NO_COLOR": "1",
+    }
+
+
+def parse_tracer_log(log_path, skip_ns):
+    """{"elements": {name: stats}, "pipeline": {sink: stats}} from records logged after skip_ns."""
+    elements, sinks = {}, {}
+    if not os.path.exists(log_path):
+        return {"elements": {}, "pipeline": {}}
+    with open(log_path, errors="replace") as f:
+        for line in f:
+            match = ELEMENT_LATENCY.search(line)
+            target = elements
+            if match is None:
+                match = PIPELINE_LATENCY.search(line)
+                target = sinks
+            if match is None or int(match.group(3)) < skip_ns:
+                continue
+            target.setdefault(match.group(1), []).append(int(match.group(2)) / 1e6)
+    return {
+        "elements": {name: stats_ms(v) for name, v in sorted(elements.items())},
+        "pipeline": {name: stats_ms(v) for name, v in sorted(sinks.items())},
+    }
+
+
+def source_fragment(source, clip, width, height, fps):
+    if source == "file":
+        if not clip:
+            raise SystemExit("--source file needs --clip")
+        return f"filesrc location={clip} ! decodebin ! videoconvert ! identity name=bench_source ! "
+    return (f"videotestsrc is-live=true pattern=ball ! "
+            f"video/x-raw, width={width}, height={height}, framerate={fps}/1 ! identity name=bench_source ! ")
+
+
+def bench_pipeline_string(pipeline, source, inference, stub_ms, record_path):
+    """The target's pipeline with the benchmark source, inference and sinks swapped in."""
+    # Everything up to the first queue is the capture / network front end
+    pipeline = source + pipeline[pipeline.index("queue "):]
+    if inference == "stub":
+        pipeline = re.sub(r"hailonet name=(\S+) [^!]*!", rf"identity name=\1 sleep-time={int(stub_ms * 1000)} !", pipeline)
+        pipeline = re.sub(r"hailofilter name=(\S+) [^!]*!", r"identity name=\1 !", pipeline)
+        pipeline = pipeline.replace("hailooverlay !", "identity !")
+    pipeline = re.sub(r"host=\S+", "host=127.0.0.1", pipeline)
+    return re.sub(r"location=\S+$", f"location={record_path}", pipeline)
+
+
+def app_config(target):
+    """Literal module-level constants of checking/<target>.py, read without importing it."""
+    tree = ast.parse((Path(__file__).resolve().parent / f"{target}.py").read_text())
+    config = {}
+    for node in tree.body:
+        if isinstance(node, ast.Assign) and len(node.targets) == 1 and isinstance(node.targets[0], ast.Name):
+            try:
+                config[node.targets[0].id] = ast.literal_eval(node.value)
+            except ValueError:
+                pass # Computed values are not configuration
+    return config
+
+
+def resolve_inference(inference, Gst):
+    if inference == "auto":
+        return "hailo" if Gst.ElementFactory.find("hailonet") is not None and os.path.exists("/dev/hailo0") else "stub"
+    return inference
+
+
+def stub_callback(Gst):
+    """Stand-in for app_callback without hailo: the stub frames carry no detection metadata."""
+    from frame_timing import FrameTiming
+    from detection_tracker import DetectionTracker
+    timing, tracker = FrameTiming(), DetectionTracker()
+
+    def callback(pad, info, user_data):
+        buffer = info.get_buffer()
+        if buffer is not None:
+            timing.pop(buffer)
+            tracker.update([])
+        return Gst.PadProbeReturn.OK
+    return callback
+
+
+def run_in_process(args, log_path):
+    os.environ.update(tracer_env(log_path)) # Must be set before gst_init()
+    import gi
+    gi.require_version('Gst', '1.0')
+    from gi.repository import Gst
+    Gst.init(None)
+    start_ns = Gst.util_get_timestamp()
+
+    import pipelines
+    inference = resolve_inference(args.inference, Gst)
+    record = tempfile.NamedTemporaryFile(suffix=".mkv", delete=False)
+    record.close()
+    description = bench_pipeline_string(
+        getattr(pipelines, IN_PROCESS_TARGETS[args.target])(app_config(args.target)),
+        source_fragment(args.source, args.clip, args.width, args.height, args.fps),
+        inference, args.stub_ms, record.name,
+    )
+    pipeline = Gst.parse_launch(description)
+    if inference == "hailo":
+        module = importlib.import_module(args.target)
+        app_callback, user_data = module.app_callback, module.user_app_callback_class()
+    else:
+        app_callback, user_data = stub_callback(Gst), None
+
+    sent = {}
+    frame_latency, callback_ms, callback_cpu_ms = [], [], []
+    measuring = [False]
+
+    def on_source(pad, info):
+        buffer = info.get_buffer()
+        if buffer is not None:
+            sent[buffer.pts] = time.perf_counter()
+            if len(sent) > 64: # Frames dropped by leaky queues never arrive
+                del sent[next(iter(sent))]
+        return Gst.PadProbeReturn.OK
+
+    def on_callback(pad, info):
+        buffer = info.get_buffer()
+        start = time.perf_counter()
+        cpu_start = time.thread_time()
+        result = app_callback(pad, info, user_data)
+        end = time.perf_counter()
+        if measuring[0] and buffer is not None:
+            callback_ms.append((end - start) * 1000.0)
+            callback_cpu_ms.append((time.thread_time() - cpu_start) * 1000.0)
+            t_sent = sent.pop(buffer.pts, None)
+            if t_sent is not None:
+                frame_latency.append((start - t_sent) * 1000.0)
+        return result
+
+    pipeline.get_by_name("bench_source").get_static_pad("src").add_probe(Gst.PadProbeType.BUFFER, on_source)
+    pipeline.get_by_name("identity_callback").get_static_pad("src").add_probe(Gst.PadProbeType.BUFFER, on_callback)
+
+    bus = pipeline.get_bus()
+    pipeline.set_state(Gst.State.PLAYING)
+    msg = bus.timed_pop_filtered(int(args.warmup * Gst.SECOND), Gst.MessageType.EOS | Gst.MessageType.ERROR)
+    skip_ns = Gst.util_get_timestamp() - start_ns
+    measuring[0] = True
+    t0 = time.perf_counter()
+    if msg is None:
+        msg = bus.timed_pop_filtered(int(args.duration * Gst.SECOND), Gst.MessageType.EOS | Gst.MessageType.ERROR)
+    elapsed = time.perf_counter() - t0
+    measuring[0] = False
+    pipeline.set_state(Gst.State.NULL)
+    os.unlink(record.name)
+    if msg is not None and msg.type == Gst.MessageType.ERROR:
+        err, _debug = msg.parse_error()
+        raise RuntimeError(f"{args.target}: {err.message}")
+
+    report = {
+        "inference": inference,
+        "duration": elapsed,
+        "frames": len(callback_ms),
+        "fps": len(callback_ms) / elapsed if elapsed > 0 else 0.0,
+        "frame_latency_ms": stats_ms(frame_latency),
+        "callback_ms": stats_ms(callback_ms),
+        "callback_cpu_ms": stats_ms(callback_cpu_ms),
+    }
+    report.update(parse_tracer_log(log_path, skip_ns))
+    return report
+
+
+def run_subprocess(args, log_path):
+    if not args.clip:
+        raise SystemExit(f"{args.target} needs --clip (it reads the clip through hailo_apps --input)")
+    cmd = [sys.executable, "-u", args.target, "--input", os.path.abspath(args.clip), "--disable-sync", "--show-fps"]
+    env = dict(os.environ, **tracer_env(log_path))
+    process = subprocess.Popen(cmd, cwd=EXAMPLES_DIR, env=env, stdout=subprocess.PIPE, stderr=subprocess.PIPE, text=True)
+    try:
+        stdout, stderr = process.communicate(timeout=args.warmup + args.duration)
+    except subprocess.TimeoutExpired:
+        process.terminate()
+        stdout, stderr = process.communicate()
+    if "Traceback" in stderr:
+        raise RuntimeError(f"{args.target} failed:\n{stderr}")
+
+    fps = [float(v) for v in BASIC_FPS.findall(stdout)]
+    skip = int(args.warmup) # --show-fps prints about once per second
+    tracer = parse_tracer_log(log_path, int(args.warmup * 1e9))
+    # Every sink logs one record per buffer; the busiest one (display or fakesink) saw every frame
+    sink_frames = [s["count"] for s in tracer["pipeline"].values() if s]
+    report = {
+        "inference": "hailo",
+        "duration": args.duration,
+        "frames": max(sink_frames) if sink_frames else 0,
+        "fps": float(np.mean(fps[skip:])) if fps[skip:] else None,
+        "frame_latency_ms": None,
+        "callback_ms": None,
+        "callback_cpu_ms": None,
+    }
+    report.update(tracer)
+    return report
+
+
+def git_commit():
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=EXAMPLES_DIR,
+                              capture_output=True, text=True).stdout.strip() or None
+    except OSError:
+        return None
+
+
+def print_report(report, baseline=None):
+    def delta(value, old):
+        if baseline is None or value is None or old is None:
+            return ""
+        return f" ({value - old:+.2f})"
+
+    def mean(section, key):
+        block = section.get(key) if section else None
+        return block["mean"] if block else None
+
+    base = baseline or {}
+    print(f"== {report['target']} | {report['inference']} inference | {report['source']} source | commit {report['commit']}")
+    if report["fps"] is not None:
+        print(f"   FPS {report['fps']:.2f}{delta(report['fps'], base.get('fps'))}")
+    for key, label in (("frame_latency_ms", "source -> callback"), ("callback_ms", "callback wall"),
+                       ("callback_cpu_ms", "callback CPU")):
+        s = report.get(key)
+        if s:
+            print(f"   {label:<20} mean {s['mean']:7.2f} ms{delta(s['mean'], mean(base, key))} | "
+                  f"p95 {s['p95']:7.2f} ms | max {s['max']:7.2f} ms")
+    for name, s in report["elements"].items():
+        if s:
+            print(f"   element {name:<20} mean {s['mean']:7.2f} ms{delta(s['mean'], mean(base.get('elements'), name))} | "
+                  f"p95 {s['p95']:7.2f} ms")
+    for name, s in report["pipeline"].items():
+        if s:
+            print(f"   source -> {name:<17} mean {s['mean']:7.2f} ms{delta(s['mean'], mean(base.get('pipeline'), name))} | "
+                  f"p95 {s['p95']:7.2f} ms")
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the Hailo detection pipelines with synthetic or recorded video.")
+    parser.add_argument("target", help=f"One of {', '.join(IN_PROCESS_TARGETS)} or a basic_pipelines/*.py script")
+    parser.add_argument("--source", choices=("test", "file"), default="test", help="In-process targets only")
+    parser.add_argument("--clip", help="Recorded video for --source file and basic_pipelines")
+    parser.add_argument("--inference", choices=("auto", "hailo", "stub"), default="auto",
+                        help="auto = hailo when hailonet and /dev/hailo0 exist, else stub")
+    parser.add_argument("--stub-ms", type=float, default=STUB_INFERENCE_MS, help="Stand-in inference time per frame")
+    parser.add_argument("--width", type=int, default=640, help="videotestsrc frame size")
+    parser.add_argument("--height", type=int, default=480)
+    parser.add_argument("--fps", type=int, default=30, help="videotestsrc frame rate")
+    parser.add_argument("--duration", type=float, default=20.0, help="Measured seconds")
+    parser.add_argument("--warmup", type=float, default=3.0, help="Seconds ignored at start (HEF load, negotiation)")
+    parser.add_argument("--json", help="Write the report to this JSON file")
+    parser.add_argument("--baseline", help="Earlier --json report to print differences against")
+    args = parser.parse_args()
+
+    log_path = Path(tempfile.gettempdir()) / f"bench_{Path(args.target).stem}_tracer.log"
+    if log_path.exists():
+        log_path.unlink()
+    if args.target in IN_PROCESS_TARGETS:
+        report = run_in_process(args, log_path)
+    else:
+        report = run_subprocess(args, log_path)
+    report = {"target": args.target, "source": args.source if args.target in IN_PROCESS_TARGETS else "file",
+              "commit": git_commit(), "time": time.time(), **report}
+
+    baseline = None
+    if args.baseline:
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+    print_report(report, baseline)
+
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(report, f, indent=2)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,125 @@
+import os
+import sys
+import json
+import time
+import argparse
+import gi
+
+gi.require_version('Gst', '1.0')
+from gi.repository import Gst
+from preview_encoder import resolve_mode
+from pipelines import sitl_pipeline
+from bench_pipelines import app_config
+
+# -----------------------------------------------------------------------------------------------
+# PREVIEW ENCODER BENCHMARK
+# -----------------------------------------------------------------------------------------------
+# Runs the direct_sitl.py pipeline (pipelines.sitl_pipeline with direct_sitl.py's CONFIGURATION
+# constants, the PREVIEW_* ones replaced by each preset) in turn and reports the CPU each preview
+# option costs and the detection rate it leaves:
+#   - process CPU: user + system time of this process (all GStreamer threads) per second, in cores
+#   - system CPU: busy share of all cores from /proc/stat (includes everything else on the Pi)
+#   - detection FPS: frames through the callback point, preview_q drops
+#
+#   python checking/bench_preview.py --source udp --duration 20     # with Gazebo streaming
+#   python checking/bench_preview.py --source test                  # synthetic 30 FPS frames
+# -----------------------------------------------------------------------------------------------
+PRESETS = {
+    # preset: PREVIEW_* constants of direct_sitl.py it overrides (PREVIEW_BITRATE is kept)
+    "x264": dict(PREVIEW_ENCODER="x264", PREVIEW_WIDTH=None, PREVIEW_HEIGHT=None, PREVIEW_FPS=None),
+    "x264-low": dict(PREVIEW_ENCODER="x264", PREVIEW_WIDTH=320, PREVIEW_HEIGHT=320, PREVIEW_FPS=10),
+    "v4l2": dict(PREVIEW_ENCODER="v4l2", PREVIEW_WIDTH=None, PREVIEW_HEIGHT=None, PREVIEW_FPS=None),
+    "v4l2-low": dict(PREVIEW_ENCODER="v4l2", PREVIEW_WIDTH=320, PREVIEW_HEIGHT=320, PREVIEW_FPS=10),
+    "none": dict(PREVIEW_ENCODER="none"),
+}
+
+SOURCES = {
+    "udp": None, # direct_sitl.py's own front end (Gazebo RTP stream)
+    "test": "videotestsrc is-live=true pattern=ball ! video/x-raw, width=1280, height=720, framerate=30/1 ! ",
+}
+
+
+def system_cpu():
+    """(busy, total) jiffies over all cores."""
+    with open("/proc/stat") as f:
+        values = [int(v) for v in f.readline().split()[1:]]
+    idle = values[3] + values[4] # idle + iowait
+    return sum(values) - idle, sum(values)
+
+
+def bench(name, preset, source, host, port, duration, warmup):
+    config = dict(app_config("direct_sitl"), HOST_IP=host, PREVIEW_PORT=port, **preset)
+    description = sitl_pipeline(config)
+    if SOURCES[source] is not None:
+        # Everything up to the first queue is the network front end
+        description = SOURCES[source] + description[description.index("queue "):]
+    pipeline = Gst.parse_launch(description)
+    frames = [0]
+
+    def on_buffer(pad, info):
+        frames[0] += 1
+        return Gst.PadProbeReturn.OK
+
+    pipeline.get_by_name("identity_callback").get_static_pad("src").add_probe(Gst.PadProbeType.BUFFER, on_buffer)
+    preview_in = [0]
+    preview_q = pipeline.get_by_name("preview_q")
+    if preview_q is not None:
+        def on_preview(pad, info):
+            preview_in[0] += 1
+            return Gst.PadProbeReturn.OK
+        preview_q.get_static_pad("src").add_probe(Gst.PadProbeType.BUFFER, on_preview)
+
+    pipeline.set_state(Gst.State.PLAYING)
+    time.sleep(warmup)
+
+    start_frames, start_preview = frames[0], preview_in[0]
+    start_times, start_sys, start_wall = os.times(), system_cpu(), time.monotonic()
+    time.sleep(duration)
+    end_times, end_sys, end_wall = os.times(), system_cpu(), time.monotonic()
+    end_frames, end_preview = frames[0], preview_in[0]
+    pipeline.set_state(Gst.State.NULL)
+
+    wall = end_wall - start_wall
+    process_cpu = (end_times.user + end_times.system - start_times.user - start_times.system) / wall
+    busy, total = end_sys[0] - start_sys[0], end_sys[1] - start_sys[1]
+    return {
+        "preset": name,
+        "encoder": resolve_mode(preset["PREVIEW_ENCODER"]),
+        "detection_fps": (end_frames - start_frames) / wall,
+        "preview_fps": (end_preview - start_preview) / wall if preview_q is not None else 0.0,
+        "process_cpu_cores": process_cpu,
+        "system_cpu_percent": 100.0 * busy / total if total else 0.0,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="CPU cost and detection rate of each preview encoder option.")
+    parser.add_argument("--presets", nargs="+", choices=list(PRESETS), default=list(PRESETS))
+    parser.add_argument("--source", choices=list(SOURCES), default="test")
+    parser.add_argument("--host", default="127.0.0.1", help="Preview destination (the stream is discarded)")
+    parser.add_argument("--port", type=int, default=5001)
+    parser.add_argument("--duration", type=float, default=15.0, help="Measured seconds per preset")
+    parser.add_argument("--warmup", type=float, default=3.0, help="Seconds before measuring (HEF load, negotiation)")
+    parser.add_argument("--json", help="Write results to this JSON file")
+    args = parser.parse_args()
+
+    Gst.init(None)
+    results = []
+    for name in args.presets:
+        preset = PRESETS[name]
+        if preset["PREVIEW_ENCODER"] == "v4l2" and resolve_mode("auto") != "v4l2":
+            print(f"{name:>9} | skipped: no v4l2h264enc on this board")
+            continue
+        r = bench(name, preset, args.source, args.host, args.port, args.duration, args.warmup)
+        results.append(r)
+        print(f"{name:>9} | detection {r['detection_fps']:5.1f} FPS | preview {r['preview_fps']:5.1f} FPS | "
+              f"process CPU {r['process_cpu_cores']:.2f} cores | system CPU {r['system_cpu_percent']:5.1f}%")
+
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(results, f, indent=2)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,146 @@
+import sys
+import json
+import argparse
+import gi
+import numpy as np
+
+gi.require_version('Gst', '1.0')
+from gi.repository import Gst
+import hailo
+from letterbox import Letterbox, stretch_pipeline
+from first_flight import CAM_WIDTH, CAM_HEIGHT, HEF_PATH, POST_PROCESS_SO
+
+# -----------------------------------------------------------------------------------------------
+# STRETCH vs LETTERBOX ON RECORDED FOOTAGE
+# -----------------------------------------------------------------------------------------------
+# Runs the landing model over a recorded video (e.g. first_flight.py's flight_record.mkv) once
+# per preprocessing mode, every frame, no drops, and compares per mode:
+#   - detection rate at several confidence thresholds and the confidence of the best detection
+#   - centre error in camera pixels, against ground truth if given (--truth CSV with columns
+#     frame,cx,cy normalised 0-1, e.g. from synthetic footage), otherwise between the two modes
+# and suggests the highest letterbox threshold that keeps the stretch detection rate.
+#
+#   python checking/compare_preprocessing.py flight_record.mkv --json compare.json
+# -----------------------------------------------------------------------------------------------
+THRESHOLDS = (0.5, 0.6, 0.7, 0.75, 0.8, 0.9)
+MODES = ("stretch", "letterbox")
+
+
+def run_mode(video, mode, width, height, hef_path, so_path):
+    """Best detection per frame: list of (confidence, cx, cy) in normalised camera coordinates, or None."""
+    letterbox = Letterbox(width, height) if mode == "letterbox" else None
+    preprocess = letterbox.pipeline() if letterbox else stretch_pipeline()
+    pipeline = Gst.parse_launch(
+        f"filesrc location={video} ! decodebin ! videoconvert ! "
+        f"{preprocess}"
+        f"hailonet hef-path={hef_path} ! "
+        f"hailofilter so-path={so_path} qos=false ! "
+        f"identity name=probe ! fakesink sync=false"
+    )
+
+    frames = []
+
+    def on_buffer(pad, info):
+        buffer = info.get_buffer()
+        best = None
+        for detection in hailo.get_roi_from_buffer(buffer).get_objects_typed(hailo.HAILO_DETECTION):
+            confidence = detection.get_confidence()
+            if best is None or confidence > best[0]:
+                bbox = detection.get_bbox()
+                box = (bbox.xmin(), bbox.ymin(), bbox.xmax(), bbox.ymax())
+                if letterbox:
+                    box = letterbox.to_image(*box)
+                best = (confidence, (box[0] + box[2]) / 2, (box[1] + box[3]) / 2)
+        frames.append(best)
+        return Gst.PadProbeReturn.OK
+
+    pipeline.get_by_name("probe").get_static_pad("src").add_probe(Gst.PadProbeType.BUFFER, on_buffer)
+    pipeline.set_state(Gst.State.PLAYING)
+    msg = pipeline.get_bus().timed_pop_filtered(Gst.CLOCK_TIME_NONE, Gst.MessageType.EOS | Gst.MessageType.ERROR)
+    pipeline.set_state(Gst.State.NULL)
+    if msg.type == Gst.MessageType.ERROR:
+        err, _debug = msg.parse_error()
+        raise RuntimeError(f"{mode}: {err.message}")
+    return frames
+
+
+def load_truth(path):
+    truth = {}
+    with open(path) as f:
+        next(f) # Header
+        for line in f:
+            frame, cx, cy = line.strip().split(",")[:3]
+            truth[int(frame)] = (float(cx), float(cy))
+    return truth
+
+
+def centre_error_px(a, b, width, height):
+    return float(np.hypot((a[0] - b[0]) * width, (a[1] - b[1]) * height))
+
+
+def summarise(frames, width, height, truth=None):
+    confidences = np.array([f[0] if f else 0.0 for f in frames])
+    summary = {
+        "frames": len(frames),
+        "detection_rate": {str(t): float(np.mean(confidences > t)) for t in THRESHOLDS},
+        "mean_confidence": float(confidences[confidences > 0].mean()) if (confidences > 0).any() else 0.0,
+    }
+    if truth:
+        errors = [centre_error_px(f[1:], truth[i], width, height) for i, f in enumerate(frames) if f and i in truth]
+        summary["centre_error_px"] = {
+            "mean": float(np.mean(errors)) if errors else None,
+            "p95": float(np.percentile(errors, 95)) if errors else None,
+        }
+    return summary
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare stretch vs letterbox preprocessing on recorded footage.")
+    parser.add_argument("video", help="Recorded video file (any format decodebin can read)")
+    parser.add_argument("--width", type=int, default=CAM_WIDTH, help="Video frame width")
+    parser.add_argument("--height", type=int, default=CAM_HEIGHT, help="Video frame height")
+    parser.add_argument("--hef", default=HEF_PATH)
+    parser.add_argument("--so", default=POST_PROCESS_SO, help="Post-process .so")
+    parser.add_argument("--truth", help="Ground-truth centres: CSV frame,cx,cy (normalised)")
+    parser.add_argument("--threshold", type=float, default=0.5, help="Threshold flown with stretch preprocessing")
+    parser.add_argument("--json", help="Write the comparison to this JSON file")
+    args = parser.parse_args()
+
+    Gst.init(None)
+    truth = load_truth(args.truth) if args.truth else None
+    frames = {mode: run_mode(args.video, mode, args.width, args.height, args.hef, args.so) for mode in MODES}
+    report = {mode: summarise(frames[mode], args.width, args.height, truth) for mode in MODES}
+
+    # Centre disagreement between the modes on frames where both detect
+    both = [(a, b) for a, b in zip(frames["stretch"], frames["letterbox"]) if a and b]
+    report["mode_centre_difference_px"] = (
+        float(np.mean([centre_error_px(a[1:], b[1:], args.width, args.height) for a, b in both])) if both else None
+    )
+
+    # Highest letterbox threshold that still detects as many frames as stretch at --threshold
+    stretch_conf = np.array([f[0] if f else 0.0 for f in frames["stretch"]])
+    letterbox_conf = np.array([f[0] if f else 0.0 for f in frames["letterbox"]])
+    target_rate = np.mean(stretch_conf > args.threshold)
+    candidates = [t for t in np.arange(args.threshold, 0.96, 0.01) if np.mean(letterbox_conf > t) >= target_rate]
+    report["suggested_letterbox_threshold"] = round(float(max(candidates)), 2) if candidates else None
+
+    for mode in MODES:
+        r = report[mode]
+        rates = " ".join(f">{t}: {r['detection_rate'][str(t)] * 100:5.1f}%" for t in THRESHOLDS)
+        print(f"{mode:>9} | {r['frames']} frames | mean conf {r['mean_confidence']:.3f} | {rates}")
+        if "centre_error_px" in r and r["centre_error_px"]["mean"] is not None:
+            err = r["centre_error_px"]
+            print(f"{'':>9} | centre error {err['mean']:.1f} px (p95 {err['p95']:.1f} px)")
+    if report["mode_centre_difference_px"] is not None:
+        print(f"-- Centre difference between modes: {report['mode_centre_difference_px']:.1f} px")
+    print(f"-- Letterbox threshold keeping the stretch detection rate at {args.threshold}: "
+          f"{report['suggested_letterbox_threshold']}")
+
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(report, f, indent=2)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
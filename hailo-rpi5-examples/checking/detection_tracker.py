@@ -0,0 +1,167 @@
+import numpy as np
+
+# -----------------------------------------------------------------------------------------------
+# DETECTION TRACKER / TARGET LOCK
+# -----------------------------------------------------------------------------------------------
+# hailofilter returns detections in arbitrary order, so with two markers in view "the first one"
+# can flip between frames. This gives every detection a stable track id across frames and locks
+# onto one target until it is really gone. The callback publishes the detections ranked, the
+# locked target first, with its id in the message header (detection_protocol v3).
+#
+# Matching: greedy on IoU, then on centroid distance for what is left (a small marker at altitude
+# can move more than its own size between frames, where IoU drops to 0). If the pipeline has a
+# hailotracker element, its HAILO_UNIQUE_ID is used as the track id instead; detections without
+# one in the same frame are still matched against this tracker's own tracks. The two kinds of
+# ids come from disjoint ranges, so they never collide.
+#
+# Ranking: confidence, minus a penalty for distance from the image centre.
+# -----------------------------------------------------------------------------------------------
+IOU_THRESHOLD = 0.3      # Min IoU to continue a track
+CENTROID_GATE = 0.15     # Max centre distance (normalised image units, 0-1) to continue a track
+MAX_MISSES = 5           # Frames a track survives without a detection
+MIN_HITS_TO_LOCK = 3     # A new track must be seen this many frames before it can take the lock
+CENTER_WEIGHT = 0.2      # Ranking penalty per unit of distance from the image centre
+MAX_TRACK_ID = 0xFFFF    # Track ids are u16 on the wire, 0 = untracked
+HAILO_ID_COUNT = 0x8000  # Ids 1..HAILO_ID_COUNT carry HAILO_UNIQUE_ID, the rest are assigned here
+
+
+def iou_matrix(a, b):
+    """IoU of every box in `a` (N x 4) against every box in `b` (M x 4), boxes as xmin, ymin, xmax, ymax."""
+    x1 = np.maximum(a[:, None, 0], b[None, :, 0])
+    y1 = np.maximum(a[:, None, 1], b[None, :, 1])
+    x2 = np.minimum(a[:, None, 2], b[None, :, 2])
+    y2 = np.minimum(a[:, None, 3], b[None, :, 3])
+    inter = np.clip(x2 - x1, 0.0, None) * np.clip(y2 - y1, 0.0, None)
+    area_a = (a[:, 2] - a[:, 0]) * (a[:, 3] - a[:, 1])
+    area_b = (b[:, 2] - b[:, 0]) * (b[:, 3] - b[:, 1])
+    return inter / np.maximum(area_a[:, None] + area_b[None, :] - inter, 1e-9)
+
+
+def score(bbox, confidence):
+    """Ranking score: confidence, penalised by the distance of the box centre from the image centre."""
+    xmin, ymin, xmax, ymax = bbox
+    return confidence - CENTER_WEIGHT * np.hypot((xmin + xmax) / 2 - 0.5, (ymin + ymax) / 2 - 0.5)
+
+
+class Track:
+    __slots__ = ("track_id", "bbox", "label_id", "hits", "misses")
+
+    def __init__(self, track_id, bbox, label_id):
+        self.track_id = track_id
+        self.bbox = bbox
+        self.label_id = label_id
+        self.hits = 1
+        self.misses = 0
+
+
+class DetectionTracker:
+    def __init__(self):
+        self.tracks = {}
+        self.locked_id = 0
+        self._next_id = HAILO_ID_COUNT + 1
+
+    def update(self, detections):
+        """
+        `detections`: list of (bbox, confidence, label_id, unique_id or None) for one frame.
+        Returns (ranked, locked_id): ranked = [(bbox, confidence, label_id, track_id), ...],
+        the locked target first.
+        """
+        track_ids = [0] * len(detections)
+        untracked = []
+        for i, det in enumerate(detections):
+            if det[3] is not None:
+                track_ids[i] = self._unique(det)
+            else:
+                untracked.append(i)
+        for i, track_id in zip(untracked, self._associate([detections[i] for i in untracked])):
+            track_ids[i] = track_id
+
+        seen = set(track_ids)
+        for track_id in list(self.tracks):
+            if track_id not in seen:
+                track = self.tracks[track_id]
+                track.misses += 1
+                if track.misses > MAX_MISSES:
+                    del self.tracks[track_id]
+
+        self._update_lock(detections, track_ids)
+
+        ranked = sorted(((det[0], det[1], det[2], track_id) for det, track_id in zip(detections, track_ids)),
+                        key=lambda item: (item[3] != self.locked_id, -score(item[0], item[1])))
+        return ranked, self.locked_id
+
+    def _unique(self, detection):
+        """Track continued by hailotracker: take its id."""
+        bbox, _confidence, label_id, unique_id = detection
+        track_id = unique_id % HAILO_ID_COUNT + 1
+        self._hit(track_id, bbox, label_id)
+        return track_id
+
+    def _associate(self, detections):
+        track_ids = [0] * len(detections)
+        if not detections:
+            return track_ids
+
+        boxes = np.array([det[0] for det in detections], dtype=float)
+        # Own tracks only: hailotracker's are continued by their unique id
+        candidates = [t for t in self.tracks.values() if t.misses <= MAX_MISSES and t.track_id > HAILO_ID_COUNT]
+        free_dets = set(range(len(detections)))
+
+        if candidates:
+            track_boxes = np.array([t.bbox for t in candidates], dtype=float)
+            free_tracks = set(range(len(candidates)))
+
+            # 1. Greedy on IoU, best pairs first
+            iou = iou_matrix(boxes, track_boxes)
+            for d, t in zip(*np.unravel_index(np.argsort(-iou, axis=None), iou.shape)):
+                if iou[d, t] < IOU_THRESHOLD:
+                    break
+                if d in free_dets and t in free_tracks and detections[d][2] == candidates[t].label_id:
+                    track_ids[d] = candidates[t].track_id
+                    free_dets.discard(d)
+                    free_tracks.discard(t)
+
+            # 2. Greedy on centroid distance for the rest
+            centres = (boxes[:, :2] + boxes[:, 2:]) / 2
+            track_centres = (track_boxes[:, :2] + track_boxes[:, 2:]) / 2
+            dist = np.linalg.norm(centres[:, None] - track_centres[None], axis=2)
+            for d, t in zip(*np.unravel_index(np.argsort(dist, axis=None), dist.shape)):
+                if dist[d, t] > CENTROID_GATE:
+                    break
+                if d in free_dets and t in free_tracks and detections[d][2] == candidates[t].label_id:
+                    track_ids[d] = candidates[t].track_id
+                    free_dets.discard(d)
+                    free_tracks.discard(t)
+
+        for d in free_dets:
+            track_ids[d] = self._new_id()
+        for d, track_id in enumerate(track_ids):
+            self._hit(track_id, detections[d][0], detections[d][2])
+        return track_ids
+
+    def _hit(self, track_id, bbox, label_id):
+        track = self.tracks.get(track_id)
+        if track is None:
+            self.tracks[track_id] = Track(track_id, tuple(bbox), label_id)
+            return
+        track.hits += 1
+        track.bbox = tuple(bbox)
+        track.misses = 0
+
+    def _update_lock(self, detections, track_ids):
+        """Keep the lock while its track lives; otherwise lock onto the best confirmed track in view."""
+        if self.locked_id in self.tracks:
+            return
+        best, best_score = 0, None
+        for det, track_id in zip(detections, track_ids):
+            if self.tracks[track_id].hits < MIN_HITS_TO_LOCK:
+                continue
+            det_score = score(det[0], det[1])
+            if best_score is None or det_score > best_score:
+                best, best_score = track_id, det_score
+        self.locked_id = best
+
+    def _new_id(self):
+        track_id = self._next_id
+        self._next_id = track_id + 1 if track_id < MAX_TRACK_ID else HAILO_ID_COUNT + 1
+        return track_id
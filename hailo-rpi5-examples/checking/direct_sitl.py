@@ -1,6 +1,6 @@
 import os
+import sys
 import gi
-import json
 import zmq
 from pathlib import Path
 
@@ -9,6 +9,14 @@ from gi.repository import Gst, GLib
 import hailo
 from hailo_apps.hailo_app_python.core.gstreamer.gstreamer_app import app_callback_class
 from hailo_apps.hailo_app_python.apps.detection_simple.detection_pipeline_simple import GStreamerDetectionApp
+from frame_timing import FrameTiming
+from detection_tracker import DetectionTracker
+from roi_crop import RoiCropper
+from pipelines import sitl_pipeline
+
+# Wire format is shared with the subscriber in flight_control/addc
+sys.path.append(str(Path(__file__).resolve().parents[2] / "flight_control" / "addc"))
+from detection_protocol import DetectionEncoder
 
 # -----------------------------------------------------------------------------------------------
 # CONFIGURATION
@@ -19,6 +27,16 @@ POST_PROCESS_SO = "/usr/local/hailo/resources/so/libyolo_hailortpp_postprocess.s
 ZMQ_PORT = 5555
 FRAME_WIDTH = 640
 FRAME_HEIGHT = 640
+ZMQ_JSON_DEBUG = False # Publish JSON instead of the binary format (human-readable on the wire)
+ROI_MODE = False       # Crop inference to a native-resolution window around the target (see roi_crop.py)
+
+# --- GROUND-STATION PREVIEW (see preview_encoder.py, compare with bench_preview.py) ---
+PREVIEW_ENCODER = "auto" # "auto" | "v4l2" (hardware) | "x264" | "none"
+PREVIEW_PORT = 5001
+PREVIEW_WIDTH = None     # e.g. 320 x 320 for a low-res preview, None = inference resolution
+PREVIEW_HEIGHT = None
+PREVIEW_FPS = None       # e.g. 10, None = every frame
+PREVIEW_BITRATE = None   # kbit/s, None = encoder default
 # -----------------------------------------------------------------------------------------------
 
 class user_app_callback_class(app_callback_class):
@@ -32,6 +50,10 @@ class user_app_callback_class(app_callback_class):
         self.socket.setsockopt(zmq.SNDHWM, 1)
         
         self.socket.bind(f"tcp://*:{ZMQ_PORT}")
+        self.encoder = DetectionEncoder()
+        self.timing = FrameTiming()
+        self.tracker = DetectionTracker()
+        self.roi = RoiCropper(enabled=ROI_MODE)
         print(f"ZMQ Publisher started on port {ZMQ_PORT}")
 
 def app_callback(pad, info, user_data):
@@ -40,48 +62,46 @@ def app_callback(pad, info, user_data):
     if buffer is None:
         return Gst.PadProbeReturn.OK
     
+    # Capture time + per-stage stamps for this frame (latency tracing, see frame_timing.py)
+    capture_ts, pts_ns, stage_times = user_data.timing.pop(buffer)
+    # Crop window this frame was inferred on (full frame unless ROI_MODE)
+    window = user_data.roi.pop(buffer)
+    if window is None:
+        return Gst.PadProbeReturn.OK # Crop window of this buffer unknown: its boxes cannot be mapped back
+    
     detections = hailo.get_roi_from_buffer(buffer).get_objects_typed(hailo.HAILO_DETECTION)
-    valid_detections = []
+    candidates = []
     
     for detection in detections:
-        confidence_pct = detection.get_confidence() * 100
+        confidence = detection.get_confidence()
         
-        if confidence_pct > 75: # Slightly lowered to prevent "flicker" loss
+        if confidence > 0.75: # Slightly lowered to prevent "flicker" loss
+            # Normalized bbox; the encoder derives the (-1.0 to 1.0) center error from it
             bbox = detection.get_bbox()
-            
-            # 1. Get Normalized Coordinates
-            norm_xmin = bbox.xmin()
-            norm_ymin = bbox.ymin()
-            norm_xmax = bbox.xmax()
-            norm_ymax = bbox.ymax()
-
-            # 2. Calculate Center
-            norm_center_x = (norm_xmin + norm_xmax) / 2
-            norm_center_y = (norm_ymin + norm_ymax) / 2
-
-            # 3. Calculate Error (-1.0 to 1.0)
-            # Center of screen is 0.5. 
-            # If object is at 0.0 (Left), error is -1.0
-            # If object is at 1.0 (Right), error is +1.0
-            error_x = (norm_center_x - 0.5) * 2
-            error_y = (norm_center_y - 0.5) * 2
-
-            obj_data = {
-                "normalized_error": {
-                    "x": float(f"{error_x:.4f}"), 
-                    "y": float(f"{error_y:.4f}")
-                }
-            }
-            valid_detections.append(obj_data)
+            # Set when a hailotracker element is in the pipeline, otherwise DetectionTracker assigns ids
+            unique_ids = detection.get_objects_typed(hailo.HAILO_UNIQUE_ID)
+            box = RoiCropper.to_full_frame((bbox.xmin(), bbox.ymin(), bbox.xmax(), bbox.ymax()), window)
+            candidates.append((box, confidence, detection.get_class_id(),
+                               unique_ids[0].get_id() if unique_ids else None))
+    
+    # Stable track ids + target lock, ranked with the locked target first (see detection_tracker.py)
+    ranked, locked_id = user_data.tracker.update(candidates)
+    # Next frames: crop around the target we follow, or back to full frame once it is lost
+    user_data.roi.update(ranked[0][0] if ranked else None)
+    encoder = user_data.encoder
+    encoder.reset()
+    for (xmin, ymin, xmax, ymax), confidence, label_id, track_id in ranked:
+        encoder.add(xmin, ymin, xmax, ymax, confidence, label_id, track_id)
     
     # Send via ZMQ
-    if len(valid_detections) > 0:
-        json_output = {
-            "detections": valid_detections
-        }
+    if encoder.count > 0:
+        if ZMQ_JSON_DEBUG:
+            msg = encoder.encode_json(user_data.get_count(), capture_ts, pts_ns, stage_times, locked_id)
+        else:
+            msg = encoder.encode(user_data.get_count(), capture_ts, pts_ns, stage_times, locked_id)
         try:
             # NOBLOCK ensures the camera never freezes if network is busy
-            user_data.socket.send_json(json_output, flags=zmq.NOBLOCK)
+            user_data.socket.send(msg, flags=zmq.NOBLOCK)
         except zmq.Again:
             pass # Drop frame if busy (Good for low latency)
         except Exception as e:
@@ -92,26 +112,11 @@ def app_callback(pad, info, user_data):
 class GStreamerUDPHailoApp(GStreamerDetectionApp):
     def __init__(self, callback, user_data):
         super().__init__(callback, user_data)
+        user_data.timing.attach(self.pipeline, source="depay")
+        user_data.roi.attach(self.pipeline)
         
     def get_pipeline_string(self):
-        # --- LATENCY FIX 2: Optimized Pipeline Queue ---
-        # "queue leaky=downstream max-size-buffers=1" forces the pipeline
-        # to drop old frames instantly if it gets backed up.
-        pipeline = (
-            f"udpsrc port=5000 buffer-size=0 ! "
-            f"application/x-rtp, media=(string)video, clock-rate=(int)90000, encoding-name=(string)H264, payload=(int)96 ! "
-            f"rtph264depay ! h264parse ! avdec_h264 ! "
-            f"queue leaky=downstream max-size-buffers=1 ! " 
-            f"videoscale ! videoconvert ! "
-            f"video/x-raw, format=RGB, width=640, height=640, pixel-aspect-ratio=1/1 ! "
-            f"hailonet hef-path={HEF_PATH} ! "
-            f"hailofilter so-path={POST_PROCESS_SO} qos=false ! "
-            f"identity name=identity_callback ! " 
-            f"hailooverlay ! "
-            f"videoconvert ! x264enc tune=zerolatency speed-preset=ultrafast ! "
-            f"rtph264pay ! udpsink host={HOST_IP} port=5001 sync=false"
-        )
-        return pipeline
+        return sitl_pipeline(globals())
 
 if __name__ == "__main__":
     project_root = Path(__file__).resolve().parent.parent
@@ -1,6 +1,6 @@
 import os
+import sys
 import gi
-import json
 import zmq
 from pathlib import Path
 
@@ -9,6 +9,15 @@ from gi.repository import Gst, GLib
 import hailo
 from hailo_apps.hailo_app_python.core.gstreamer.gstreamer_app import app_callback_class
 from hailo_apps.hailo_app_python.apps.detection_simple.detection_pipeline_simple import GStreamerDetectionApp
+from frame_timing import FrameTiming
+from detection_tracker import DetectionTracker
+from letterbox import Letterbox
+from pipelines import recorder_pipeline
+from queue_stats import QueueStats
+
+# Wire format is shared with the subscriber in flight_control/addc
+sys.path.append(str(Path(__file__).resolve().parents[2] / "flight_control" / "addc"))
+from detection_protocol import DetectionEncoder
 
 # -----------------------------------------------------------------------------------------------
 # CONFIGURATION
@@ -20,6 +29,11 @@ RECORD_PATH = "/home/pi/flight_record.mkv"
 HEF_PATH = "/home/pi/aroha_addc/hailo-rpi5-examples/custom_hef/qr_simulation.hef"
 POST_PROCESS_SO = "/usr/local/hailo/resources/so/libyolo_hailortpp_postprocess.so"
 ZMQ_PORT = 5555
+ZMQ_JSON_DEBUG = False # Publish JSON instead of the binary format (human-readable on the wire)
+LETTERBOX = True       # Pad 640x480 to 640x640 instead of stretching (see letterbox.py)
+REC_QUEUE_BUFFERS = 30 # Recording branch backlog (frames, ~1 s) - older frames are dropped beyond this
+STATS_PERIOD = 5       # Seconds between queue throughput / drop reports
+STATS_PATH = "/dev/shm/pipeline_stats.json" # Latest drop counts per branch, on tmpfs (None = print only)
 # -----------------------------------------------------------------------------------------------
 
 class user_app_callback_class(app_callback_class):
@@ -29,6 +43,11 @@ class user_app_callback_class(app_callback_class):
         self.socket = self.context.socket(zmq.PUB)
         self.socket.setsockopt(zmq.SNDHWM, 1) # Internal ZMQ buffer limit
         self.socket.bind(f"tcp://*:{ZMQ_PORT}")
+        self.encoder = DetectionEncoder()
+        self.timing = FrameTiming()
+        self.tracker = DetectionTracker()
+        self.letterbox = Letterbox(CAM_WIDTH, CAM_HEIGHT) if LETTERBOX else None
+        self.stats = QueueStats()
         print(f"[Hailo] ZMQ Publisher bound to port {ZMQ_PORT}")
 
 def app_callback(pad, info, user_data):
@@ -37,31 +56,39 @@ def app_callback(pad, info, user_data):
     if buffer is None:
         return Gst.PadProbeReturn.OK
     
+    # Capture time + per-stage stamps for this frame (latency tracing, see frame_timing.py)
+    capture_ts, pts_ns, stage_times = user_data.timing.pop(buffer)
+    
     detections = hailo.get_roi_from_buffer(buffer).get_objects_typed(hailo.HAILO_DETECTION)
-    valid_detections = []
+    candidates = []
     
     for detection in detections:
-        if detection.get_confidence() > 0.50: 
+        confidence = detection.get_confidence()
+        if confidence > 0.50: 
             bbox = detection.get_bbox()
-            norm_center_x = (bbox.xmin() + bbox.xmax()) / 2.0
-            norm_center_y = (bbox.ymin() + bbox.ymax()) / 2.0
-
-            error_x = (norm_center_x - 0.5) * 2
-            error_y = (norm_center_y - 0.5) * 2
-
-            obj_data = {
-                "label": detection.get_label(),
-                "normalized_error": {
-                    "x": float(f"{error_x:.4f}"), 
-                    "y": float(f"{error_y:.4f}")
-                }
-            }
-            valid_detections.append(obj_data)
+            box = (bbox.xmin(), bbox.ymin(), bbox.xmax(), bbox.ymax())
+            if user_data.letterbox:
+                # Padded model frame -> camera image, so the error is relative to the true image centre
+                box = user_data.letterbox.to_image(*box)
+            # Set when a hailotracker element is in the pipeline, otherwise DetectionTracker assigns ids
+            unique_ids = detection.get_objects_typed(hailo.HAILO_UNIQUE_ID)
+            candidates.append((box, confidence, detection.get_class_id(),
+                               unique_ids[0].get_id() if unique_ids else None))
+    
+    # Stable track ids + target lock, ranked with the locked target first (see detection_tracker.py)
+    ranked, locked_id = user_data.tracker.update(candidates)
+    encoder = user_data.encoder
+    encoder.reset()
+    for (xmin, ymin, xmax, ymax), confidence, label_id, track_id in ranked:
+        encoder.add(xmin, ymin, xmax, ymax, confidence, label_id, track_id)
     
-    if len(valid_detections) > 0:
-        json_output = {"detections": valid_detections}
+    if encoder.count > 0:
+        if ZMQ_JSON_DEBUG:
+            msg = encoder.encode_json(user_data.get_count(), capture_ts, pts_ns, stage_times, locked_id)
+        else:
+            msg = encoder.encode(user_data.get_count(), capture_ts, pts_ns, stage_times, locked_id)
         try:
-            user_data.socket.send_json(json_output, flags=zmq.NOBLOCK)
+            user_data.socket.send(msg, flags=zmq.NOBLOCK)
         except zmq.Again:
             pass 
         
@@ -70,52 +97,13 @@ def app_callback(pad, info, user_data):
 class GStreamerUSBRecorderApp(GStreamerDetectionApp):
     def __init__(self, callback, user_data):
         super().__init__(callback, user_data)
+        user_data.timing.attach(self.pipeline, source="source")
+        # Frames in / out / dropped per branch: src_q = inference backlog, ctrl_q = detection rate, rec_q = recording
+        user_data.stats.attach(self.pipeline, ["src_q", "ctrl_q", "rec_q"])
+        GLib.timeout_add_seconds(STATS_PERIOD, user_data.stats.report, STATS_PATH)
         
     def get_pipeline_string(self):
-        # ---------------------------------------------------------
-        # ROBUST RECORDING PIPELINE (Fixes Black Screen)
-        # ---------------------------------------------------------
-        pipeline = (
-            # 1. SOURCE: USB Webcam (640x480)
-            f"v4l2src device={CAM_DEVICE} io-mode=2 ! "
-            f"video/x-raw, width={CAM_WIDTH}, height={CAM_HEIGHT}, framerate=30/1 ! "
-            
-            # 2. DROP QUEUE (Force Latest Frame)
-            f"queue name=src_q leaky=downstream max-size-buffers=1 ! "
-            
-            # 3. SCALE & CONVERT (RGB for Hailo)
-            f"videoscale ! "
-            f"videoconvert ! "
-            f"video/x-raw, format=RGB, width=640, height=640, pixel-aspect-ratio=1/1 ! "
-            
-            # 4. INFERENCE
-            f"hailonet hef-path={HEF_PATH} ! "
-            f"hailofilter so-path={POST_PROCESS_SO} qos=false ! "
-            
-            # 5. CONTROL POINT
-            f"identity name=identity_callback ! " 
-            f"hailooverlay ! " 
-            
-            # 6. RECORDING QUEUE
-            f"queue name=rec_q max-size-time=0 max-size-bytes=0 max-size-buffers=0 ! "
-            
-            # 7. COLOR CONVERSION (Fixes Black Screen Part 1)
-            # x264enc needs I420 (YUV), not RGB. We must convert it here.
-            f"videoconvert ! "
-            f"video/x-raw, format=I420 ! "
-            
-            # 8. ENCODING
-            f"x264enc tune=zerolatency speed-preset=superfast bitrate=2500 ! "
-            
-            # 9. PARSING (Fixes Black Screen Part 2)
-            # Critical: Organizing the H.264 stream so .mkv understands it
-            f"h264parse ! "
-            
-            # 10. CONTAINER
-            f"matroskamux ! "
-            f"filesink location={RECORD_PATH}"
-        )
-        return pipeline
+        return recorder_pipeline(globals())
 
 if __name__ == "__main__":
     project_root = Path(__file__).resolve().parent.parent
@@ -0,0 +1,84 @@
+import time
+import threading
+import gi
+
+gi.require_version('Gst', '1.0')
+from gi.repository import Gst
+
+# -----------------------------------------------------------------------------------------------
+# PER-FRAME PIPELINE TIMESTAMPS
+# -----------------------------------------------------------------------------------------------
+# Buffer probes along the pipeline record a wall-clock stamp per stage, keyed by buffer PTS
+# (the PTS survives decode, videoscale, hailonet and hailofilter unchanged). app_callback pops
+# the stamps for its buffer and sends them with the detections; controller.py adds the receive
+# and control stamps and reports the per-stage histogram after landing.
+#
+#   capture        PTS converted to wall clock at the source pad
+#   decoded        frame reaches hailonet (decode + scale + convert + queue)
+#   inferred       frame leaves hailonet
+#   postprocessed  frame leaves hailofilter
+# -----------------------------------------------------------------------------------------------
+MAX_FRAMES_IN_FLIGHT = 64 # Stamps of frames dropped by leaky queues are evicted after this many
+
+
+class FrameTiming:
+    def __init__(self):
+        self._stamps = {}
+        # Source probe, stage probes and app_callback run on different streaming threads
+        self._lock = threading.Lock()
+
+    def attach(self, pipeline, source, inference="hailonet", postprocess="hailofilter"):
+        """
+        `source` is the element whose src pad carries complete frames with their capture PTS
+        (v4l2src, or rtph264depay for an RTP stream).
+        """
+        self._probe(pipeline, source, "src", self._on_source)
+        self._probe(pipeline, inference, "sink", self._stage_probe(1))
+        self._probe(pipeline, inference, "src", self._stage_probe(2))
+        self._probe(pipeline, postprocess, "src", self._stage_probe(3))
+
+    def pop(self, buffer):
+        """Returns (capture_ts, pts_ns, (decoded, inferred, postprocessed)) for a buffer."""
+        with self._lock:
+            stamps = self._stamps.pop(buffer.pts, None)
+        if stamps is None:
+            # Not traced (probes not attached or evicted): fall back to "now" as capture time
+            return time.time(), 0, None
+        return stamps[0], buffer.pts, tuple(stamps[1:])
+
+    def _probe(self, pipeline, element_name, pad_name, callback):
+        element = pipeline.get_by_name(element_name)
+        if element is None:
+            print(f"[Timing] Element '{element_name}' not found, stage not traced")
+            return
+        element.get_static_pad(pad_name).add_probe(Gst.PadProbeType.BUFFER, callback, element)
+
+    def _on_source(self, pad, info, element):
+        buffer = info.get_buffer()
+        if buffer is None or buffer.pts == Gst.CLOCK_TIME_NONE:
+            return Gst.PadProbeReturn.OK
+
+        now = time.time()
+        capture = now
+        clock = element.get_clock()
+        if clock is not None:
+            # PTS is running time at capture: shift "now" back by how long ago that was
+            running_time = clock.get_time() - element.get_base_time()
+            capture = now - max(running_time - buffer.pts, 0) / Gst.SECOND
+
+        with self._lock:
+            self._stamps[buffer.pts] = [capture, 0.0, 0.0, 0.0]
+            if len(self._stamps) > MAX_FRAMES_IN_FLIGHT:
+                self._stamps.pop(next(iter(self._stamps)), None)
+        return Gst.PadProbeReturn.OK
+
+    def _stage_probe(self, index):
+        def on_buffer(pad, info, element):
+            buffer = info.get_buffer()
+            if buffer is not None:
+                with self._lock:
+                    stamps = self._stamps.get(buffer.pts)
+                if stamps is not None:
+                    stamps[index] = time.time()
+            return Gst.PadProbeReturn.OK
+        return on_buffer
@@ -0,0 +1,55 @@
+# -----------------------------------------------------------------------------------------------
+# LETTERBOX PREPROCESSING
+# -----------------------------------------------------------------------------------------------
+# The network input is square (640x640). Stretching a 4:3 camera frame into it squashes the
+# marker; letterboxing scales it to fit, keeping the aspect ratio, and pads the rest with black:
+#
+#   640x480 --videoscale--> 640x480 --videobox--> 640x640 (80 px bars top and bottom)
+#
+# Detections come back normalised to the padded frame. to_image() removes the padding once, in
+# the publisher, so normalized_error is in true camera image coordinates.
+# -----------------------------------------------------------------------------------------------
+MODEL_WIDTH = 640
+MODEL_HEIGHT = 640
+
+
+class Letterbox:
+    def __init__(self, src_width, src_height, dst_width=MODEL_WIDTH, dst_height=MODEL_HEIGHT):
+        scale = min(dst_width / src_width, dst_height / src_height)
+        # Even sizes: some raw formats (I420) cannot be odd
+        self.width = int(round(src_width * scale / 2)) * 2
+        self.height = int(round(src_height * scale / 2)) * 2
+        self.dst_width = dst_width
+        self.dst_height = dst_height
+        self.left = (dst_width - self.width) // 2
+        self.top = (dst_height - self.height) // 2
+        self.right = dst_width - self.width - self.left
+        self.bottom = dst_height - self.height - self.top
+
+    def pipeline(self, video_format="RGB"):
+        """GStreamer fragment: any raw frame -> letterboxed `video_format` at the model size."""
+        return (
+            f"videoscale ! videoconvert ! "
+            f"video/x-raw, format={video_format}, width={self.width}, height={self.height}, pixel-aspect-ratio=1/1 ! "
+            # Negative videobox margins add borders
+            f"videobox left={-self.left} right={-self.right} top={-self.top} bottom={-self.bottom} fill=black ! "
+            f"video/x-raw, format={video_format}, width={self.dst_width}, height={self.dst_height} ! "
+        )
+
+    def to_image(self, xmin, ymin, xmax, ymax):
+        """Normalised bbox in the padded model frame -> normalised bbox in the camera image (clamped)."""
+        def x(v):
+            return min(max((v * self.dst_width - self.left) / self.width, 0.0), 1.0)
+
+        def y(v):
+            return min(max((v * self.dst_height - self.top) / self.height, 0.0), 1.0)
+
+        return x(xmin), y(ymin), x(xmax), y(ymax)
+
+
+def stretch_pipeline(video_format="RGB", dst_width=MODEL_WIDTH, dst_height=MODEL_HEIGHT):
+    """GStreamer fragment: the original preprocessing, scaled to the model size ignoring aspect ratio."""
+    return (
+        f"videoscale add-borders=false ! videoconvert ! "
+        f"video/x-raw, format={video_format}, width={dst_width}, height={dst_height}, pixel-aspect-ratio=1/1 ! "
+    )
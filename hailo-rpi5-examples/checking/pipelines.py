@@ -0,0 +1,81 @@
+from letterbox import Letterbox, stretch_pipeline
+from preview_encoder import preview_branch
+
+# -----------------------------------------------------------------------------------------------
+# APP PIPELINE STRINGS
+# -----------------------------------------------------------------------------------------------
+# The GStreamer descriptions of direct_sitl.py and first_flight.py, built from their
+# CONFIGURATION constants (`config` maps constant name -> value, e.g. the app's globals()).
+# Kept apart from the apps, which import hailo / hailo_apps, so bench_pipelines.py can build
+# the same pipeline on a machine without the Hailo runtime.
+# -----------------------------------------------------------------------------------------------
+
+def sitl_pipeline(config):
+    """direct_sitl.py: Gazebo H.264 over UDP -> optional ROI crop -> inference -> preview."""
+    # --- LATENCY FIX 2: Optimized Pipeline Queue ---
+    # "queue leaky=downstream max-size-buffers=1" forces the pipeline
+    # to drop old frames instantly if it gets backed up.
+    return (
+        f"udpsrc port=5000 buffer-size=0 ! "
+        f"application/x-rtp, media=(string)video, clock-rate=(int)90000, encoding-name=(string)H264, payload=(int)96 ! "
+        f"rtph264depay name=depay ! h264parse ! avdec_h264 ! "
+        f"queue leaky=downstream max-size-buffers=1 ! "
+        f"videocrop name=roi_crop ! "  # Passthrough until RoiCropper sets a window
+        f"videoscale ! videoconvert ! "
+        f"video/x-raw, format=RGB, width=640, height=640, pixel-aspect-ratio=1/1 ! "
+        f"hailonet name=hailonet hef-path={config['HEF_PATH']} ! "
+        f"hailofilter name=hailofilter so-path={config['POST_PROCESS_SO']} qos=false ! "
+        f"identity name=identity_callback ! "
+        f"{preview_branch(config['PREVIEW_ENCODER'], config['HOST_IP'], config['PREVIEW_PORT'], config['PREVIEW_WIDTH'], config['PREVIEW_HEIGHT'], config['PREVIEW_FPS'], config['PREVIEW_BITRATE'])}"
+    )
+
+
+def recorder_pipeline(config):
+    """first_flight.py: USB camera -> inference -> control point, with a leaky recording branch."""
+    width, height = config["CAM_WIDTH"], config["CAM_HEIGHT"]
+    # ---------------------------------------------------------
+    # ROBUST RECORDING PIPELINE (Fixes Black Screen)
+    # ---------------------------------------------------------
+    return (
+        # 1. SOURCE: USB Webcam (640x480)
+        f"v4l2src name=source device={config['CAM_DEVICE']} io-mode=2 ! "
+        f"video/x-raw, width={width}, height={height}, framerate=30/1 ! "
+
+        # 2. DROP QUEUE (Force Latest Frame)
+        f"queue name=src_q leaky=downstream max-size-buffers=1 ! "
+
+        # 3. SCALE & CONVERT (RGB for Hailo) - letterboxed or stretched to 640x640
+        f"{Letterbox(width, height).pipeline() if config['LETTERBOX'] else stretch_pipeline()}"
+
+        # 4. INFERENCE
+        f"hailonet name=hailonet hef-path={config['HEF_PATH']} ! "
+        f"hailofilter name=hailofilter so-path={config['POST_PROCESS_SO']} qos=false ! "
+
+        # 5. CONTROL POINT
+        f"identity name=identity_callback ! "
+
+        # 6. SPLIT: the control path ends here and never waits on recording
+        f"tee name=split "
+        f"split. ! queue name=ctrl_q leaky=downstream max-size-buffers=1 ! fakesink sync=false async=false "
+
+        # 7. RECORDING BRANCH: leaky, bounded - a slow encoder / SD card drops recorded frames only
+        f"split. ! queue name=rec_q leaky=downstream max-size-buffers={config['REC_QUEUE_BUFFERS']} "
+        f"max-size-bytes=0 max-size-time=0 ! "
+        f"hailooverlay ! "
+
+        # 8. COLOR CONVERSION (Fixes Black Screen Part 1)
+        # x264enc needs I420 (YUV), not RGB. We must convert it here.
+        f"videoconvert ! "
+        f"video/x-raw, format=I420 ! "
+
+        # 9. ENCODING
+        f"x264enc tune=zerolatency speed-preset=superfast bitrate=2500 ! "
+
+        # 10. PARSING (Fixes Black Screen Part 2)
+        # Critical: Organizing the H.264 stream so .mkv understands it
+        f"h264parse ! "
+
+        # 11. CONTAINER
+        f"matroskamux ! "
+        f"filesink location={config['RECORD_PATH']}"
+    )
@@ -0,0 +1,58 @@
+import gi
+
+gi.require_version('Gst', '1.0')
+from gi.repository import Gst
+
+# -----------------------------------------------------------------------------------------------
+# GROUND-STATION PREVIEW ENCODER
+# -----------------------------------------------------------------------------------------------
+# The annotated return stream competes with decode and post-process for the Pi's cores. This
+# builds the preview branch (everything after the detection callback) for one of:
+#
+#   "v4l2"  hardware H.264 (v4l2h264enc) - Pi 4 and earlier; the Pi 5 has no H.264 encoder block
+#   "x264"  software H.264, ultrafast / zerolatency (the original preview)
+#   "auto"  v4l2 if the element exists, otherwise x264
+#   "none"  no preview at all
+#
+# A lower resolution / frame rate (PREVIEW_WIDTH / HEIGHT / FPS) cuts the encode cost roughly
+# in proportion. The branch starts with a leaky single-buffer queue so a slow encoder drops
+# preview frames instead of stalling inference.
+# -----------------------------------------------------------------------------------------------
+MODES = ("auto", "v4l2", "x264", "none")
+
+
+def resolve_mode(mode):
+    """"auto" -> the encoder actually available here."""
+    if mode == "auto":
+        return "v4l2" if Gst.ElementFactory.find("v4l2h264enc") is not None else "x264"
+    return mode
+
+
+def preview_branch(mode, host, port, width=None, height=None, fps=None, bitrate=None):
+    """
+    GStreamer fragment that ends the pipeline: overlay + encode + RTP/UDP to host:port.
+    `width`/`height`/`fps` None = keep the inference frame; `bitrate` in kbit/s (None = encoder default).
+    """
+    mode = resolve_mode(mode)
+    if mode not in MODES:
+        raise ValueError(f"Unknown preview encoder '{mode}' (expected one of: {', '.join(MODES)})")
+    if mode == "none":
+        return "fakesink sync=false async=false"
+
+    branch = "queue name=preview_q leaky=downstream max-size-buffers=1 ! hailooverlay ! "
+    if fps:
+        branch += f"videorate drop-only=true ! video/x-raw, framerate={fps}/1 ! "
+    if width and height:
+        branch += f"videoscale ! video/x-raw, width={width}, height={height} ! "
+
+    if mode == "v4l2":
+        controls = f'extra-controls="controls,video_bitrate={bitrate * 1000}" ' if bitrate else ""
+        branch += (
+            f"videoconvert ! video/x-raw, format=I420 ! "
+            f"v4l2h264enc {controls}! video/x-h264, level=(string)4 ! h264parse ! "
+            f"rtph264pay config-interval=1 ! "
+        )
+    else:
+        rate = f"bitrate={bitrate} " if bitrate else ""
+        branch += f"videoconvert ! x264enc tune=zerolatency speed-preset=ultrafast {rate}! rtph264pay ! "
+    return branch + f"udpsink host={host} port={port} sync=false"
@@ -0,0 +1,71 @@
+import json
+import time
+import gi
+
+gi.require_version('Gst', '1.0')
+from gi.repository import Gst
+
+# -----------------------------------------------------------------------------------------------
+# QUEUE THROUGHPUT / DROP COUNTERS
+# -----------------------------------------------------------------------------------------------
+# Counts buffers entering and leaving each named queue with pad probes. For a leaky queue the
+# difference (minus what is still queued) is the number of frames it dropped:
+#
+#   dropped = in - out - current-level-buffers
+#
+# report() prints in/out rates and drops per queue since the last report and writes the totals
+# to a JSON file, so a slow branch shows up as drops in its own queue instead of as a stall.
+# -----------------------------------------------------------------------------------------------
+
+
+class QueueStats:
+    def __init__(self):
+        self.queues = {}
+        self._counts = {}
+        self._last = {}
+        self._last_time = time.monotonic()
+
+    def attach(self, pipeline, names):
+        for name in names:
+            queue = pipeline.get_by_name(name)
+            if queue is None:
+                print(f"[Stats] Queue '{name}' not found, not counted")
+                continue
+            self.queues[name] = queue
+            self._counts[name] = [0, 0]
+            self._last[name] = (0, 0, 0)
+            queue.get_static_pad("sink").add_probe(Gst.PadProbeType.BUFFER, self._count, (name, 0))
+            queue.get_static_pad("src").add_probe(Gst.PadProbeType.BUFFER, self._count, (name, 1))
+
+    def totals(self):
+        """{queue: {"in", "out", "dropped", "queued"}} since start."""
+        totals = {}
+        for name, queue in self.queues.items():
+            frames_in, frames_out = self._counts[name]
+            queued = queue.get_property("current-level-buffers")
+            totals[name] = {"in": frames_in, "out": frames_out, "queued": queued,
+                            "dropped": max(frames_in - frames_out - queued, 0)}
+        return totals
+
+    def report(self, path=None):
+        now = time.monotonic()
+        elapsed = max(now - self._last_time, 1e-6)
+        totals = self.totals()
+        parts = []
+        for name, t in totals.items():
+            last_in, last_out, last_dropped = self._last[name]
+            parts.append(f"{name}: in {(t['in'] - last_in) / elapsed:4.1f} fps, out {(t['out'] - last_out) / elapsed:4.1f} fps, "
+                         f"dropped {t['dropped'] - last_dropped}")
+            self._last[name] = (t["in"], t["out"], t["dropped"])
+        self._last_time = now
+        print("[Stats] " + " | ".join(parts))
+
+        if path:
+            with open(path, "w") as f:
+                json.dump({"time": time.time(), "queues": totals}, f, indent=2)
+        return True # Keep the GLib timeout running
+
+    def _count(self, pad, info, key):
+        name, index = key
+        self._counts[name][index] += 1
+        return Gst.PadProbeReturn.OK
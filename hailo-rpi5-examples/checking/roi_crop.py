@@ -0,0 +1,145 @@
+import threading
+import gi
+
+gi.require_version('Gst', '1.0')
+from gi.repository import Gst
+
+# -----------------------------------------------------------------------------------------------
+# REGION-OF-INTEREST CROP INFERENCE
+# -----------------------------------------------------------------------------------------------
+# A `videocrop name=roi_crop` element sits in front of videoscale. While a target is tracked,
+# app_callback moves the crop to a square window around it at (close to) native resolution, so:
+#   - at altitude a small marker is no longer shrunk away by the full-frame downscale
+#   - near the ground videoscale has far fewer pixels to process
+# After ROI_LOST_FRAMES frames without the target the crop opens back to the full frame.
+#
+# The window only moves when the target leaves the central dead-band (ROI_DEADBAND) or its size
+# no longer fits (ROI_RESIZE_BAND): every move renegotiates caps downstream, so it must not
+# happen on every frame.
+#
+# app_callback only stores the wanted window (one tuple, replaced atomically). A probe on the
+# crop's sink pad applies it between buffers, on the streaming thread, so videocrop never sees a
+# half-updated window. A probe on the src pad records, per PTS (like frame_timing.py), the window
+# that buffer was cropped with - checked against the pad's negotiated caps - and app_callback
+# maps that buffer's bboxes back to full-frame coordinates with it.
+# -----------------------------------------------------------------------------------------------
+ROI_MARGIN = 3.0         # Window side = target size * this (room for motion between frames)
+ROI_MIN_SIZE = 320       # Smallest window side (source pixels) - below this upscaling adds nothing
+ROI_LOST_FRAMES = 3      # Frames without the target before returning to the full frame
+ROI_DEADBAND = 0.2       # Target centre may drift this far from the window centre (x window side)
+ROI_RESIZE_BAND = 0.25   # Wanted side may differ by this fraction of the current side before resizing
+MAX_FRAMES_IN_FLIGHT = 64
+
+FULL_FRAME = (0.0, 0.0, 1.0, 1.0) # x, y, width, height of the window, normalised to the source
+NO_CROP = (0, 0, 0, 0)            # videocrop left, top, right, bottom
+_MISSING = object()
+
+
+class RoiCropper:
+    def __init__(self, enabled=True):
+        self.enabled = enabled
+        self.element = None
+        self.source_size = None  # (width, height) of the frames entering the crop
+        self._wanted = NO_CROP   # Written by app_callback, applied by the sink pad probe
+        self._applied = NO_CROP  # Streaming thread only
+        self._cropped = False    # A crop has been applied at least once (set by the streaming thread)
+        self._windows = {}
+        self._lock = threading.Lock()
+        self._lost = ROI_LOST_FRAMES
+
+    def attach(self, pipeline, element="roi_crop"):
+        self.element = pipeline.get_by_name(element)
+        if self.element is None:
+            print(f"[ROI] Element '{element}' not found, full-frame inference only")
+            return
+        self.element.get_static_pad("sink").add_probe(Gst.PadProbeType.BUFFER, self._on_sink_buffer, None)
+        self.element.get_static_pad("src").add_probe(Gst.PadProbeType.BUFFER, self._on_src_buffer, None)
+
+    def pop(self, buffer):
+        """
+        Window (x, y, w, h), normalised to the source frame, that was applied to this buffer.
+        None if it could not be established (detections of that buffer cannot be mapped).
+        """
+        with self._lock:
+            window = self._windows.pop(buffer.pts, _MISSING)
+        if window is not _MISSING:
+            return window
+        # Not stamped (evicted, or stamping off): only certain to be the full frame if nothing was ever cropped
+        return None if self._cropped else FULL_FRAME
+
+    @staticmethod
+    def to_full_frame(bbox, window):
+        """Normalised bbox inside the cropped frame -> normalised bbox in the source frame."""
+        x, y, w, h = window
+        xmin, ymin, xmax, ymax = bbox
+        return (x + xmin * w, y + ymin * h, x + xmax * w, y + ymax * h)
+
+    def update(self, target):
+        """
+        Chooses the crop for the next frames from the locked target's full-frame bbox
+        (None = not seen this frame).
+        """
+        if not self.enabled or self.element is None or self.source_size is None:
+            return
+        if target is None:
+            self._lost += 1
+            if self._lost == ROI_LOST_FRAMES:
+                self._wanted = NO_CROP
+            return
+        self._lost = 0
+
+        width, height = self.source_size
+        xmin, ymin, xmax, ymax = target
+        centre_x, centre_y = (xmin + xmax) / 2 * width, (ymin + ymax) / 2 * height
+        side = max((xmax - xmin) * width, (ymax - ymin) * height) * ROI_MARGIN
+        side = int(min(max(side, ROI_MIN_SIZE), width, height))
+
+        left, top, right, bottom = self._wanted
+        if self._wanted != NO_CROP:
+            current = width - left - right
+            drift = max(abs(centre_x - (left + current / 2)), abs(centre_y - (top + current / 2)))
+            if drift <= ROI_DEADBAND * current and abs(side - current) <= ROI_RESIZE_BAND * current:
+                return # Still well inside the window: keep it (no renegotiation)
+
+        # Square window centred on the target, clamped inside the frame
+        left = int(min(max(centre_x - side / 2, 0), width - side))
+        top = int(min(max(centre_y - side / 2, 0), height - side))
+        self._wanted = (left, top, width - left - side, height - top - side)
+
+    def _on_sink_buffer(self, pad, info, _data):
+        """Streaming thread, before videocrop handles the buffer: apply the wanted window whole."""
+        if self.source_size is None:
+            caps = pad.get_current_caps()
+            if caps is not None:
+                structure = caps.get_structure(0)
+                self.source_size = (structure.get_value("width"), structure.get_value("height"))
+
+        wanted = self._wanted
+        if wanted != self._applied:
+            for name, value in zip(("left", "top", "right", "bottom"), wanted):
+                self.element.set_property(name, value)
+            self._applied = wanted
+            self._cropped = self._cropped or wanted != NO_CROP
+        return Gst.PadProbeReturn.OK
+
+    def _on_src_buffer(self, pad, info, _data):
+        buffer = info.get_buffer()
+        if buffer is None or self.source_size is None or not self.enabled:
+            return Gst.PadProbeReturn.OK
+
+        # The negotiated output size must match the applied window, or the mapping is unknown
+        window = None
+        caps = pad.get_current_caps()
+        left, top, right, bottom = self._applied
+        width, height = self.source_size
+        if caps is not None:
+            structure = caps.get_structure(0)
+            out_width, out_height = structure.get_value("width"), structure.get_value("height")
+            if (out_width, out_height) == (width - left - right, height - top - bottom):
+                window = (left / width, top / height, out_width / width, out_height / height)
+
+        with self._lock:
+            self._windows[buffer.pts] = window
+            if len(self._windows) > MAX_FRAMES_IN_FLIGHT:
+                self._windows.pop(next(iter(self._windows)), None)
+        return Gst.PadProbeReturn.OK
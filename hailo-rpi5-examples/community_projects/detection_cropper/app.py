@@ -1,26 +1,25 @@
 import gi
 gi.require_version('Gst', '1.0')
 from gi.repository import Gst
-import numpy as np
+import sys
 import pathlib
 import hailo
 from hailo_apps.hailo_app_python.core.gstreamer.gstreamer_app import app_callback_class
 from pipeline import GStreamerDetectionCropperApp
 
+# Depth statistics are shared with basic_pipelines/depth.py
+sys.path.append(str(pathlib.Path(__file__).resolve().parents[2] / "basic_pipelines"))
+from depth_stats import DepthStats
+
 # User-defined class to be used in the callback function: Inheritance from the app_callback_class
 class user_app_callback_class(app_callback_class):
 
+    def __init__(self):
+        super().__init__()
+        self.depth_stats = DepthStats()  # Reuses its buffers from frame to frame
+
     def calculate_average_depth(self, depth_mat):
-        depth_values = np.array(depth_mat).flatten()  # Flatten the array and filter out outlier pixels
-        try:
-            m_depth_values = depth_values[depth_values <= np.percentile(depth_values, 95)]  # drop 5% of highest values (outliers)          
-        except Exception as e:
-            m_depth_values = np.array([])
-        if len(m_depth_values) > 0:
-            average_depth = np.mean(m_depth_values)  # Calculate the average depth of the pixels
-        else:
-            average_depth = 0  # Default value if no valid pixels are found
-        return average_depth
+        return self.depth_stats.mean(depth_mat)  # Mean without the 5% highest values (outliers)
 
 # User-defined callback function: This is the callback function that will be called when data is available from the pipeline
 def app_callback(pad, info, user_data):
@@ -33,18 +32,23 @@ def app_callback(pad, info, user_data):
     # Get the detections from the buffer
     roi = hailo.get_roi_from_buffer(buffer)
     detections = roi.get_objects_typed(hailo.HAILO_DETECTION)
-    # Parse the detections
+    # Parse the detections, collecting the depth masks of the whole frame
+    tracked = []
+    depth_masks = []
     for detection in detections:
         track_id = 0
         track = detection.get_objects_typed(hailo.HAILO_UNIQUE_ID)
         if len(track) > 0:
             track_id = track[0].get_id()
         depth_mat = detection.get_objects_typed(hailo.HAILO_DEPTH_MASK)
-        if len(depth_mat) > 0:  # since depth is only on detections
-            detection_average_depth = user_data.calculate_average_depth(depth_mat[0].get_data())
-        else:
-            detection_average_depth = 0
-        print(f'Frame {user_data.frame_count}, Detection {detection.get_label()} ({track_id}) average depth: {detection_average_depth:.2f}')
+        # since depth is only on detections; an empty mask gives depth 0
+        depth_masks.append(depth_mat[0].get_data() if len(depth_mat) > 0 else [])
+        tracked.append((detection.get_label(), track_id))
+
+    # One batched computation for all detections (see basic_pipelines/depth_stats.py)
+    average_depths = user_data.depth_stats.compute(depth_masks)["mean"]
+    for (label, track_id), detection_average_depth in zip(tracked, average_depths):
+        print(f'Frame {user_data.frame_count}, Detection {label} ({track_id}) average depth: {detection_average_depth:.2f}')
 
     return Gst.PadProbeReturn.OK
 
@@ -1,4 +1,5 @@
 import unittest
+import numpy as np
 from unittest.mock import patch, MagicMock
 from app import user_app_callback_class, app_callback
 from gi.repository import Gst
@@ -11,6 +12,21 @@ class TestUserAppCallbackClass(unittest.TestCase):
         average_depth = user_data.calculate_average_depth(depth_mat)
         self.assertAlmostEqual(average_depth, 3.0, places=1)
 
+    def test_batched_depth_statistics(self):
+        user_data = user_app_callback_class()
+        # Batch with an empty mask; [3, 3, 1, 1, 1, 3, 2] keeps a value that ties with the threshold
+        depth_masks = [[1, 2, 3, 4, 5, 100], [2.0, 2.5, 3.0, 40.0] * 10, [], [3, 3, 1, 1, 1, 3, 2]]
+        stats = user_data.depth_stats.compute(depth_masks)
+        for i in (0, 1, 3):
+            values = np.array(depth_masks[i], dtype=np.float32)
+            kept = values[values <= np.percentile(values, 95)]
+            self.assertAlmostEqual(stats["mean"][i], kept.mean(), places=4)
+            self.assertAlmostEqual(stats["median"][i], np.median(kept), places=4)
+        self.assertEqual(stats["median"][3], 2.0)
+        self.assertEqual(stats["mean"][2], 0)
+        self.assertEqual(stats["min"][0], 1)
+        self.assertEqual(stats["histogram"][1].sum(), 40)
+
 class TestAppCallback(unittest.TestCase):
 
     @patch('app.hailo.get_roi_from_buffer')